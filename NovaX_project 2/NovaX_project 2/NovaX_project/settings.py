@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -123,3 +124,151 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+# Career prediction inference
+# Concurrent /predict-career/ requests that arrive within the window are
+# stacked into one matrix and scored together (up to the max batch size).
+
+PREDICTION_BATCH_WINDOW_MS = float(os.getenv('PREDICTION_BATCH_WINDOW_MS', '2'))
+
+PREDICTION_MAX_BATCH_SIZE = int(os.getenv('PREDICTION_MAX_BATCH_SIZE', '64'))
+
+# Seconds a request waits for its batch to be scored before giving up
+PREDICTION_TIMEOUT = float(os.getenv('PREDICTION_TIMEOUT', '10'))
+
+# Rows per vectorized chunk for /predict-career/batch/ and `manage.py predict_careers`
+PREDICTION_BULK_CHUNK_SIZE = int(os.getenv('PREDICTION_BULK_CHUNK_SIZE', '1000'))
+
+# Number of distinct feature vectors whose top-3 predictions are kept in the
+# per-worker LRU cache (0 disables caching)
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+
+# Recompute the memory-mapped model store's checksum on every load. It reads
+# every page of the arrays, so by default it is checked only when the store
+# is built or published; loads check the manifest, shapes and file sizes.
+MODEL_STORE_VERIFY = os.getenv('MODEL_STORE_VERIFY', 'False') == 'True'
+
+# Seconds between checks of ml_models/registry/CURRENT for a newly activated
+# model version (0 disables hot reload)
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', '10'))
+
+# AI counselor
+# Seconds a Gemini turn may take before the counselor falls back to the
+# rule-based question
+COUNSELOR_LLM_TIMEOUT = float(os.getenv('COUNSELOR_LLM_TIMEOUT', '4'))
+
+# Generated counselor turns cached per canonical conversation state
+# (0 disables caching; identical in-flight prompts are still merged)
+COUNSELOR_TURN_CACHE_SIZE = int(os.getenv('COUNSELOR_TURN_CACHE_SIZE', '1024'))
+
+COUNSELOR_TURN_CACHE_TTL = float(os.getenv('COUNSELOR_TURN_CACHE_TTL', '3600'))
+
+# Gemini circuit breaker: open after this many consecutive failures (or a 50%
+# error/slow-call rate over the window), then probe again after the reset delay
+COUNSELOR_BREAKER_FAILURES = int(os.getenv('COUNSELOR_BREAKER_FAILURES', '5'))
+
+COUNSELOR_BREAKER_WINDOW = float(os.getenv('COUNSELOR_BREAKER_WINDOW', '60'))
+
+COUNSELOR_BREAKER_SLOW_MS = float(os.getenv('COUNSELOR_BREAKER_SLOW_MS', '3000'))
+
+COUNSELOR_BREAKER_RESET = float(os.getenv('COUNSELOR_BREAKER_RESET', '30'))
+
+# LLM behind the counselor: 'gemini' (needs GEMINI_API_KEY), 'fake' (offline
+# stand-in for benchmarks and load tests) or 'none' (rule-based flow only)
+COUNSELOR_LLM_BACKEND = os.getenv('COUNSELOR_LLM_BACKEND', 'gemini')
+
+# Fake backend: median latency, lognormal sigma, failure probability and an
+# optional JSON file with a list of canned counselor turns
+COUNSELOR_FAKE_LATENCY_MS = float(os.getenv('COUNSELOR_FAKE_LATENCY_MS', '800'))
+
+COUNSELOR_FAKE_JITTER = float(os.getenv('COUNSELOR_FAKE_JITTER', '0.5'))
+
+COUNSELOR_FAKE_ERROR_RATE = float(os.getenv('COUNSELOR_FAKE_ERROR_RATE', '0'))
+
+COUNSELOR_FAKE_REPLIES = os.getenv('COUNSELOR_FAKE_REPLIES', '')
+
+# Gemini model name, reply length cap, and the approximate token budget for
+# the prompt (fixed preamble + compact conversation state)
+COUNSELOR_GEMINI_MODEL = os.getenv('COUNSELOR_GEMINI_MODEL', 'gemini-pro')
+
+COUNSELOR_LLM_MAX_OUTPUT_TOKENS = int(os.getenv('COUNSELOR_LLM_MAX_OUTPUT_TOKENS', '200'))
+
+COUNSELOR_PROMPT_TOKEN_BUDGET = int(os.getenv('COUNSELOR_PROMPT_TOKEN_BUDGET', '300'))
+
+# Speculative counselor turns: while a question is on screen, generate one LLM
+# reply per score bucket (and warm the final predictions) in the background.
+# Costs extra LLM calls; unclaimed turns are kept for at most this many sessions.
+COUNSELOR_SPECULATIVE = os.getenv('COUNSELOR_SPECULATIVE', 'False') == 'True'
+
+COUNSELOR_SPECULATIVE_MAX_SESSIONS = int(os.getenv('COUNSELOR_SPECULATIVE_MAX_SESSIONS', '500'))
+
+# JSON file with the counselor's question flows (empty: the bundled
+# NovaX_webpage/question_flows.json)
+COUNSELOR_FLOWS_PATH = os.getenv('COUNSELOR_FLOWS_PATH', '')
+
+# Stateless counseling: the counseling state travels as a signed token in each
+# request/response instead of the session, so turns write nothing to the
+# database until the finished survey is saved. Tokens expire after this many seconds.
+COUNSELOR_STATELESS_SESSIONS = os.getenv('COUNSELOR_STATELESS_SESSIONS', 'False') == 'True'
+
+COUNSELOR_STATE_MAX_AGE = int(os.getenv('COUNSELOR_STATE_MAX_AGE', '86400'))
+
+# Messages kept in a session's conversation history; beyond this the oldest
+# half is folded into a single summary entry
+COUNSELOR_HISTORY_MAX_MESSAGES = int(os.getenv('COUNSELOR_HISTORY_MAX_MESSAGES', '60'))
+
+# Buffered survey ingestion: /api/save-survey/ appends each survey to a
+# per-process spool file and answers at once; a background writer stores them
+# with bulk_create every SURVEY_BATCH_SIZE surveys or SURVEY_FLUSH_INTERVAL_MS.
+# Spool files left by crashed processes are replayed when a worker starts;
+# surveys the database rejects are moved to dead-letter.jsonl in the spool dir.
+SURVEY_INGEST_BUFFERED = os.getenv('SURVEY_INGEST_BUFFERED', 'False') == 'True'
+
+SURVEY_BATCH_SIZE = int(os.getenv('SURVEY_BATCH_SIZE', '100'))
+
+SURVEY_FLUSH_INTERVAL_MS = float(os.getenv('SURVEY_FLUSH_INTERVAL_MS', '200'))
+
+SURVEY_SPOOL_DIR = os.getenv('SURVEY_SPOOL_DIR', str(BASE_DIR / 'survey_spool'))
+
+# fsync each spooled survey (survives power loss, not just a process crash)
+SURVEY_SPOOL_FSYNC = os.getenv('SURVEY_SPOOL_FSYNC', 'True') == 'True'
+
+# SQLite connection tuning, applied to every new connection (NovaX_webpage/db_tuning.py):
+# journal mode, synchronous, page cache (KiB), memory-mapped I/O (bytes) and how
+# long a writer waits for the lock
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'True') == 'True'
+
+# WAL lets listing reads and survey/session writes stop waiting for each other, but
+# it is opt-in: the first WAL connection rewrites the db.sqlite3 header for good
+# (file format bytes 18/19 go from 1 to 2) and leaves db.sqlite3-wal/-shm beside it.
+# Set SQLITE_JOURNAL_MODE=WAL in the deployment environment, not in development.
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'DELETE')
+
+# NORMAL is safe with WAL; the rollback journal needs FULL
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL' if SQLITE_JOURNAL_MODE.upper() == 'WAL' else 'FULL')
+
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000'))
+
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+# Keep database connections open between requests (seconds; 0 = one per request)
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Survey admin pagination counts at most this many rows (no full COUNT(*))
+SURVEY_ADMIN_COUNT_CAP = int(os.getenv('SURVEY_ADMIN_COUNT_CAP', '10000'))
+
+# Analytics rollups (NovaX_webpage/rollups.py): surveys are counted in the same
+# transaction that saves them (up to ROLLUP_INSERT_BATCH_SIZE at a time, so a
+# backlog never stalls a request); `manage.py update_rollups` catches up the rest
+ROLLUPS_ON_INSERT = os.getenv('ROLLUPS_ON_INSERT', 'True') == 'True'
+
+ROLLUP_INSERT_BATCH_SIZE = int(os.getenv('ROLLUP_INSERT_BATCH_SIZE', '100'))
+
+ROLLUP_BATCH_SIZE = int(os.getenv('ROLLUP_BATCH_SIZE', '1000'))
+
+# Seconds a worker reuses the per-feature score sketches behind the report's percentiles
+ROLLUP_SKETCH_TTL = int(os.getenv('ROLLUP_SKETCH_TTL', '60'))
@@ -1,12 +1,75 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import CareerSurvey, PublicUniversity, PrivateCollege
+from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Subquery
+from django.utils.functional import cached_property
+from .models import CareerSurvey, PublicUniversity, PrivateCollege, SurveyAnswer
+
+
+class CappedCountPaginator(Paginator):
+    """Counts at most SURVEY_ADMIN_COUNT_CAP rows, so paging a huge table never runs a full COUNT(*);
+    `capped` tells the changelist to show the count as a lower bound ("10000+")"""
+    capped = False
+
+    @cached_property
+    def count(self):
+        cap = getattr(settings, 'SURVEY_ADMIN_COUNT_CAP', 10000)
+        # COUNT(*) over a LIMITed subquery of ids stops reading after cap + 1 rows
+        count = self.object_list.order_by().values('pk')[:cap + 1].count()
+        self.capped = count > cap
+        return min(count, cap)
+
+
+def _summarize_responses(responses):
+    """Top predicted career of a counseling survey, otherwise its number of answers"""
+    if not isinstance(responses, dict):
+        return '-'
+    if 'counseling_data' in responses:
+        predictions = responses.get('predictions')
+        if isinstance(predictions, list) and predictions and isinstance(predictions[0], dict):
+            if predictions[0].get('career'):
+                return str(predictions[0]['career'])
+        counseling_data = responses.get('counseling_data')
+        count = len(counseling_data) if isinstance(counseling_data, dict) else 0
+    else:
+        count = len(responses)
+    return f"{count} answers" if count else '-'
+
 
 @admin.register(CareerSurvey)
 class CareerSurveyAdmin(admin.ModelAdmin):
-    list_display = ('category', 'created_at')
+    list_display = ('category', 'created_at', 'responses_summary')
     list_filter = ('category', 'created_at')
     search_fields = ('category',)
     readonly_fields = ('created_at', 'responses')
+    # Newest first, read straight off the (category, created_at) and (created_at) indexes
+    ordering = ('-created_at',)
+    paginator = CappedCountPaginator
+    # Skip the unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            # The summary comes from the page's SurveyAnswer rows, each lookup one probe of
+            # the (survey, feature) unique index, so the list doesn't load the JSON
+            answers = SurveyAnswer.objects.filter(survey=OuterRef('pk'))
+            queryset = queryset.defer('responses').annotate(
+                top_prediction=Subquery(answers.filter(feature='prediction_1').values('text_value')[:1]),
+                answer_count=Subquery(
+                    answers.order_by().values('survey').annotate(n=Count('pk')).values('n')[:1]
+                ),
+            )
+        return queryset
+
+    @admin.display(description='Responses')
+    def responses_summary(self, obj):
+        if getattr(obj, 'top_prediction', None):
+            return obj.top_prediction
+        if getattr(obj, 'answer_count', None):
+            return f"{obj.answer_count} answers"
+        # No answer rows until backfill_survey_answers has run: read the JSON itself
+        return _summarize_responses(obj.responses)
 
 @admin.register(PublicUniversity)
 class PublicUniversityAdmin(admin.ModelAdmin):
@@ -111,26 +111,62 @@
 # counselor = EducationalCounselor()
 # ai_counselor.py
 
-import os
-import google.generativeai as genai
+import asyncio
+import threading
+import time
 from django.conf import settings
-import json
 import random
 
+from .answer_parser import FieldMatcher, format_score, is_edit_request, parse_score
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .counselor_prompt import MessageStream, build_prompt, parse_reply, validate_turn
+from .llm_backends import build_backend
+from .question_flow import load_flows
+from .speculation import Speculator
+from .turn_cache import TurnCache
+
 class EducationalCounselor:
-    def __init__(self):
-        # Configure Gemini API (Free tier available)
-        api_key = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
-        if api_key and api_key != "your-gemini-api-key-here":
-            try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-pro')
-                print("✅ Gemini AI Connected Successfully!")
-            except Exception as e:
-                print(f"❌ Gemini AI setup failed: {e}")
-                self.model = None
-        else:
-            self.model = None
+    def __init__(self, backend=None, flow=None, breaker=None):
+        # Gemini by default; COUNSELOR_LLM_BACKEND=fake swaps in the offline stand-in
+        self.backend = backend if backend is not None else build_backend()
+        
+        # Compiled question flow (see question_flows.json)
+        self.flow = flow or load_flows().get_flow()
+        self.field_matcher = FieldMatcher(self.flow.labels, self.flow.aliases)
+        
+        # Upper bound in seconds for one LLM round trip
+        self.llm_timeout = getattr(settings, 'COUNSELOR_LLM_TIMEOUT', 4)
+        self.prompt_token_budget = getattr(settings, 'COUNSELOR_PROMPT_TOKEN_BUDGET', 300)
+        
+        # Generated turns shared by every student who reaches the same state
+        self.turn_cache = TurnCache(
+            maxsize=getattr(settings, 'COUNSELOR_TURN_CACHE_SIZE', 1024),
+            ttl=getattr(settings, 'COUNSELOR_TURN_CACHE_TTL', 3600),
+        )
+        
+        # Skips the LLM entirely while it is failing or slow, instead of waiting on every turn
+        self.breaker = breaker or CircuitBreaker(
+            'llm',
+            failure_threshold=getattr(settings, 'COUNSELOR_BREAKER_FAILURES', 5),
+            window=getattr(settings, 'COUNSELOR_BREAKER_WINDOW', 60),
+            slow_call_ms=getattr(settings, 'COUNSELOR_BREAKER_SLOW_MS', 3000),
+            reset_timeout=getattr(settings, 'COUNSELOR_BREAKER_RESET', 30),
+        )
+        
+        # Opt-in: prepare likely next turns while the student reads the current question
+        self.speculator = None
+        if getattr(settings, 'COUNSELOR_SPECULATIVE', False):
+            self.speculator = Speculator(self, max_sessions=getattr(settings, 'COUNSELOR_SPECULATIVE_MAX_SESSIONS', 500))
+    
+    def stats(self):
+        """Turn cache, circuit breaker and speculation counters"""
+        stats = {
+            'turn_cache': self.turn_cache.stats(),
+            'breaker': self.breaker.stats(),
+        }
+        if self.speculator is not None:
+            stats['speculation'] = self.speculator.stats()
+        return stats
     
     def get_initial_greeting(self):
         """Return initial greeting message with human touch"""
@@ -142,15 +178,121 @@ class EducationalCounselor:
         
         return {
             "message": random.choice(greetings),
-            "next_question": "Let's begin with understanding your work style. On a scale of 1-10, how would you rate your natural tendency to be organized and pay attention to details?",
-            "field": "C_score",
-            "conversation_step": "personality",
+            "next_question": self.flow.opening_question,
+            "field": self.flow.first_field,
+            "conversation_step": self.flow.steps[self.flow.first_field],
             "show_edit_option": False
         }
     
-    def process_answer(self, user_input, current_field, conversation_step, collected_data):
+    def process_answer(self, user_input, current_field, conversation_step, collected_data, session_key=None):
         """Process user's answer and determine next question"""
+        user_input = self._normalize_answer(user_input, conversation_step)
+        early_response = self._check_answer(user_input, current_field, conversation_step, collected_data)
+        if early_response:
+            return early_response
+        
+        # If we have AI model, use it for more natural conversation
+        if self._should_use_ai(conversation_step, collected_data, current_field):
+            prepared = self._take_speculative(session_key, user_input, current_field, collected_data)
+            if prepared:
+                return prepared
+            try:
+                return self._ai_enhanced_response(user_input, current_field, conversation_step, collected_data)
+            except CircuitOpenError:
+                pass
+            except Exception as e:
+                # Fallback to rule-based if AI fails
+                print(f"⚠️ LLM turn failed ({type(e).__name__}), using rule-based flow")
         
+        # Rule-based flow
+        return self._rule_based_next_question(user_input, current_field, conversation_step, collected_data)
+    
+    async def process_answer_async(self, user_input, current_field, conversation_step, collected_data, session_key=None):
+        """Non-blocking process_answer: the LLM call gets a hard deadline, then falls back to rules"""
+        user_input = self._normalize_answer(user_input, conversation_step)
+        early_response = self._check_answer(user_input, current_field, conversation_step, collected_data)
+        if early_response:
+            return early_response
+        
+        if self._should_use_ai(conversation_step, collected_data, current_field):
+            prepared = self._take_speculative(session_key, user_input, current_field, collected_data)
+            if prepared:
+                return prepared
+            try:
+                return await asyncio.wait_for(
+                    self._ai_enhanced_response_async(user_input, current_field, conversation_step, collected_data),
+                    timeout=self.llm_timeout
+                )
+            except CircuitOpenError:
+                pass
+            except Exception as e:
+                # Includes asyncio.TimeoutError when the deadline passes
+                print(f"⚠️ LLM turn skipped ({type(e).__name__}), using rule-based flow")
+        
+        return self._rule_based_next_question(user_input, current_field, conversation_step, collected_data)
+    
+    def process_answer_stream(self, user_input, current_field, conversation_step, collected_data, session_key=None):
+        """Like process_answer, but yields ('token', text) with the acknowledgement as the LLM
+        writes it and ends with ('turn', response)"""
+        user_input = self._normalize_answer(user_input, conversation_step)
+        early_response = self._check_answer(user_input, current_field, conversation_step, collected_data)
+        if early_response:
+            yield 'turn', early_response
+            return
+        
+        if self._should_use_ai(conversation_step, collected_data, current_field):
+            prepared = self._take_speculative(session_key, user_input, current_field, collected_data)
+            if prepared:
+                yield 'turn', prepared
+                return
+            
+            collected_data[current_field] = float(user_input)
+            key = self.turn_cache.make_key(user_input, current_field, collected_data)
+            cached = self.turn_cache.get(key)
+            if cached is not None:
+                yield 'turn', dict(cached)
+                return
+            
+            if self.breaker.allow():
+                start = time.perf_counter()
+                parts = []
+                message = MessageStream()
+                try:
+                    prompt = self._build_ai_prompt(user_input, current_field, collected_data)
+                    for text in self.backend.stream(prompt, timeout=self.llm_timeout):
+                        parts.append(text)
+                        # The reply is JSON; only its message text is worth showing early
+                        shown = message.feed(text)
+                        if shown:
+                            yield 'token', shown
+                    turn = self._parse_ai_turn(''.join(parts), current_field)
+                except Exception as e:
+                    self.breaker.record_failure((time.perf_counter() - start) * 1000)
+                    print(f"⚠️ LLM stream failed ({type(e).__name__}), using rule-based flow")
+                else:
+                    self.breaker.record_success((time.perf_counter() - start) * 1000)
+                    self.turn_cache.put(key, turn)
+                    yield 'turn', dict(turn)
+                    return
+        
+        yield 'turn', self._rule_based_next_question(user_input, current_field, conversation_step, collected_data)
+    
+    def _take_speculative(self, session_key, user_input, current_field, collected_data):
+        """Turn prepared in the background for this answer, with the answer stored; None if not ready"""
+        if self.speculator is None:
+            return None
+        prepared = self.speculator.take(session_key, user_input, current_field, collected_data)
+        if prepared:
+            collected_data[current_field] = float(user_input)
+        return prepared
+    
+    def speculate(self, session_key, current_field, conversation_step, collected_data):
+        """Prepare the likely next turns for a session (no-op unless COUNSELOR_SPECULATIVE)"""
+        if self.speculator is not None:
+            self.speculator.schedule(session_key, current_field, conversation_step, collected_data)
+    
+    def _check_answer(self, user_input, current_field, conversation_step, collected_data):
+        """Handle edit requests and invalid scores; None means the answer should be processed"""
         # Check if user wants to edit previous answers
         if self._is_edit_request(user_input):
             return self._handle_edit_request(user_input, collected_data)
@@ -170,22 +312,28 @@ class EducationalCounselor:
                 "show_edit_option": len(collected_data) > 0,
                 "completed": False
             }
-        
-        # If we have AI model, use it for more natural conversation
-        if self.model and len(collected_data) > 2 and not self._is_edit_mode(conversation_step):
-            try:
-                return self._ai_enhanced_response(user_input, current_field, conversation_step, collected_data)
-            except:
-                # Fallback to rule-based if AI fails
-                pass
-        
-        # Rule-based flow
-        return self._rule_based_next_question(user_input, current_field, conversation_step, collected_data)
+        return None
+    
+    def _should_use_ai(self, conversation_step, collected_data, current_field=None):
+        """Use AI after collecting some data, never while editing or for the closing turn"""
+        return (self.backend is not None and len(collected_data) > 2 and not self._is_edit_mode(conversation_step)
+                and self._next_in_flow(current_field) is not None)
+    
+    def _next_in_flow(self, current_field):
+        """(field, step, question) that follows current_field in the question flow, or None"""
+        return self.flow.next(current_field)
+    
+    def _normalize_answer(self, user_input, conversation_step=None):
+        """Rewrite free-text scores ("7/10", "seven", "about 8") as plain numbers; edit requests
+        and the choice of field to edit ("the one about teamwork") are kept as typed"""
+        if self._is_edit_request(user_input) or conversation_step == "editing":
+            return user_input
+        score = parse_score(user_input)
+        return format_score(score) if score is not None else user_input
     
     def _is_edit_request(self, user_input):
         """Check if user wants to edit previous answers"""
-        edit_keywords = ['edit', 'change', 'modify', 'back', 'previous', 'correction', 'mistake', 'wrong', 'go back']
-        return any(keyword in user_input.lower() for keyword in edit_keywords)
+        return is_edit_request(user_input)
     
     def _is_edit_mode(self, conversation_step):
         """Check if currently in edit mode"""
@@ -193,11 +341,7 @@ class EducationalCounselor:
     
     def _is_valid_score(self, user_input):
         """Check if input is a valid score between 1-10"""
-        try:
-            score = float(user_input)
-            return 1 <= score <= 10
-        except ValueError:
-            return False
+        return parse_score(user_input) is not None
     
     def _handle_edit_request(self, user_input, collected_data):
         """Handle user's request to edit previous answers"""
@@ -209,9 +353,9 @@ class EducationalCounselor:
             ]
             return {
                 "message": random.choice(no_data_responses),
-                "next_question": self._get_current_question("C_score"),
-                "field": "C_score",
-                "conversation_step": "personality",
+                "next_question": self._get_current_question(self.flow.first_field),
+                "field": self.flow.first_field,
+                "conversation_step": self.flow.steps[self.flow.first_field],
                 "show_edit_option": False,
                 "completed": False
             }
@@ -244,29 +388,11 @@ class EducationalCounselor:
     
     def _get_field_descriptions(self):
         """Get human-readable descriptions for fields"""
-        return {
-            "C_score": "Organization & Attention to Detail",
-            "O_score": "Openness to New Experiences",
-            "E_score": "Outgoing & Social Nature", 
-            "A_score": "Cooperation & Team Spirit",
-            "N_score": "Stress Management & Resilience",
-            "Numerical_Aptitude": "Comfort with Numbers & Math",
-            "Verbal_Aptitude": "Language & Communication Skills",
-            "Abstract_Reasoning": "Pattern Recognition Ability",
-            "Logical_Reasoning": "Logical Thinking Skills",
-            "Spatial_Aptitude": "Spatial Visualization",
-            "Enjoy_Teamwork": "Enjoyment of Team Collaboration",
-            "Creative_Thinking": "Creative Problem-Solving",
-            "Attention_to_Detail": "Focus on Details"
-        }
+        return self.flow.labels
     
     def _get_current_question(self, current_field):
         """Get the current question text"""
-        questions_flow = self._get_questions_flow()
-        for field, step, question in questions_flow:
-            if field == current_field:
-                return question
-        return "Please continue with our assessment."
+        return self.flow.questions.get(current_field, "Please continue with our assessment.")
     
     def _process_edit_field_selection(self, user_input, collected_data):
         """Process user's selection of which field to edit"""
@@ -320,44 +446,33 @@ class EducationalCounselor:
     
     def _find_field_by_input(self, user_input, collected_data):
         """Find field based on user input (number or text)"""
-        user_input = user_input.lower().strip()
-        field_descriptions = self._get_field_descriptions()
-        
         # Check if input is a number
         try:
-            index = int(user_input) - 1
+            index = int(user_input.strip()) - 1
             fields = list(collected_data.keys())
             if 0 <= index < len(fields):
                 return fields[index]
         except ValueError:
             pass
         
-        # Check if input matches field names or descriptions
-        for field in collected_data.keys():
-            if (user_input in field.lower() or 
-                any(word in user_input for word in field_descriptions[field].lower().split())):
-                return field
+        # Whole words of field names, labels and aliases, typos allowed
+        field = self.field_matcher.match(user_input, collected_data)
+        if field:
+            return field
         
+        # Then an option number written out ("three") on its own; in a sentence
+        # ("the one about cooking") a number word is not a choice
+        if len(user_input.split()) != 1:
+            return None
+        number = parse_score(user_input)
+        fields = list(collected_data.keys())
+        if number is not None and number == int(number) and 1 <= number <= len(fields):
+            return fields[int(number) - 1]
         return None
     
     def _get_question_for_field(self, field):
         """Get the question text for a specific field"""
-        questions = {
-            "C_score": "How organized and detail-oriented are you? (1 = very disorganized, 10 = extremely organized)",
-            "O_score": "How open are you to new experiences and ideas? (1 = prefer routine, 10 = love trying new things)",
-            "E_score": "How outgoing and sociable are you? (1 = very reserved, 10 = extremely outgoing)",
-            "A_score": "How cooperative and compassionate are you? (1 = very competitive, 10 = extremely cooperative)",
-            "N_score": "How do you handle stress and negative emotions? (1 = very sensitive, 10 = very resilient)",
-            "Numerical_Aptitude": "How comfortable are you with numbers and calculations? (1 = struggle with math, 10 = excel at math)",
-            "Verbal_Aptitude": "How strong are your language and communication skills? (1 = struggle with words, 10 = excellent communicator)",
-            "Abstract_Reasoning": "How well can you identify patterns and solve abstract problems? (1 = find it difficult, 10 = very skilled)",
-            "Logical_Reasoning": "How good are you at logical thinking and reasoning? (1 = struggle with logic, 10 = very logical)",
-            "Spatial_Aptitude": "How well can you visualize and manipulate objects in space? (1 = poor spatial sense, 10 = excellent spatial thinking)",
-            "Enjoy_Teamwork": "How much do you enjoy working in teams? (1 = prefer working alone, 10 = love team collaboration)",
-            "Creative_Thinking": "How creative are you in problem-solving? (1 = prefer standard solutions, 10 = highly innovative)",
-            "Attention_to_Detail": "How important is attention to detail in your work? (1 = overlook details, 10 = extremely detail-oriented)"
-        }
-        return questions.get(field, f"Please rate your {field.replace('_', ' ').lower()}")
+        return self.flow.edit_questions.get(field, f"Please rate your {field.replace('_', ' ').lower()}")
     
     def _process_edit_answer(self, user_input, field_to_edit, collected_data):
         """Process the new answer for an edited field"""
@@ -415,21 +530,12 @@ class EducationalCounselor:
     
     def _get_next_field_after_edit(self, edited_field, collected_data):
         """Determine which field to ask next after editing"""
-        questions_flow = self._get_questions_flow()
-        current_index = None
-        
-        # Find the position of the edited field
-        for i, (field, step, question) in enumerate(questions_flow):
-            if field == edited_field:
-                current_index = i
-                break
-        
+        current_index = self.flow.index.get(edited_field)
         if current_index is None:
             return None
         
         # Find the next unanswered question
-        for i in range(current_index + 1, len(questions_flow)):
-            next_field, next_step, next_question = questions_flow[i]
+        for next_field in self.flow.fields[current_index + 1:]:
             if next_field not in collected_data:
                 return next_field
         
@@ -438,11 +544,7 @@ class EducationalCounselor:
     
     def _get_step_for_field(self, field):
         """Get the conversation step for a field"""
-        questions_flow = self._get_questions_flow()
-        for f, step, question in questions_flow:
-            if f == field:
-                return step
-        return "personality"
+        return self.flow.steps.get(field, "personality")
     
     def _rule_based_next_question(self, user_input, current_field, conversation_step, collected_data):
         """Rule-based question flow with human touch"""
@@ -458,17 +560,11 @@ class EducationalCounselor:
         if current_field and not current_field.startswith("editing_"):
             collected_data[current_field] = float(user_input)
         
-        questions_flow = self._get_questions_flow()
-        
-        # Find current position and get next question
-        current_index = None
-        for i, (field, step, question) in enumerate(questions_flow):
-            if field == current_field:
-                current_index = i
-                break
+        # Next question straight from the compiled flow
+        next_slot = self.flow.next(current_field)
         
-        if current_index is not None and current_index < len(questions_flow) - 1:
-            next_field, next_step, next_question = questions_flow[current_index + 1]
+        if next_slot is not None:
+            next_field, next_step, next_question = next_slot
             
             # Generate human-like acknowledgment
             acknowledgments = [
@@ -512,54 +608,71 @@ class EducationalCounselor:
             }
     
     def _get_questions_flow(self):
-        """Define the order of questions with natural transitions"""
-        return [
-            # Personality Questions (Big Five)
-            ("C_score", "personality", "On a scale of 1-10, how organized and detail-oriented are you? (1 = very disorganized, 10 = extremely organized)"),
-            ("O_score", "personality", "How open are you to new experiences and ideas? (1 = prefer routine and familiarity, 10 = love exploring new possibilities)"),
-            ("E_score", "personality", "How outgoing and sociable would you describe yourself? (1 = more reserved and private, 10 = highly outgoing and social)"),
-            ("A_score", "personality", "How cooperative and compassionate are you in your interactions? (1 = more competitive and direct, 10 = highly cooperative and empathetic)"),
-            ("N_score", "personality", "How do you typically handle stress and challenging emotions? (1 = quite sensitive to stress, 10 = very resilient and calm under pressure)"),
-            
-            # Aptitude Questions with transition
-            ("Numerical_Aptitude", "aptitude", "Now let's explore your natural abilities. How comfortable are you working with numbers and calculations? (1 = avoid math when possible, 10 = enjoy and excel at mathematical tasks)"),
-            ("Verbal_Aptitude", "aptitude", "How strong are your language and communication skills? (1 = struggle with expressing ideas, 10 = excellent at communication and language)"),
-            ("Abstract_Reasoning", "aptitude", "How easily can you identify patterns and solve abstract problems? (1 = find abstract thinking challenging, 10 = very skilled at pattern recognition)"),
-            ("Logical_Reasoning", "aptitude", "How natural is logical thinking and reasoning for you? (1 = prefer intuitive approaches, 10 = highly logical and analytical)"),
-            ("Spatial_Aptitude", "aptitude", "How well can you visualize and manipulate objects in space? (1 = poor spatial awareness, 10 = excellent spatial thinking)"),
-            
-            # Work Preference Questions with transition
-            ("Enjoy_Teamwork", "preference", "Now about your work style preferences: How much do you enjoy collaborating in teams? (1 = strongly prefer working independently, 10 = thrive in team environments)"),
-            ("Creative_Thinking", "preference", "How would you rate your creative problem-solving approach? (1 = prefer established methods, 10 = highly innovative and creative)"),
-            ("Attention_to_Detail", "preference", "Finally, how important is attention to detail in your ideal work? (1 = prefer big-picture thinking, 10 = extremely detail-oriented and precise)")
-        ]
+        """Ordered (field, step, question) tuples of the active flow"""
+        return self.flow.as_list
+    
+    def _build_ai_prompt(self, user_input, current_field, collected_data):
+        """Compact prompt for the next counselor turn (fixed preamble + token-budgeted state)"""
+        next_field, next_step, next_question = self._next_in_flow(current_field)
+        field_label = self._get_field_descriptions().get(current_field, current_field)
+        return build_prompt(user_input, field_label, collected_data, next_question, self.prompt_token_budget)
+    
+    def _parse_ai_turn(self, text, current_field):
+        """Validate the model's reply against the question flow; raises MalformedReplyError"""
+        next_field, next_step, next_question = self._next_in_flow(current_field)
+        return validate_turn(parse_reply(text), next_field, next_step, next_question)
     
     def _ai_enhanced_response(self, user_input, current_field, conversation_step, collected_data):
         """Use AI to generate more natural responses"""
-        prompt = f"""
-        You are a warm, empathetic educational counselor named Alex having a natural conversation with a student. 
-        So far you've collected these ratings (1-10 scale): {collected_data}
-        
-        The student just answered: "{user_input}" for question about {current_field}
-        
-        Provide a natural, human-like response that:
-        - Acknowledges their answer warmly
-        - Shows genuine interest in understanding them
-        - Gently transitions to the next question
-        - Mentions they can say 'edit' if they want to change previous answers
-        
-        Keep it conversational and friendly. Return your response in JSON format:
-        {{
-            "message": "your warm acknowledgment here",
-            "next_question": "next natural question here", 
-            "field": "next_field_name",
-            "conversation_step": "personality/aptitude/preference",
-            "show_edit_option": true
-        }}
-        """
-        
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
+        # The AI writes the wording only; the answer is stored here just like the rule-based flow does
+        collected_data[current_field] = float(user_input)
+        
+        def generate():
+            prompt = self._build_ai_prompt(user_input, current_field, collected_data)
+            return self._parse_ai_turn(self.backend.generate(prompt, timeout=self.llm_timeout), current_field)
+        
+        key = self.turn_cache.make_key(user_input, current_field, collected_data)
+        # Cache hits are served even while the circuit is open
+        return self.turn_cache.get_or_compute(key, lambda: self.breaker.call(generate))
+    
+    async def _ai_enhanced_response_async(self, user_input, current_field, conversation_step, collected_data):
+        """Async variant of _ai_enhanced_response; does not hold a thread during the round trip"""
+        collected_data[current_field] = float(user_input)
+        
+        async def generate():
+            prompt = self._build_ai_prompt(user_input, current_field, collected_data)
+            text = await self.backend.generate_async(prompt, timeout=self.llm_timeout)
+            return self._parse_ai_turn(text, current_field)
+        
+        key = self.turn_cache.make_key(user_input, current_field, collected_data)
+        return await self.turn_cache.get_or_compute_async(key, lambda: self.breaker.call_async(generate))
+
+# Global instances, one per question flow, created on first use
+_counselors = {}
+_counselor_lock = threading.Lock()
+
+
+def get_counselor(flow=None):
+    """Return the shared counselor for a question flow (default flow for unknown names),
+    creating it (and connecting the LLM backend) on first call"""
+    flow = load_flows().get_flow(flow)
+    counselor = _counselors.get(flow.name)
+    if counselor is None:
+        with _counselor_lock:
+            counselor = _counselors.get(flow.name)
+            if counselor is None:
+                # Every flow talks to the same backend through the same circuit breaker
+                shared = next(iter(_counselors.values()), None)
+                if shared is None:
+                    counselor = EducationalCounselor(flow=flow)
+                else:
+                    counselor = EducationalCounselor(backend=shared.backend, flow=flow, breaker=shared.breaker)
+                _counselors[flow.name] = counselor
+    return counselor
+
 
-# Global instance
-counselor = EducationalCounselor()
\ No newline at end of file
+def __getattr__(name):
+    # Keeps `from .ai_counselor import counselor` working without eager construction
+    if name == 'counselor':
+        return get_counselor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
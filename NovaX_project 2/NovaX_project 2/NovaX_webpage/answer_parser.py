@@ -0,0 +1,195 @@
+# answer_parser.py
+
+import re
+
+
+NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+
+# Words that ask to revisit earlier answers; False means exact match only
+# (short words whose one-letter typos are other common words, e.g. back/pack)
+EDIT_KEYWORDS = {
+    'edit': True, 'change': True, 'modify': True, 'previous': True, 'correction': True,
+    'mistake': True, 'wrong': True, 'update': True,
+    'back': False, 'undo': False, 'fix': False, 'redo': False,
+}
+
+# Typos are only forgiven in short answers; in a sentence, "nice" or "chance"
+# are far more likely to be real words than misspelt "nine" or "change"
+FUZZY_MAX_TOKENS = 3
+
+STOPWORDS = {'a', 'an', 'and', 'the', 'to', 'of', 'on', 'in', 'with', 'for', 'my', 'your', 'score', 'i', 'want', 'like'}
+
+TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?|[/%\-]")
+NUMBER = r"(\d+(?:\.\d+)?)"
+FRACTION_RE = re.compile(NUMBER + r" (?:/|out of|of) " + NUMBER)
+PERCENT_RE = re.compile(NUMBER + r" %")
+RANGE_RE = re.compile(NUMBER + r" (?:-|to|or|and) " + NUMBER)
+NUMBER_RE = re.compile(NUMBER)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class FuzzyIndex:
+    """Token -> values lookup that also matches one typo (symmetric-delete index, built once)"""
+
+    def __init__(self, min_fuzzy_length=4):
+        self.min_fuzzy_length = min_fuzzy_length
+        self._exact = {}
+        self._variants = {}
+
+    def add(self, word, value, fuzzy=True):
+        self._exact.setdefault(word, set()).add(value)
+        if fuzzy and len(word) >= self.min_fuzzy_length:
+            for variant in _deletes(word) | {word}:
+                self._variants.setdefault(variant, set()).add(value)
+
+    def exact(self, token):
+        return self._exact.get(token, set())
+
+    def lookup(self, token, fuzzy=True):
+        """Values for token: exact matches if any, else (if fuzzy) those within one edit"""
+        values = self._exact.get(token)
+        if values:
+            return values
+        # A dropped letter makes a typo one shorter than its word
+        if not fuzzy or len(token) < self.min_fuzzy_length - 1:
+            return set()
+        values = set()
+        # Deletion, insertion, substitution and transposition all share a delete variant
+        for variant in _deletes(token) | {token}:
+            values |= self._variants.get(variant, set())
+        return values
+
+
+def _build_number_index():
+    # Four-letter number words are one typo away from common words (four/your, nine/nice)
+    index = FuzzyIndex(min_fuzzy_length=5)
+    for word, value in NUMBER_WORDS.items():
+        index.add(word, value)
+    return index
+
+
+def _build_edit_index():
+    index = FuzzyIndex()
+    for word, fuzzy in EDIT_KEYWORDS.items():
+        index.add(word, word, fuzzy=fuzzy)
+    return index
+
+
+NUMBER_INDEX = _build_number_index()
+EDIT_INDEX = _build_edit_index()
+
+
+def _number_value(token, fuzzy):
+    if token[0].isdigit():
+        return token
+    values = NUMBER_INDEX.lookup(token, fuzzy)
+    return str(next(iter(values))) if len(values) == 1 else None
+
+
+def _in_range(value, low=1, high=10):
+    return value if low <= value <= high else None
+
+
+def parse_score(text, low=1, high=10):
+    """Score from free text ("7", "7/10", "seven", "about 8", "3 out of 5", "7-8"), or None"""
+    try:
+        return _in_range(float(text), low, high)
+    except (TypeError, ValueError):
+        pass
+
+    # Spell numbers as digits, drop hedges and filler, keep separators that carry meaning
+    tokens = tokenize(text)
+    fuzzy = len(tokens) <= FUZZY_MAX_TOKENS
+    words = []
+    for token in tokens:
+        number = _number_value(token, fuzzy)
+        words.append(number if number is not None else token)
+    normalized = ' '.join(words)
+
+    match = FRACTION_RE.search(normalized)
+    if match:
+        numerator, denominator = float(match.group(1)), float(match.group(2))
+        if denominator <= 0 or numerator > denominator:
+            return None
+        return _in_range(round(numerator * high / denominator, 1), low, high)
+
+    match = PERCENT_RE.search(normalized)
+    if match:
+        return _in_range(round(float(match.group(1)) * high / 100, 1), low, high)
+
+    numbers = [float(n) for n in NUMBER_RE.findall(normalized)]
+    if len(numbers) == 1:
+        return _in_range(numbers[0], low, high)
+
+    # "7-8", "7 or 8", "between 7 and 8": split the difference
+    match = RANGE_RE.search(normalized)
+    if len(numbers) == 2 and match and abs(numbers[0] - numbers[1]) <= 2:
+        return _in_range((numbers[0] + numbers[1]) / 2, low, high)
+    return None
+
+
+def format_score(value):
+    """7.0 -> '7', 7.5 -> '7.5'"""
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def is_edit_request(text):
+    """True if any whole word (typos allowed) asks to revisit earlier answers"""
+    tokens = [token for token in tokenize(text) if token.isalpha()]
+    fuzzy = len(tokens) <= FUZZY_MAX_TOKENS
+    return any(EDIT_INDEX.lookup(token, fuzzy) for token in tokens)
+
+
+def _stem(token):
+    return token[:-1] if len(token) > 3 and token.endswith('s') else token
+
+
+class FieldMatcher:
+    """Inverted index from field name, label and alias words to fields"""
+
+    def __init__(self, labels, aliases=None):
+        aliases = aliases or {}
+        self.index = FuzzyIndex()
+        field_tokens = {}
+        for field, label in labels.items():
+            words = field.lower().replace('_', ' ') + ' ' + label + ' ' + ' '.join(aliases.get(field, []))
+            field_tokens[field] = {_stem(t) for t in tokenize(words) if t.isalpha() and t not in STOPWORDS}
+            for token in field_tokens[field]:
+                self.index.add(token, field)
+
+        # Words shared by several fields (e.g. "aptitude") count for less
+        document_frequency = {}
+        for tokens in field_tokens.values():
+            for token in tokens:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        self.weights = {token: 1 / count for token, count in document_frequency.items()}
+
+    def match(self, text, candidates=None):
+        """Best matching field among candidates, or None when nothing (or a tie) matches"""
+        scores = {}
+        for token in tokenize(text):
+            if not token.isalpha() or token in STOPWORDS:
+                continue
+            token = _stem(token)
+            fields = self.index.exact(token)
+            # A typo match counts half, so "team work" is teamwork rather than a tie with "words"
+            weight = self.weights.get(token, 1) if fields else 0.5
+            for field in fields or self.index.lookup(token):
+                if candidates is None or field in candidates:
+                    scores[field] = scores.get(field, 0) + weight
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return None
+        return ranked[0][0]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class NovaxWebpageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'NovaX_webpage'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .db_tuning import configure_sqlite
+
+        connection_created.connect(configure_sqlite, dispatch_uid='NovaX_webpage.configure_sqlite')
@@ -0,0 +1,120 @@
+# bulk_predict.py
+
+import csv
+import io
+import json
+import math
+from itertools import islice
+
+from django.conf import settings
+
+from . import inference
+
+
+CHUNK_SIZE = getattr(settings, 'PREDICTION_BULK_CHUNK_SIZE', 1000)
+
+
+def iter_text_lines(stream, encoding='utf-8'):
+    """Decode a binary line iterator (request body, file) one line at a time; undecodable
+    bytes become U+FFFD, so only the rows holding them are reported as invalid"""
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode(encoding, errors='replace')
+        yield line
+
+
+def _iter_jsonl(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+
+
+def iter_feature_rows(lines, input_format='jsonl'):
+    """Yield (row_id, features, error) for every record of a JSONL or CSV stream"""
+    records = csv.DictReader(lines) if input_format == 'csv' else _iter_jsonl(lines)
+
+    for row_number, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            yield row_number, None, 'Row is not a valid JSON object.'
+            continue
+
+        row_id = record.get('id') or row_number
+        try:
+            # Same feature names and missing-value default as predict_career
+            features = [float(record.get(feat) or 0) for feat in inference.FEATURES]
+        except (TypeError, ValueError) as e:
+            yield row_id, None, f'Invalid feature value: {e}'
+            continue
+        # float() accepts nan and inf, which the model can't score and JSON can't carry
+        bad = [feat for feat, value in zip(inference.FEATURES, features) if not math.isfinite(value)]
+        if bad:
+            yield row_id, None, f'Invalid feature value: {bad[0]} must be a finite number'
+            continue
+        yield row_id, features, None
+
+
+def iter_predictions(rows, k=3, chunk_size=CHUNK_SIZE):
+    """Score rows in vectorized chunks and yield one result dict per input row"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        # A hot reload between chunks is fine, every row reports the version that scored it
+        model = inference.get_model()
+        valid = [features for _, features, error in chunk if error is None]
+        predictions = iter(inference.predict_top_k(valid, k=k, model=model) if valid else [])
+
+        for row_id, features, error in chunk:
+            if error is not None:
+                yield {'id': row_id, 'error': error}
+            else:
+                yield {'id': row_id, 'predictions': next(predictions), 'model_version': model.version}
+
+
+def format_jsonl(results):
+    """Render result dicts as JSON lines"""
+    for result in results:
+        yield json.dumps(result) + '\n'
+
+
+def format_csv(results, k=3):
+    """Render result dicts as CSV rows with one career/probability column pair per rank"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    header = ['id']
+    for rank in range(1, k + 1):
+        header += [f'career_{rank}', f'probability_{rank}']
+    header += ['model_version', 'error']
+
+    def flush(row):
+        writer.writerow(row)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return line
+
+    yield flush(header)
+    for result in results:
+        row = [result['id']]
+        predictions = result.get('predictions') or []
+        for rank in range(k):
+            if rank < len(predictions):
+                row += [predictions[rank]['career'], predictions[rank]['probability']]
+            else:
+                row += ['', '']
+        row += [result.get('model_version', ''), result.get('error', '')]
+        yield flush(row)
+
+
+def format_results(results, output_format='jsonl', k=3):
+    """Render result dicts in the requested output format"""
+    if output_format == 'csv':
+        return format_csv(results, k=k)
+    return format_jsonl(results)
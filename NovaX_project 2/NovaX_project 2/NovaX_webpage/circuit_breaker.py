@@ -0,0 +1,160 @@
+# circuit_breaker.py
+
+import threading
+import time
+from collections import deque
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by rolling error and latency statistics"""
+
+    def __init__(self, name, failure_threshold=5, window=60, min_calls=10,
+                 failure_rate=0.5, slow_call_ms=3000, reset_timeout=30):
+        # Opens on `failure_threshold` consecutive failures, or when `min_calls` calls in the
+        # last `window` seconds fail (errors and calls over `slow_call_ms`) at `failure_rate`
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.reset_timeout = reset_timeout
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self._calls = deque()    # (finished_at, ok, latency_ms)
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go upstream now; False means fall back immediately"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probe_started = None
+
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reports back is replaced
+                if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self._probe_started = now
+            return True
+
+    def record_success(self, latency_ms):
+        with self._lock:
+            slow = latency_ms >= self.slow_call_ms
+            self._record(not slow, latency_ms)
+            if self.state == HALF_OPEN:
+                if slow:
+                    self._open()
+                else:
+                    self._close()
+            elif not slow:
+                self.consecutive_failures = 0
+            self._evaluate()
+
+    def record_failure(self, latency_ms):
+        with self._lock:
+            self._record(False, latency_ms)
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open()
+            self._evaluate()
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn under the breaker; raises CircuitOpenError without calling it when open"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self.record_failure((time.perf_counter() - start) * 1000)
+            raise
+        self.record_success((time.perf_counter() - start) * 1000)
+        return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        """Async call(); a cancelled call (e.g. by a deadline) counts as a failure"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        start = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            self.record_failure((time.perf_counter() - start) * 1000)
+            raise
+        self.record_success((time.perf_counter() - start) * 1000)
+        return result
+
+    def _record(self, ok, latency_ms):
+        now = time.monotonic()
+        self._calls.append((now, ok, latency_ms))
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _evaluate(self):
+        if self.state != CLOSED:
+            return
+        if self.consecutive_failures >= self.failure_threshold:
+            self._open()
+            return
+        if len(self._calls) >= self.min_calls:
+            failed = sum(1 for _, ok, _ in self._calls if not ok)
+            if failed / len(self._calls) >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            print(f"⚠️ Circuit '{self.name}' opened, serving fallbacks for {self.reset_timeout}s")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_started = None
+
+    def _close(self):
+        print(f"✅ Circuit '{self.name}' closed")
+        self.state = CLOSED
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self._probe_started = None
+        # Start the window fresh so pre-outage failures cannot reopen it at once
+        self._calls.clear()
+
+    def stats(self):
+        """State plus error rate and latency percentiles over the rolling window"""
+        with self._lock:
+            now = time.monotonic()
+            calls = [c for c in self._calls if c[0] >= now - self.window]
+            latencies = sorted(latency for _, _, latency in calls)
+
+            def percentile(q):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 1)
+
+            failed = sum(1 for _, ok, _ in calls if not ok)
+            return {
+                'state': self.state,
+                'calls': len(calls),
+                'error_rate': round(failed / len(calls), 4) if calls else 0.0,
+                'p50_ms': percentile(0.5),
+                'p95_ms': percentile(0.95),
+                'consecutive_failures': self.consecutive_failures,
+                'rejected': self.rejected,
+            }
@@ -0,0 +1,63 @@
+# conversation_log.py
+
+from django.conf import settings
+
+
+class ConversationLog:
+    """Append-only counseling transcript: every message gets the next sequence number,
+    and once it holds more than max_messages the oldest are folded into one summary entry.
+
+    Folded messages move to archive, which is only read back when the finished session
+    is saved, so the survey keeps the whole conversation."""
+
+    def __init__(self, messages=None, last_seq=None, max_messages=None, archive=None):
+        self.messages = list(messages or [])
+        # Sessions from before sequence numbers: number the messages in order
+        if any('seq' not in m for m in self.messages):
+            self.messages = [dict(m, seq=i) for i, m in enumerate(self.messages, 1)]
+        self.last_seq = last_seq or (self.messages[-1]['seq'] if self.messages else 0)
+        self.max_messages = max(int(max_messages or getattr(settings, 'COUNSELOR_HISTORY_MAX_MESSAGES', 60)), 1)
+        self.archive = list(archive or [])
+
+    def append(self, type, message):
+        """Add a message and return its sequence number"""
+        self.last_seq += 1
+        self.messages.append({'seq': self.last_seq, 'type': type, 'message': message})
+        if len(self.messages) > self.max_messages:
+            self._compact()
+        return self.last_seq
+
+    def since(self, after=0):
+        """Messages newer than sequence number after (a cursor from an earlier call)"""
+        if after >= self.last_seq:
+            return []
+        # Sequence numbers are increasing, so scan back from the end
+        start = len(self.messages)
+        while start and self.messages[start - 1]['seq'] > after:
+            start -= 1
+        return self.messages[start:]
+
+    def full_history(self):
+        """Every message in order, folded ones included (what the saved survey stores)"""
+        if not self.archive:
+            # Nothing archived (or a log compacted before there was an archive): keep any summary
+            return list(self.messages)
+        return self.archive + [m for m in self.messages if m['type'] != 'summary']
+
+    def _compact(self):
+        # Keep the newest half, replace the rest by a summary carrying the seq of the
+        # last message it covers, so older cursors still receive it (always keep the newest)
+        keep = max(self.max_messages // 2, 1)
+        dropped, self.messages = self.messages[:-keep], self.messages[-keep:]
+        summary = dropped[0] if dropped[0]['type'] == 'summary' else None
+        compacted = dropped[1:] if summary else dropped
+        self.archive.extend(compacted)
+        count = (summary['count'] if summary else 0) + len(compacted)
+        answers = (summary['answers'] if summary else 0) + sum(1 for m in compacted if m['type'] == 'user')
+        self.messages.insert(0, {
+            'seq': dropped[-1]['seq'],
+            'type': 'summary',
+            'message': f"{count} earlier messages ({answers} of your answers) are not shown",
+            'count': count,
+            'answers': answers,
+        })
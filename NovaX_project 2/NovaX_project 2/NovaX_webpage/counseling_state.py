@@ -0,0 +1,119 @@
+# counseling_state.py
+
+import uuid
+
+from django.core import signing
+
+from .conversation_log import ConversationLog
+from .question_flow import load_flows
+
+
+SALT = 'NovaX_webpage.counseling_state'
+
+# Token layout; version 1 tokens carried scores as integer tenths
+TOKEN_VERSION = 2
+
+# Longest message kept from a transcript sent back by the client
+MAX_HISTORY_MESSAGE_CHARS = 2000
+
+# Most archived (compacted) messages read back from a stateless client
+MAX_ARCHIVED_MESSAGES = 2000
+
+
+class InvalidStateToken(ValueError):
+    """The client's counseling state token is missing, tampered with or expired"""
+
+
+def new_state(flow_name, current_field, conversation_step):
+    """Fresh counseling state; 'id' identifies the conversation without a server-side session"""
+    return {
+        'id': uuid.uuid4().hex[:16],
+        'flow': flow_name,
+        'current_field': current_field,
+        'conversation_step': conversation_step,
+        'counseling_data': {},
+        'conversation_history': ConversationLog(),
+    }
+
+
+def _pack_score(value):
+    # Exact, so a stateless session saves the same scores as a session-backed one
+    # ("7", "7.5", "7.625"); '' = unanswered
+    if value is None:
+        return ''
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def pack_state(state):
+    """Signed, compressed token for a counseling state (the history travels separately)"""
+    flow = load_flows().get_flow(state['flow'])
+    scores = ','.join(_pack_score(state['counseling_data'].get(field)) for field in flow.fields)
+    payload = [TOKEN_VERSION, state['id'], flow.name, state['current_field'], state['conversation_step'], scores]
+    return signing.dumps(payload, salt=SALT, compress=True)
+
+
+def unpack_state(token, max_age=None):
+    """Counseling state from a token made by pack_state; raises InvalidStateToken"""
+    if not token:
+        raise InvalidStateToken('Missing counseling state, please start a new session.')
+    try:
+        payload = signing.loads(token, salt=SALT, max_age=max_age)
+        # Tokens issued before the exact score format are still honoured until they expire
+        version, divisor = (payload.pop(0), 1) if len(payload) == 6 else (1, 10)
+        state_id, flow_name, current_field, conversation_step, scores = payload
+        flow = load_flows().get_flow(flow_name)
+        values = scores.split(',')
+        if version not in (1, TOKEN_VERSION) or len(values) != len(flow.fields):
+            raise ValueError('Malformed counseling state')
+        counseling_data = {field: float(value) / divisor for field, value in zip(flow.fields, values) if value}
+    except signing.SignatureExpired:
+        raise InvalidStateToken('Counseling session expired, please start a new session.')
+    except (signing.BadSignature, AttributeError, TypeError, ValueError):
+        raise InvalidStateToken('Invalid counseling state, please start a new session.')
+
+    return {
+        'id': state_id,
+        'flow': flow.name,
+        'current_field': current_field,
+        'conversation_step': conversation_step,
+        'counseling_data': counseling_data,
+        # Kept by the client in stateless mode, see history_from_client
+        'conversation_history': ConversationLog(),
+    }
+
+
+def _clean_message(message, types):
+    if not isinstance(message, dict) or not isinstance(message.get('message'), str):
+        return None
+    if message.get('type') not in types:
+        return None
+    entry = {'type': message['type'], 'message': message['message'][:MAX_HISTORY_MESSAGE_CHARS]}
+    if entry['type'] == 'summary':
+        try:
+            entry['count'], entry['answers'] = int(message.get('count')), int(message.get('answers'))
+        except (TypeError, ValueError):
+            return None
+    return entry
+
+
+def history_from_client(messages, archive=None):
+    """ConversationLog from the transcript a stateless client sends back with each answer,
+    plus the messages compacted out of it earlier (history_archive in the last reply).
+
+    It is only the client's own chat, so it is not signed; malformed entries are dropped,
+    messages are renumbered and no more than a log can hold is read."""
+    log = ConversationLog()
+    clean = [
+        entry for entry in (
+            _clean_message(message, ('user', 'bot', 'summary'))
+            for message in (messages if isinstance(messages, list) else [])[-log.max_messages:]
+        ) if entry
+    ]
+    archived = [
+        entry for entry in (
+            _clean_message(message, ('user', 'bot'))
+            for message in (archive if isinstance(archive, list) else [])[-MAX_ARCHIVED_MESSAGES:]
+        ) if entry
+    ]
+    return ConversationLog(clean, max_messages=log.max_messages, archive=archived)
@@ -0,0 +1,181 @@
+# counselor_prompt.py
+
+import json
+import re
+
+
+# Fixed instructions sent unchanged at the start of every prompt
+PREAMBLE = (
+    "You are Alex, a warm, empathetic career counselor chatting with a student who rates "
+    "themselves from 1 to 10.\n"
+    "Reply with a single JSON object and nothing else:\n"
+    '{"message": "1-2 sentences acknowledging the latest rating", '
+    '"next_question": "the next question below, lightly reworded, keeping its 1-10 anchors"}\n'
+    "Now and then remind them they can type 'edit' to change earlier answers."
+)
+
+MAX_MESSAGE_CHARS = 400
+MAX_QUESTION_CHARS = 600
+
+
+# Words any rating question may use; they don't say which trait it asks about
+SCALE_WORDS = frozenset((
+    'abilities', 'ability', 'about', 'approach', 'approaches', 'avoid', 'challenging', 'comfortable',
+    'describe', 'easily', 'enjoy', 'environments', 'excel', 'excellent', 'explore', 'exploring',
+    'extremely', 'finally', 'find', 'good', 'great', 'handle', 'highly', 'ideal', 'ideas', 'important',
+    'least', 'like', 'love', 'more', 'most', 'much', 'natural', 'naturally', 'oriented', 'poor',
+    'possible', 'prefer', 'preferences', 'problem', 'problems', 'quite', 'rate', 'rating', 'really',
+    'scale', 'skilled', 'skills', 'some', 'strong', 'strongly', 'struggle', 'style', 'such', 'tasks',
+    'tell', 'that', 'there', 'thinking', 'this', 'thrive', 'typically', 'under', 'usually', 'very',
+    'well', 'what', 'when', 'where', 'which', 'with', 'work', 'working', 'would', 'your', 'yourself',
+))
+
+
+def _topic_stems(text):
+    # Five-letter stems, so "organized" matches "organization" and "calculations" matches "calculate"
+    return {word[:5] for word in re.findall(r'[a-z]+', text.lower()) if len(word) > 3 and word not in SCALE_WORDS}
+
+
+def asks_about(question, expected_question):
+    """Whether a reworded question shares a topic word with the question the flow asks next"""
+    expected = _topic_stems(expected_question)
+    return not expected or bool(expected & _topic_stems(question))
+
+
+class MalformedReplyError(ValueError):
+    """The model's reply could not be turned into a valid counselor turn"""
+
+
+def estimate_tokens(text):
+    # About four characters per token for English prose
+    return len(text) // 4 + 1
+
+
+def _format_score(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return str(int(value)) if value.is_integer() else f"{value:g}"
+
+
+def build_prompt(user_input, field_label, collected_data, next_question, token_budget=300):
+    """PREAMBLE plus a compact state block; oldest scores are summarized away to fit the budget"""
+    answer = ' '.join(str(user_input).split())[:40]
+    scores = [f"{field}={_format_score(value)}" for field, value in collected_data.items()]
+
+    def render(kept):
+        dropped = len(scores) - len(kept)
+        profile = ' '.join(([f"(+{dropped} earlier)"] if dropped else []) + kept)
+        return (
+            f"{PREAMBLE}\n\n"
+            f"Profile: {profile}\n"
+            f"Latest: {field_label} = {answer}\n"
+            f"Next question: {next_question}"
+        )
+
+    kept = scores
+    prompt = render(kept)
+    while kept and estimate_tokens(prompt) > token_budget:
+        kept = kept[1:]
+        prompt = render(kept)
+    return prompt
+
+
+def parse_reply(text):
+    """The JSON object in a reply, tolerating code fences or prose around it"""
+    if not isinstance(text, str):
+        raise MalformedReplyError('Reply is not text')
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise MalformedReplyError('No JSON object in reply')
+    try:
+        reply = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise MalformedReplyError(f'Invalid JSON in reply: {e}')
+    if not isinstance(reply, dict):
+        raise MalformedReplyError('Reply is not a JSON object')
+    return reply
+
+
+class MessageStream:
+    """Pull the "message" string out of a reply while it is still being written, so the
+    acknowledgement can be shown as it arrives instead of after the whole JSON object"""
+
+    KEY = re.compile(r'"message"\s*:\s*"')
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, max_chars=MAX_MESSAGE_CHARS):
+        self.max_chars = max_chars
+        self._text = ''
+        self._pos = None        # next undecoded character of the message value
+        self._done = False
+        self._emitted = 0
+
+    def feed(self, chunk):
+        """Message text completed by this chunk of the reply ('' if none yet)"""
+        self._text += chunk
+        if self._done:
+            return ''
+        if self._pos is None:
+            match = self.KEY.search(self._text)
+            if match is None:
+                return ''
+            self._pos = match.end()
+
+        text, pos, out = self._text, self._pos, []
+        while pos < len(text):
+            char = text[pos]
+            if char == '"':
+                self._done = True
+                break
+            if char != '\\':
+                out.append(char)
+                pos += 1
+                continue
+            # Escapes split across chunks wait for the rest
+            if pos + 1 >= len(text):
+                break
+            if text[pos + 1] != 'u':
+                out.append(self.ESCAPES.get(text[pos + 1], text[pos + 1]))
+                pos += 2
+                continue
+            if pos + 6 > len(text):
+                break
+            try:
+                out.append(chr(int(text[pos + 2:pos + 6], 16)))
+            except ValueError:
+                self._done = True
+                break
+            pos += 6
+        self._pos = pos
+
+        # Same trimming and cap as validate_turn applies to the final message
+        shown = ''.join(out)
+        if not self._emitted:
+            shown = shown.lstrip()
+        shown = shown[:self.max_chars - self._emitted]
+        self._emitted += len(shown)
+        return shown
+
+
+def validate_turn(reply, next_field, next_step, next_question):
+    """Counselor turn from a parsed reply; field and step always come from the question flow"""
+    message = reply.get('message')
+    if not isinstance(message, str) or not message.strip():
+        raise MalformedReplyError('Reply has no message')
+
+    # Keep the model's wording only if it stayed on the question the flow asks next
+    question = reply.get('next_question')
+    if (not isinstance(question, str) or not question.strip() or len(question) > MAX_QUESTION_CHARS
+            or reply.get('field', next_field) != next_field or not asks_about(question, next_question)):
+        question = next_question
+
+    return {
+        "message": message.strip()[:MAX_MESSAGE_CHARS],
+        "next_question": question.strip(),
+        "field": next_field,
+        "conversation_step": next_step,
+        "show_edit_option": True,
+        "completed": False,
+    }
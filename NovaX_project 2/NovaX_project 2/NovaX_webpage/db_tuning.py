@@ -0,0 +1,31 @@
+# db_tuning.py
+
+from django.conf import settings
+
+
+def sqlite_pragmas():
+    """PRAGMA statements run on every new SQLite connection, from the SQLITE_* settings"""
+    return [
+        # WAL (opt-in, see settings.py) lets readers and the writer stop waiting for each other
+        f"PRAGMA journal_mode={getattr(settings, 'SQLITE_JOURNAL_MODE', 'DELETE')}",
+        # NORMAL is durable in WAL mode except for the last commits on power loss
+        f"PRAGMA synchronous={getattr(settings, 'SQLITE_SYNCHRONOUS', 'FULL')}",
+        # Negative cache_size is in KiB
+        f"PRAGMA cache_size={-int(getattr(settings, 'SQLITE_CACHE_SIZE_KB', 20000))}",
+        f"PRAGMA mmap_size={int(getattr(settings, 'SQLITE_MMAP_SIZE', 128 * 1024 * 1024))}",
+        f"PRAGMA busy_timeout={int(getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def apply_pragmas(cursor):
+    for statement in sqlite_pragmas():
+        cursor.execute(statement)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: tune each new SQLite connection"""
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNING', True):
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor)
@@ -0,0 +1,216 @@
+# ensemble_kernel.py
+
+import numpy as np
+from scipy.special import expit
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier, ExtraTreeClassifier
+
+
+TREE_LEAF = -1
+
+# Upper bound on rows x trees walked at once, keeps the node index matrix small
+TREE_CHUNK_ELEMENTS = 1 << 18
+
+
+def top_k_indices(probas, k=3):
+    """Column indices of the k largest values per row, best first"""
+    k = min(k, probas.shape[1])
+    candidates = np.argpartition(-probas, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(probas, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _is_ovr(model):
+    # Mirrors LogisticRegression.predict_proba's choice between OvR and softmax
+    multi_class = getattr(model, 'multi_class', 'auto')
+    if multi_class == 'ovr':
+        return True
+    return multi_class in ('auto', 'deprecated') and model.solver == 'liblinear'
+
+
+class CompiledEnsemble:
+    """Soft-voting ensemble flattened into NumPy arrays and evaluated in one vectorized pass"""
+
+    def __init__(self, n_classes, n_members):
+        self.n_classes = n_classes
+        self.n_members = n_members
+
+        # StandardScaler as plain arrays, or the original scaler if it can't be compiled
+        self.scaler_mean = None
+        self.scaler_scale = None
+        self.scaler = None
+
+        # Logistic regressions: one stacked weight matrix, (F, L * C)
+        self.linear_coef = None
+        self.linear_intercept = None
+        self.linear_ovr = None
+
+        # Every tree of every forest in one node table; trees of a forest are contiguous
+        self.tree_feature = None
+        self.tree_threshold = None
+        self.tree_left = None
+        self.tree_right = None
+        self.tree_value = None
+        self.tree_roots = None
+        self.forest_starts = None
+        self.forest_sizes = None
+        self.max_depth = 0
+
+        # Members with no flat representation keep their own predict_proba
+        self.fallback_models = []
+
+    @classmethod
+    def passthrough(cls, models, scaler, n_classes):
+        """Kernel that simply delegates to the original scaler and models"""
+        kernel = cls(n_classes, len(models))
+        kernel.scaler = scaler
+        kernel.fallback_models = list(models)
+        return kernel
+
+    @classmethod
+    def compile(cls, models, scaler, n_classes):
+        """Flatten the scaler and every supported ensemble member into NumPy arrays"""
+        kernel = cls(n_classes, len(models))
+
+        if isinstance(scaler, StandardScaler):
+            kernel.scaler_mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else None
+            kernel.scaler_scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else None
+        else:
+            kernel.scaler = scaler
+
+        linear_models = []
+        forests = []
+        for model in models:
+            if (isinstance(model, LogisticRegression) and n_classes > 2
+                    and model.coef_.shape[0] == n_classes):
+                linear_models.append(model)
+            elif (isinstance(model, (RandomForestClassifier, ExtraTreesClassifier))
+                    and model.n_outputs_ == 1 and len(model.classes_) == n_classes):
+                forests.append([estimator.tree_ for estimator in model.estimators_])
+            elif (isinstance(model, (DecisionTreeClassifier, ExtraTreeClassifier))
+                    and model.n_outputs_ == 1 and len(model.classes_) == n_classes):
+                forests.append([model.tree_])
+            else:
+                kernel.fallback_models.append(model)
+
+        if linear_models:
+            kernel.linear_coef = np.hstack([model.coef_.T for model in linear_models])
+            kernel.linear_intercept = np.concatenate([model.intercept_ for model in linear_models])
+            kernel.linear_ovr = np.array([_is_ovr(model) for model in linear_models])
+
+        if forests:
+            kernel._compile_trees(forests)
+
+        return kernel
+
+    def _compile_trees(self, forests):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        forest_starts, forest_sizes = [], []
+        offset = 0
+
+        for trees in forests:
+            forest_starts.append(len(roots))
+            forest_sizes.append(len(trees))
+            for tree in trees:
+                node_ids = np.arange(tree.node_count)
+                is_leaf = tree.children_left == TREE_LEAF
+
+                # Leaves point at themselves so every tree can be walked for max_depth steps
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+                rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(tree.threshold)
+
+                # Same per-leaf normalization as DecisionTreeClassifier.predict_proba
+                value = tree.value[:, 0, :self.n_classes].astype(np.float64)
+                normalizer = value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(value / normalizer)
+
+                roots.append(offset)
+                offset += tree.node_count
+                self.max_depth = max(self.max_depth, int(tree.max_depth))
+
+        self.tree_feature = np.concatenate(features).astype(np.intp)
+        self.tree_threshold = np.concatenate(thresholds).astype(np.float64)
+        self.tree_left = np.concatenate(lefts).astype(np.intp)
+        self.tree_right = np.concatenate(rights).astype(np.intp)
+        self.tree_value = np.concatenate(values)
+        self.tree_roots = np.array(roots, dtype=np.intp)
+        self.forest_starts = np.array(forest_starts, dtype=np.intp)
+        self.forest_sizes = np.array(forest_sizes, dtype=np.float64)
+
+    def transform(self, input_array):
+        """Scale raw features exactly like SCALER.transform"""
+        if self.scaler is not None:
+            return self.scaler.transform(input_array)
+        scaled = np.array(input_array, dtype=np.float64)
+        if self.scaler_mean is not None:
+            scaled -= self.scaler_mean
+        if self.scaler_scale is not None:
+            scaled /= self.scaler_scale
+        return scaled
+
+    def predict_proba(self, input_array):
+        """Averaged class probabilities (soft vote) for an N x F matrix of raw features"""
+        input_array = np.atleast_2d(input_array)
+        # predict_proba rejected these; the kernel would turn them into NaN probabilities
+        if not np.isfinite(input_array).all():
+            raise ValueError('Input contains NaN or infinity.')
+        scaled = self.transform(input_array)
+        total = np.zeros((scaled.shape[0], self.n_classes))
+
+        if self.linear_coef is not None:
+            total += self._linear_proba(scaled)
+        if self.tree_roots is not None:
+            total += self._tree_proba(scaled)
+        for model in self.fallback_models:
+            total += model.predict_proba(scaled)
+
+        return total / self.n_members
+
+    def _linear_proba(self, scaled):
+        decision = scaled @ self.linear_coef + self.linear_intercept
+        decision = decision.reshape(len(scaled), -1, self.n_classes)
+        proba = np.empty_like(decision)
+
+        softmax = ~self.linear_ovr
+        if softmax.any():
+            exp = decision[:, softmax]
+            exp = exp - exp.max(axis=2, keepdims=True)
+            np.exp(exp, exp)
+            proba[:, softmax] = exp / exp.sum(axis=2, keepdims=True)
+        if self.linear_ovr.any():
+            ovr = expit(decision[:, self.linear_ovr])
+            proba[:, self.linear_ovr] = ovr / ovr.sum(axis=2, keepdims=True)
+
+        return proba.sum(axis=1)
+
+    def _tree_proba(self, scaled):
+        # Trees split on float32 features, as in sklearn
+        features = scaled.astype(np.float32)
+        total = np.empty((len(features), self.n_classes))
+        step = max(1, TREE_CHUNK_ELEMENTS // len(self.tree_roots))
+
+        for start in range(0, len(features), step):
+            rows = features[start:start + step]
+            row_index = np.arange(len(rows))[:, None]
+            node = np.tile(self.tree_roots, (len(rows), 1))
+
+            # Walk all trees for all rows in lockstep, one level per iteration
+            for _ in range(self.max_depth):
+                go_left = rows[row_index, self.tree_feature[node]] <= self.tree_threshold[node]
+                node = np.where(go_left, self.tree_left[node], self.tree_right[node])
+
+            per_forest = np.add.reduceat(self.tree_value[node], self.forest_starts, axis=1)
+            total[start:start + step] = (per_forest / self.forest_sizes[:, None]).sum(axis=1)
+
+        return total
+
+    def verify(self, models, scaler, probe, atol=1e-9):
+        """Check the kernel against the original per-model soft vote on a probe matrix"""
+        scaled = scaler.transform(probe)
+        expected = np.mean([model.predict_proba(scaled) for model in models], axis=0)
+        return np.allclose(self.predict_proba(probe), expected, rtol=0, atol=atol)
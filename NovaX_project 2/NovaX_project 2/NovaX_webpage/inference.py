@@ -0,0 +1,340 @@
+# inference.py
+
+import math
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+from .ensemble_kernel import CompiledEnsemble, top_k_indices
+from .model_registry import ModelWatcher, current_version, load_version
+from .model_store import MANIFEST_NAME, ModelBundle, load_model_store
+
+
+# Feature order expected by the scaler and the ensemble (see the training script)
+FEATURES = [
+    "O_score", "C_score", "E_score", "A_score", "N_score",
+    "Numerical_Aptitude", "Verbal_Aptitude", "Abstract_Reasoning",
+    "Logical_Reasoning", "Spatial_Aptitude",
+    "Enjoy_Teamwork", "Creative_Thinking", "Attention_to_Detail"
+]
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, 'ml_models')
+MODEL_FILES = ["ensemble_models_optuna.pkl", "label_encoder.pkl", "scaler.pkl"]
+# Memory-mapped store built by `manage.py build_model_store`, preferred over the pickles
+MODEL_STORE_DIR = getattr(settings, 'MODEL_STORE_DIR', os.path.join(MODEL_DIR, 'store'))
+# Full checksum on every load instead of only when the store is built (reads every page)
+MODEL_STORE_VERIFY = getattr(settings, 'MODEL_STORE_VERIFY', False)
+# Versioned stores published by `manage.py publish_model`, preferred over both
+MODEL_REGISTRY_DIR = getattr(settings, 'MODEL_REGISTRY_DIR', os.path.join(MODEL_DIR, 'registry'))
+
+
+def load_models(model_dir=MODEL_DIR):
+    """Unpickle the ensemble, label encoder and scaler from model_dir"""
+    with open(os.path.join(model_dir, "ensemble_models_optuna.pkl"), "rb") as f:
+        ensemble_models = pickle.load(f)
+    with open(os.path.join(model_dir, "label_encoder.pkl"), "rb") as f:
+        label_encoder = pickle.load(f)
+    with open(os.path.join(model_dir, "scaler.pkl"), "rb") as f:
+        scaler = pickle.load(f)
+    return ensemble_models, label_encoder, scaler
+
+
+def model_fingerprint(model_dir=MODEL_DIR):
+    """Identify the artifacts on disk by name, size and modification time"""
+    fingerprint = []
+    for name in MODEL_FILES:
+        stat = os.stat(os.path.join(model_dir, name))
+        fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def compile_models(ensemble_models, label_encoder, scaler):
+    """Compile the ensemble into a flat kernel, keeping predict_proba if it doesn't match"""
+    n_classes = len(label_encoder.classes_)
+    try:
+        kernel = CompiledEnsemble.compile(ensemble_models, scaler, n_classes)
+        probe = np.random.default_rng(0).integers(1, 11, size=(64, len(FEATURES))).astype(float)
+        if kernel.verify(ensemble_models, scaler, probe):
+            return kernel
+        print("⚠️ Compiled ensemble does not match the soft vote, using predict_proba")
+    except Exception as e:
+        print(f"⚠️ Could not compile ensemble ({e}), using predict_proba")
+    return CompiledEnsemble.passthrough(ensemble_models, scaler, n_classes)
+
+
+def load_pickled_bundle(model_dir=MODEL_DIR):
+    """Unpickle and compile the original artifacts in this process"""
+    fingerprint = model_fingerprint(model_dir)
+    ensemble_models, label_encoder, scaler = load_models(model_dir)
+    kernel = compile_models(ensemble_models, label_encoder, scaler)
+    # Precomputed label lookup, replaces LABEL_ENCODER.inverse_transform per call
+    class_labels = [str(label) for label in label_encoder.classes_]
+    return ModelBundle(kernel, class_labels, fingerprint, model_dir, version='pickle')
+
+
+def load_model_bundle():
+    """Active registry version, else the shared model store, else the pickles;
+    a version or store that fails its checks falls through to the next source"""
+    version = current_version(MODEL_REGISTRY_DIR)
+    if version is not None:
+        try:
+            return load_version(MODEL_REGISTRY_DIR, version, FEATURES, verify=MODEL_STORE_VERIFY)
+        except Exception as e:
+            print(f"⚠️ Could not load model version {version} ({e}), trying the next source")
+    if os.path.exists(os.path.join(MODEL_STORE_DIR, MANIFEST_NAME)):
+        try:
+            return load_model_store(MODEL_STORE_DIR, FEATURES, verify=MODEL_STORE_VERIFY)
+        except Exception as e:
+            print(f"⚠️ Could not load the model store ({e}), using the pickles")
+    return load_pickled_bundle(MODEL_DIR)
+
+
+# Loaded on first use, so migrate, collectstatic and page views never pay for it
+MODEL = None
+_load_attempted = False
+_load_lock = threading.Lock()
+
+
+def get_model():
+    """Serving ModelBundle, loading it the first time it is needed (None if loading failed)"""
+    global MODEL, _load_attempted
+    if MODEL is None and not _load_attempted:
+        with _load_lock:
+            if MODEL is None and not _load_attempted:
+                try:
+                    MODEL = load_model_bundle()
+                    watcher.loaded_version = MODEL.version
+                    print(f"✅ Career Prediction Models loaded successfully from {MODEL.source} (version {MODEL.version})!")
+                except Exception as e:
+                    # IMPORTANT: Handle the case where models aren't found or fail to load
+                    print(f"❌ Error loading ML models: {e}. Check if the files are in {MODEL_DIR}")
+                _load_attempted = True
+    return MODEL
+
+
+def models_loaded():
+    return get_model() is not None
+
+
+def swap_model(bundle):
+    """Make bundle the serving model; requests already scoring keep the one they started with"""
+    global MODEL
+    MODEL = bundle
+    print(f"🔄 Career Prediction Models switched to version {bundle.version}")
+
+
+def _predict_rows(rows):
+    # One model reference per batch, so every row in it reports the same version
+    model = get_model()
+    return [(predictions, model) for predictions in predict_top_k(rows, model=model)]
+
+
+def predict_top_k(input_array, k=3, model=None):
+    """Score an N x 13 feature matrix and return the top-k careers for every row"""
+    model = model or get_model()
+    input_array = np.asarray(input_array, dtype=float).reshape(-1, len(FEATURES))
+
+    # Scaling and the soft vote over every member in one vectorized pass
+    avg_probas = model.kernel.predict_proba(input_array)
+    top_indices = top_k_indices(avg_probas, k)
+    class_labels = model.class_labels
+
+    results = []
+    for row_probas, row_indices in zip(avg_probas, top_indices):
+        results.append([
+            {'career': class_labels[index], 'probability': round(float(row_probas[index]) * 100, 2)}
+            for index in row_indices
+        ])
+    return results
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into one matrix per time window"""
+
+    def __init__(self, predict_fn, window_ms=2, max_batch_size=64, timeout=10):
+        self.predict_fn = predict_fn
+        self.window = max(window_ms, 0) / 1000.0
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.timeout = timeout
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, row):
+        """Queue one feature vector and return a Future for its top-k list"""
+        future = Future()
+        with self._cond:
+            self._pending.append((row, future))
+            self._ensure_worker()
+            self._cond.notify()
+        return future
+
+    def predict(self, row, timeout=None):
+        """Queue one feature vector and block until its batch has been scored
+        (concurrent.futures.TimeoutError after timeout seconds, default self.timeout)"""
+        return self.submit(row).result(self.timeout if timeout is None else timeout)
+
+    def _ensure_worker(self):
+        # Started lazily so forked gunicorn workers each get their own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            # Hold the first request for at most one window while others arrive
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            # Anything raised here fails this batch's futures, never the worker thread
+            try:
+                rows = np.array([row for row, _ in batch], dtype=float)
+                results = list(self.predict_fn(rows))
+                if len(results) != len(batch):
+                    raise ValueError(f"Scored {len(results)} rows for a batch of {len(batch)}")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class PredictionCache:
+    """Bounded LRU cache of top-3 results keyed by the normalized feature vector"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(input_data):
+        """Ordered feature tuple; rounding and +0.0 fold 7, 7.0 and -0.0/0.0 together"""
+        return tuple(round(float(value), 6) + 0.0 for value in input_data)
+
+    def get(self, key, fingerprint):
+        """Cached result for key, or None; a changed model fingerprint empties the cache"""
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._entries.clear()
+                self._fingerprint = fingerprint
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, fingerprint, result):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            # Results computed by an older model are simply dropped
+            if self._fingerprint is None:
+                self._fingerprint = fingerprint
+            elif fingerprint != self._fingerprint:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+batcher = MicroBatcher(
+    _predict_rows,
+    window_ms=getattr(settings, 'PREDICTION_BATCH_WINDOW_MS', 2),
+    max_batch_size=getattr(settings, 'PREDICTION_MAX_BATCH_SIZE', 64),
+    timeout=getattr(settings, 'PREDICTION_TIMEOUT', 10),
+)
+
+
+prediction_cache = PredictionCache(maxsize=getattr(settings, 'PREDICTION_CACHE_SIZE', 4096))
+
+watcher = ModelWatcher(
+    MODEL_REGISTRY_DIR,
+    interval=getattr(settings, 'MODEL_RELOAD_INTERVAL', 10),
+    on_load=swap_model,
+    features=FEATURES,
+    verify=MODEL_STORE_VERIFY,
+)
+
+
+def predict_one(input_data):
+    """Top-3 careers and the model version for one ordered feature vector
+
+    Served from the cache when possible, otherwise batched with concurrent callers.
+    """
+    # Checked per request: a NaN row in a shared batch would fail every caller in it
+    bad = [feat for feat, value in zip(FEATURES, input_data) if not math.isfinite(value)]
+    if bad:
+        raise ValueError(f'{bad[0]} must be a finite number')
+    model = get_model()
+    if model is None:
+        raise RuntimeError('Prediction models are not loaded.')
+    watcher.ensure_started()
+    key = prediction_cache.make_key(input_data)
+
+    cached = prediction_cache.get(key, model.fingerprint)
+    if cached is None:
+        results, model = batcher.predict(key)
+        prediction_cache.put(key, model.fingerprint, (results, model.version))
+        version = model.version
+    else:
+        results, version = cached
+
+    # Callers may mutate the dicts (session storage, JSON), keep the cached copy intact
+    return [dict(prediction) for prediction in results], version
+
+
+def warm_predictions(rows):
+    """Score rows in one batch and seed the prediction cache with them"""
+    model = get_model()
+    if model is None:
+        return
+    for row, results in zip(rows, predict_top_k(rows, model=model)):
+        prediction_cache.put(prediction_cache.make_key(row), model.fingerprint, (results, model.version))
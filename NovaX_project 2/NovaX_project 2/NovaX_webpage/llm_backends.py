@@ -0,0 +1,202 @@
+# llm_backends.py
+
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+
+
+class LLMError(Exception):
+    """Raised by a backend when a generation fails"""
+
+
+class LLMBackend:
+    """Interface the counselor uses to talk to a language model"""
+    name = 'base'
+
+    def generate(self, prompt, timeout=None):
+        """Full reply text for prompt"""
+        raise NotImplementedError
+
+    async def generate_async(self, prompt, timeout=None):
+        """Async generate(); the default runs it in a thread"""
+        return await asyncio.to_thread(self.generate, prompt, timeout)
+
+    def stream(self, prompt, timeout=None):
+        """Reply text in chunks as it is produced; the default yields one chunk"""
+        yield self.generate(prompt, timeout)
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through google-generativeai"""
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name='gemini-pro', max_output_tokens=200):
+        # The Gemini SDK is slow to import, only load it when it will be used
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.generation_config = {"max_output_tokens": max_output_tokens, "temperature": 0.7}
+        # JSON mode is not available on the 1.0 models
+        if model_name not in ('gemini-pro', 'gemini-1.0-pro'):
+            self.generation_config["response_mime_type"] = "application/json"
+
+    def generate(self, prompt, timeout=None):
+        response = self.model.generate_content(
+            prompt, generation_config=self.generation_config, request_options={"timeout": timeout}
+        )
+        return response.text
+
+    async def generate_async(self, prompt, timeout=None):
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self.generation_config, request_options={"timeout": timeout}
+        )
+        return response.text
+
+    def stream(self, prompt, timeout=None):
+        # request_options' timeout bounds each read, not the whole reply, so a reply that
+        # keeps trickling in is cut off at the overall deadline, like generate
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for chunk in self.model.generate_content(
+            prompt, stream=True, generation_config=self.generation_config, request_options={"timeout": timeout}
+        ):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f'Reply not complete after {timeout}s')
+            yield chunk.text
+
+
+# Used by FakeBackend when no replies file is given; without a next_question
+# the counselor keeps the flow's own wording
+DEFAULT_FAKE_REPLIES = [
+    {"message": "Thanks, that tells me a lot about how you like to work!"},
+    {"message": "Got it, I appreciate you being honest about that."},
+    {"message": "That's really helpful, thank you for sharing."},
+]
+
+
+class FakeBackend(LLMBackend):
+    """Deterministic in-process stand-in for an LLM: canned JSON replies with simulated
+    latency and errors, for benchmarks and load tests without network access"""
+    name = 'fake'
+
+    def __init__(self, replies=None, latency_ms=800, jitter=0.5, distribution='lognormal',
+                 error_rate=0.0, chunk_size=16, chunk_delay_ms=20, seed=0):
+        # distribution: 'fixed', 'uniform' (latency_ms * (1 +/- jitter)) or
+        # 'lognormal' (median latency_ms, sigma jitter, so a long right tail)
+        self.replies = [json.dumps(reply) for reply in (replies or DEFAULT_FAKE_REPLIES)]
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.chunk_delay_ms = chunk_delay_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _plan(self, timeout):
+        # Draw (delay seconds, reply text or None for an error) under the lock so a seed replays exactly
+        with self._lock:
+            self.calls += 1
+            if self.distribution == 'fixed':
+                delay = self.latency_ms
+            elif self.distribution == 'uniform':
+                delay = self.latency_ms * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            else:
+                delay = self.latency_ms * math.exp(self._rng.gauss(0, self.jitter))
+            failed = self._rng.random() < self.error_rate
+            reply = self.replies[self._rng.randrange(len(self.replies))]
+
+            delay = max(delay, 0) / 1000
+            if timeout is not None and delay > timeout:
+                self.timeouts += 1
+                return timeout, None
+            if failed:
+                self.errors += 1
+                return delay, None
+            return delay, reply
+
+    def generate(self, prompt, timeout=None):
+        delay, reply = self._plan(timeout)
+        time.sleep(delay)
+        if reply is None:
+            raise LLMError('Simulated LLM failure')
+        return reply
+
+    async def generate_async(self, prompt, timeout=None):
+        delay, reply = self._plan(timeout)
+        await asyncio.sleep(delay)
+        if reply is None:
+            raise LLMError('Simulated LLM failure')
+        return reply
+
+    def stream(self, prompt, timeout=None):
+        # The drawn latency is time to first chunk; the rest trickles out chunk by chunk
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay, reply = self._plan(timeout)
+        time.sleep(delay)
+        if reply is None:
+            raise LLMError('Simulated LLM failure')
+        for start in range(0, len(reply), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay_ms / 1000)
+            # Same overall deadline as GeminiBackend.stream
+            if deadline is not None and time.monotonic() > deadline:
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f'Reply not complete after {timeout}s')
+            yield reply[start:start + self.chunk_size]
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'errors': self.errors, 'timeouts': self.timeouts}
+
+
+def load_fake_replies(path):
+    """Canned replies from a JSON file holding a list of counselor turn objects"""
+    with open(path) as f:
+        replies = json.load(f)
+    if not isinstance(replies, list) or not replies:
+        raise ValueError(f"{path} must contain a non-empty JSON list of replies")
+    return replies
+
+
+def build_backend(name=None):
+    """Backend named by COUNSELOR_LLM_BACKEND ('gemini', 'fake' or 'none'); None when disabled"""
+    name = name or getattr(settings, 'COUNSELOR_LLM_BACKEND', 'gemini')
+
+    if name == 'fake':
+        replies_path = getattr(settings, 'COUNSELOR_FAKE_REPLIES', '')
+        return FakeBackend(
+            replies=load_fake_replies(replies_path) if replies_path else None,
+            latency_ms=getattr(settings, 'COUNSELOR_FAKE_LATENCY_MS', 800),
+            jitter=getattr(settings, 'COUNSELOR_FAKE_JITTER', 0.5),
+            error_rate=getattr(settings, 'COUNSELOR_FAKE_ERROR_RATE', 0.0),
+        )
+
+    if name == 'gemini':
+        # Configure Gemini API (Free tier available)
+        api_key = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
+        if api_key and api_key != "your-gemini-api-key-here":
+            try:
+                backend = GeminiBackend(
+                    api_key,
+                    model_name=getattr(settings, 'COUNSELOR_GEMINI_MODEL', 'gemini-pro'),
+                    max_output_tokens=getattr(settings, 'COUNSELOR_LLM_MAX_OUTPUT_TOKENS', 200),
+                )
+                print("✅ Gemini AI Connected Successfully!")
+                return backend
+            except Exception as e:
+                print(f"❌ Gemini AI setup failed: {e}")
+        return None
+
+    if name != 'none':
+        print(f"❌ Unknown COUNSELOR_LLM_BACKEND '{name}', using rule-based flow only")
+    return None
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from NovaX_webpage import inference
+from NovaX_webpage.model_registry import activate_version, current_version, list_versions
+
+
+class Command(BaseCommand):
+    help = "Switch the active model version (roll forward or back); workers reload it in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help='Version to activate (omit to list versions)')
+        parser.add_argument('--registry', default=inference.MODEL_REGISTRY_DIR, help='Model registry directory')
+
+    def handle(self, *args, **options):
+        registry = options['registry']
+        if not options['version']:
+            active = current_version(registry)
+            for version in list_versions(registry):
+                self.stdout.write(f"{'*' if version == active else ' '} {version}")
+            return
+
+        try:
+            activate_version(registry, options['version'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"✅ Model version {options['version']} is now active"))
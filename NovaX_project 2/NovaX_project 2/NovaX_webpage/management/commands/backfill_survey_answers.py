@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from NovaX_webpage.models import CareerSurvey, SurveyAnswer
+from NovaX_webpage.survey_answers import build_answers
+
+
+class Command(BaseCommand):
+    help = "Fill the typed SurveyAnswer table from the responses JSON of surveys saved before it existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Surveys per transaction')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Delete and rebuild the answers of every survey, not just those without any')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        surveys = CareerSurvey.objects.order_by('pk')
+        if not options['rebuild']:
+            surveys = surveys.filter(~Exists(SurveyAnswer.objects.filter(survey=OuterRef('pk'))))
+
+        # Walk by primary key so each batch is one indexed range scan, and a rerun after
+        # an interruption resumes where it stopped
+        last_pk = 0
+        scanned = written = 0
+        while True:
+            batch = list(surveys.filter(pk__gt=last_pk).only('pk', 'responses')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            with transaction.atomic():
+                if options['rebuild']:
+                    SurveyAnswer.objects.filter(survey__in=batch).delete()
+                written += len(SurveyAnswer.objects.bulk_create(build_answers(batch), batch_size=500))
+            scanned += len(batch)
+            self.stderr.write(f"  {scanned} surveys, {written} answers")
+
+        self.stderr.write(self.style.SUCCESS(f"✅ Backfilled {written} answers from {scanned} surveys"))
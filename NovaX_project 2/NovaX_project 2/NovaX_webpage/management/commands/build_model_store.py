@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from NovaX_webpage import inference
+from NovaX_webpage.model_store import load_model_store, save_model_store
+
+
+class Command(BaseCommand):
+    help = "Compile the pickled models into a memory-mapped store that all gunicorn workers share"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-dir', default=inference.MODEL_DIR, help='Directory with the .pkl artifacts')
+        parser.add_argument('--output', default=inference.MODEL_STORE_DIR, help='Directory to write the store to')
+
+    def handle(self, *args, **options):
+        model_dir = options['model_dir']
+        try:
+            fingerprint = inference.model_fingerprint(model_dir)
+            ensemble_models, label_encoder, scaler = inference.load_models(model_dir)
+        except Exception as e:
+            raise CommandError(f"Could not load models from {model_dir}: {e}")
+
+        kernel = inference.compile_models(ensemble_models, label_encoder, scaler)
+        class_labels = [str(label) for label in label_encoder.classes_]
+        manifest = save_model_store(kernel, class_labels, inference.FEATURES, options['output'],
+                                    source_fingerprint=fingerprint)
+        try:
+            # The one full checksum pass; workers only check the manifest when they load it
+            load_model_store(options['output'], inference.FEATURES, verify=True)
+        except Exception as e:
+            raise CommandError(f"Model store written to {options['output']} failed verification: {e}")
+
+        self.stdout.write(f"Arrays: {', '.join(manifest['arrays']) or 'none'}")
+        if manifest['fallback']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {len(kernel.fallback_models)} member(s) could not be flattened and stay pickled"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"✅ Model store written to {options['output']} ({manifest['checksum'][:12]})"))
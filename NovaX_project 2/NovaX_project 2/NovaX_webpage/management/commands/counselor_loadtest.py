@@ -0,0 +1,101 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from NovaX_webpage.ai_counselor import EducationalCounselor
+from NovaX_webpage.inference import FEATURES
+from NovaX_webpage.llm_backends import DEFAULT_FAKE_REPLIES, FakeBackend, load_fake_replies
+from NovaX_webpage.turn_cache import TurnCache
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Command(BaseCommand):
+    help = "Drive the AI counselor against the in-process fake LLM and report throughput, latency and fallbacks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', '-n', type=int, default=500, help='Counselor turns to run')
+        parser.add_argument('--concurrency', '-c', type=int, default=32, help='Turns in flight at once')
+        parser.add_argument('--mode', choices=['sync', 'async'], default='sync',
+                            help='process_answer on a thread pool, or process_answer_async on one event loop')
+        parser.add_argument('--latency-ms', type=float, default=800, help='Median fake LLM latency')
+        parser.add_argument('--jitter', type=float, default=0.5, help='Latency spread (lognormal sigma)')
+        parser.add_argument('--distribution', choices=['fixed', 'uniform', 'lognormal'], default='lognormal')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Probability a fake call fails')
+        parser.add_argument('--timeout', type=float, help='Per-call LLM deadline in seconds (default: COUNSELOR_LLM_TIMEOUT)')
+        parser.add_argument('--replies', help='JSON file with a list of canned counselor turns')
+        parser.add_argument('--cache', action='store_true', help='Keep the turn cache enabled (off by default)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        replies = load_fake_replies(options['replies']) if options['replies'] else DEFAULT_FAKE_REPLIES
+        backend = FakeBackend(
+            replies=replies, latency_ms=options['latency_ms'], jitter=options['jitter'],
+            distribution=options['distribution'], error_rate=options['error_rate'], seed=options['seed'],
+        )
+        counselor = EducationalCounselor(backend=backend)
+        if options['timeout'] is not None:
+            counselor.llm_timeout = options['timeout']
+        if not options['cache']:
+            counselor.turn_cache = TurnCache(maxsize=0)
+
+        # Random mid-assessment states, so the AI path (more than 2 answers) is always eligible
+        rng = random.Random(options['seed'])
+        turns = []
+        for _ in range(max(options['requests'], 1)):
+            answered = rng.randint(3, len(FEATURES) - 1)
+            collected_data = {feature: float(rng.randint(1, 10)) for feature in FEATURES[:answered]}
+            turns.append((str(rng.randint(1, 10)), FEATURES[answered], 'personality', collected_data))
+
+        ai_messages = {reply.get('message') for reply in replies}
+        run = self._run_async if options['mode'] == 'async' else self._run_sync
+        start = time.perf_counter()
+        results = run(counselor, turns, max(options['concurrency'], 1))
+        wall = time.perf_counter() - start
+
+        latencies = sorted(latency for latency, _ in results)
+        ai_turns = sum(1 for _, response in results if response.get('message') in ai_messages)
+
+        self.stdout.write(f"Mode: {options['mode']}, concurrency {options['concurrency']}, "
+                          f"fake latency {options['latency_ms']:.0f} ms ({options['distribution']}, "
+                          f"jitter {options['jitter']}), error rate {options['error_rate']}, "
+                          f"timeout {counselor.llm_timeout}s")
+        self.stdout.write(f"Turns: {len(results)} in {wall:.2f}s = {len(results) / wall:.1f} turns/s")
+        self.stdout.write(
+            f"Latency ms: p50 {percentile(latencies, 0.5):.1f}, p95 {percentile(latencies, 0.95):.1f}, "
+            f"p99 {percentile(latencies, 0.99):.1f}, max {latencies[-1]:.1f}"
+        )
+        self.stdout.write(f"LLM turns: {ai_turns}, rule-based fallbacks: {len(results) - ai_turns}")
+        self.stdout.write(f"Backend: {backend.stats()}")
+        self.stdout.write(f"Breaker: {counselor.breaker.stats()}")
+        if options['cache']:
+            self.stdout.write(f"Turn cache: {counselor.turn_cache.stats()}")
+
+    def _timed(self, counselor, turn):
+        start = time.perf_counter()
+        response = counselor.process_answer(*turn)
+        return (time.perf_counter() - start) * 1000, response
+
+    def _run_sync(self, counselor, turns, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(lambda turn: self._timed(counselor, turn), turns))
+
+    def _run_async(self, counselor, turns, concurrency):
+        async def timed(turn, semaphore):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await counselor.process_answer_async(*turn)
+                return (time.perf_counter() - start) * 1000, response
+
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(timed(turn, semaphore) for turn in turns))
+
+        return asyncio.run(main())
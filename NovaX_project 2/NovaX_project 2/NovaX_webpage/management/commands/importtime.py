@@ -0,0 +1,58 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# "import time: self [us] | cumulative | imported package"
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S.*)$')
+
+
+class Command(BaseCommand):
+    help = "Measure a cold import of the project in a fresh interpreter, like `python -X importtime`"
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', default=['NovaX_project.urls'],
+                            help='Modules to import after django.setup() (default: NovaX_project.urls)')
+        parser.add_argument('--top', type=int, default=20, help='Number of modules to list')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+
+    def handle(self, *args, **options):
+        code = "import django; django.setup(); " + "; ".join(f"import {module}" for module in options['modules'])
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'NovaX_project.settings')
+
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR),
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise CommandError(f"Import failed:\n{proc.stderr[-2000:]}")
+
+        entries = []
+        for line in proc.stderr.splitlines():
+            match = LINE_RE.match(line)
+            if match and match.group(4) != 'imported package':
+                self_us, cumulative_us, indent, name = match.groups()
+                entries.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name.strip()))
+
+        total_ms = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0) / 1000
+        self.stdout.write(f"Interpreter start to ready: {wall_ms:.1f} ms")
+        self.stdout.write(f"Import time: {total_ms:.1f} ms across {len(entries)} modules\n")
+
+        column = 0 if options['sort'] == 'self' else 1
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for entry in sorted(entries, key=lambda e: e[column], reverse=True)[:options['top']]:
+            self.stdout.write(f"{entry[1] / 1000:>14.1f} {entry[0] / 1000:>9.1f}  {entry[3]}")
+
+        project = [e for e in entries if e[3].split('.')[0] in ('NovaX_webpage', 'NovaX_project')]
+        if project:
+            self.stdout.write("\nProject modules:")
+            for entry in sorted(project, key=lambda e: e[1], reverse=True):
+                self.stdout.write(f"{entry[1] / 1000:>14.1f} {entry[0] / 1000:>9.1f}  {entry[3]}")
@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from NovaX_webpage import bulk_predict, inference
+
+
+class Command(BaseCommand):
+    help = "Predict top-k careers for a JSONL or CSV file of aptitude scores, streaming results row by row"
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Input file keyed by the 13 feature names ('-' for stdin)")
+        parser.add_argument('--output', '-o', default='-', help="Output file ('-' for stdout)")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Input format (default: from file extension)')
+        parser.add_argument('--output-format', choices=['jsonl', 'csv'], help='Output format (default: same as input)')
+        parser.add_argument('--top-k', type=int, default=3, help='Number of careers per row')
+        parser.add_argument('--chunk-size', type=int, default=bulk_predict.CHUNK_SIZE, help='Rows per vectorized chunk')
+
+    def handle(self, *args, **options):
+        if not inference.models_loaded():
+            raise CommandError('Prediction models are not loaded.')
+
+        path = options['input']
+        input_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        output_format = options['output_format'] or input_format
+        k = max(options['top_k'], 1)
+
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8', errors='replace')
+        target = sys.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+
+        count = 0
+        try:
+            rows = bulk_predict.iter_feature_rows(source, input_format)
+            results = bulk_predict.iter_predictions(rows, k=k, chunk_size=max(options['chunk_size'], 1))
+            for line in bulk_predict.format_results(results, output_format, k):
+                target.write(line)
+                count += 1
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if target is not sys.stdout:
+                target.close()
+
+        # The CSV output carries a header line
+        rows_written = count - 1 if output_format == 'csv' else count
+        self.stderr.write(self.style.SUCCESS(f"✅ Wrote predictions for {rows_written} rows"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from NovaX_webpage import inference
+from NovaX_webpage.model_registry import list_versions, publish_version
+
+
+class Command(BaseCommand):
+    help = "Compile the pickled models into a new registry version that running workers pick up without a restart"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-dir', default=inference.MODEL_DIR, help='Directory with the .pkl artifacts')
+        parser.add_argument('--registry', default=inference.MODEL_REGISTRY_DIR, help='Model registry directory')
+        parser.add_argument('--name', help='Version name (default: current timestamp)')
+        parser.add_argument('--no-activate', action='store_true', help='Publish without switching CURRENT to it')
+
+    def handle(self, *args, **options):
+        model_dir = options['model_dir']
+        try:
+            fingerprint = inference.model_fingerprint(model_dir)
+            ensemble_models, label_encoder, scaler = inference.load_models(model_dir)
+        except Exception as e:
+            raise CommandError(f"Could not load models from {model_dir}: {e}")
+
+        kernel = inference.compile_models(ensemble_models, label_encoder, scaler)
+        class_labels = [str(label) for label in label_encoder.classes_]
+        try:
+            version = publish_version(kernel, class_labels, inference.FEATURES, options['registry'],
+                                      version=options['name'], activate=not options['no_activate'],
+                                      source_fingerprint=fingerprint)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        state = 'published' if options['no_activate'] else 'published and activated'
+        self.stdout.write(self.style.SUCCESS(f"✅ Model version {version} {state}"))
+        self.stdout.write(f"Versions: {', '.join(list_versions(options['registry']))}")
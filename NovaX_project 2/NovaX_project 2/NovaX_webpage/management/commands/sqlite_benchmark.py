@@ -0,0 +1,150 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.test.utils import override_settings
+
+from NovaX_webpage.db_tuning import sqlite_pragmas
+
+
+BENCH_ALIAS = 'sqlite_benchmark'
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+# A university listing page read, and a save_survey + session write
+LISTING_QUERY = "SELECT id, name, abbreviation, location, established, description FROM university ORDER BY name"
+
+
+class Command(BaseCommand):
+    help = ("Compare concurrent listing reads and survey/session writes on a scratch SQLite database, "
+            "with Django's default connection handling and with the tuned one (pragmas, persistent connections). "
+            "Connections are opened by Django itself, so the connection_created hook and CONN_MAX_AGE "
+            "behave exactly as they do when serving requests")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Threads reading the university listing')
+        parser.add_argument('--writers', type=int, default=4, help='Threads saving surveys and sessions')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per profile')
+        parser.add_argument('--universities', type=int, default=200, help='Rows in the listing table')
+        parser.add_argument('--journal-mode', default='WAL',
+                            help='Journal mode of the tuned profile (the site itself defaults to DELETE)')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            self.stderr.write("The default database is not SQLite, nothing to compare")
+            return
+        conn_max_age = settings.DATABASES['default'].get('CONN_MAX_AGE') or 600
+        for profile, tuning, max_age in (
+            ('default', False, 0),
+            ('tuned', True, conn_max_age),
+        ):
+            with tempfile.TemporaryDirectory() as tmp, override_settings(
+                SQLITE_TUNING=tuning, SQLITE_JOURNAL_MODE=options['journal_mode'],
+            ):
+                pragmas = sqlite_pragmas() if tuning else []
+                self._add_database(os.path.join(tmp, 'bench.sqlite3'), max_age)
+                try:
+                    self._create(options['universities'])
+                    result = self._run(options)
+                    with connections[BENCH_ALIAS].cursor() as cursor:
+                        # As left by the connection_created hook, not as configured
+                        cursor.execute("PRAGMA journal_mode")
+                        result['journal_mode'] = cursor.fetchone()[0]
+                finally:
+                    connections[BENCH_ALIAS].close()
+                    del connections[BENCH_ALIAS]
+                    del connections.settings[BENCH_ALIAS]
+            self._report(profile, pragmas, bool(max_age), result, options['duration'])
+
+    def _add_database(self, path, max_age):
+        # Same settings as the site's database, on a scratch file
+        connections.settings[BENCH_ALIAS] = dict(
+            connections['default'].settings_dict, NAME=path, CONN_MAX_AGE=max_age,
+        )
+
+    def _create(self, universities):
+        with connections[BENCH_ALIAS].cursor() as cursor:
+            cursor.execute("""CREATE TABLE university (id INTEGER PRIMARY KEY, name TEXT, abbreviation TEXT,
+                              location TEXT, established INTEGER, description TEXT, about TEXT)""")
+            cursor.execute("CREATE TABLE survey (id INTEGER PRIMARY KEY, category TEXT, responses TEXT, created_at TEXT)")
+            cursor.execute("CREATE TABLE session (session_key TEXT PRIMARY KEY, session_data TEXT, expire_date TEXT)")
+            cursor.executemany(
+                "INSERT INTO university (name, abbreviation, location, established, description, about) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [(f"University {i}", f"U{i}", 'Yangon', 1900 + i % 120, 'x' * 200, 'y' * 1000) for i in range(universities)],
+            )
+
+    def _run(self, options):
+        deadline = time.perf_counter() + options['duration']
+        results = {'read': [], 'write': [], 'locked': 0}
+        lock = threading.Lock()
+
+        def worker(kind, index):
+            latencies, locked = [], 0
+            n = 0
+            # Each thread gets its own connection, like a gunicorn worker thread
+            connection = connections[BENCH_ALIAS]
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                # What request_started/request_finished do: close the connection unless
+                # CONN_MAX_AGE keeps it open, so per-request connects are paid for here
+                connection.close_if_unusable_or_obsolete()
+                try:
+                    if kind == 'read':
+                        with connection.cursor() as cursor:
+                            cursor.execute(LISTING_QUERY)
+                            cursor.fetchall()
+                    else:
+                        with transaction.atomic(using=BENCH_ALIAS), connection.cursor() as cursor:
+                            cursor.execute(
+                                "INSERT INTO survey (category, responses, created_at) VALUES (%s, %s, datetime('now'))",
+                                ('Combined test Q', json.dumps({f"Q{q}": 'A' for q in range(20)})),
+                            )
+                            cursor.execute(
+                                "INSERT OR REPLACE INTO session VALUES (%s, %s, datetime('now', '+14 days'))",
+                                (f"{index}-{n % 50}", 'z' * 400),
+                            )
+                    latencies.append((time.perf_counter() - start) * 1000)
+                except OperationalError:
+                    # "database is locked" once the busy timeout runs out
+                    locked += 1
+                finally:
+                    connection.close_if_unusable_or_obsolete()
+                n += 1
+            connection.close()
+            with lock:
+                results[kind].extend(latencies)
+                results['locked'] += locked
+
+        threads = [threading.Thread(target=worker, args=('read', i)) for i in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('write', i)) for i in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _report(self, profile, pragmas, persistent, result, duration):
+        self.stdout.write(f"== {profile}: {'persistent' if persistent else 'per-request'} connections"
+                          + (f", {'; '.join(p.replace('PRAGMA ', '') for p in pragmas)}" if pragmas else ''))
+        self.stdout.write(f"  journal mode in use: {result['journal_mode']}")
+        for kind in ('read', 'write'):
+            latencies = sorted(result[kind])
+            if not latencies:
+                self.stdout.write(f"  {kind}s: none completed")
+                continue
+            self.stdout.write(
+                f"  {kind}s: {len(latencies) / duration:.0f}/s, p50 {percentile(latencies, 0.5):.2f} ms, "
+                f"p95 {percentile(latencies, 0.95):.2f} ms, max {latencies[-1]:.1f} ms"
+            )
+        self.stdout.write(f"  locked errors: {result['locked']}")
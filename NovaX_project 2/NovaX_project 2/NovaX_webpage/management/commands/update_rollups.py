@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from NovaX_webpage import rollups
+
+
+class Command(BaseCommand):
+    help = "Count surveys saved since the last run into the analytics rollups (safe to run any time, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Surveys per transaction')
+        parser.add_argument('--rebuild', action='store_true', help='Drop the rollups and recount every survey')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rollups.rebuild()
+
+        total = 0
+        while True:
+            counted = rollups.catch_up(max(options['batch_size'], 1))
+            if not counted:
+                break
+            total += counted
+            self.stderr.write(f"  {total} surveys counted")
+
+        self.stderr.write(self.style.SUCCESS(f"✅ Rollups up to date ({total} new surveys)"))
+        self.stdout.write(f"Surveys per category: {rollups.survey_counts()}")
+        self.stdout.write(f"Top predicted careers: {dict(list(rollups.career_distribution(rank=1).items())[:5])}")
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NovaX_webpage', '0006_privatecollege_publicuniversity_delete_university'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='careersurvey',
+            index=models.Index(fields=['category', 'created_at'], name='survey_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careersurvey',
+            index=models.Index(fields=['created_at'], name='survey_created_idx'),
+        ),
+    ]
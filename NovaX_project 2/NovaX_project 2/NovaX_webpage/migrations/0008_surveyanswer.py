@@ -0,0 +1,31 @@
+# Generated by Django 4.2.25 on 2026-10-18 11:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NovaX_webpage', '0007_careersurvey_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SurveyAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.CharField(max_length=255)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('text_value', models.CharField(blank=True, max_length=255, null=True)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='NovaX_webpage.careersurvey')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['feature', 'value'], name='surveyanswer_feature_value_idx'), models.Index(fields=['feature', 'text_value'], name='surveyanswer_feature_text_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='surveyanswer',
+            constraint=models.UniqueConstraint(fields=('survey', 'feature'), name='surveyanswer_survey_feature_uniq'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.25 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('NovaX_webpage', '0008_surveyanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerPredictionCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('career', models.CharField(max_length=200)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeatureHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.CharField(max_length=100)),
+                ('bucket', models.SmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SurveyDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='surveydailycount',
+            constraint=models.UniqueConstraint(fields=('day', 'category'), name='surveydailycount_day_category_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='featurehistogram',
+            constraint=models.UniqueConstraint(fields=('feature', 'bucket'), name='featurehistogram_feature_bucket_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='careerpredictioncount',
+            constraint=models.UniqueConstraint(fields=('career', 'rank'), name='careerpredictioncount_career_rank_uniq'),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# model_registry.py
+
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from .model_store import load_model_store, save_model_store
+
+
+CURRENT_NAME = 'CURRENT'
+
+
+def list_versions(registry_dir):
+    """Published versions, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if os.path.isdir(os.path.join(registry_dir, name)) and '.tmp-' not in name and '.old-' not in name
+    )
+
+
+def current_version(registry_dir):
+    """Version named in the CURRENT pointer file, or None"""
+    try:
+        with open(os.path.join(registry_dir, CURRENT_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def activate_version(registry_dir, version):
+    """Point CURRENT at version; the rename is atomic, so readers never see a partial file"""
+    if not os.path.isdir(os.path.join(registry_dir, version)):
+        raise ValueError(f"Unknown model version: {version}")
+    staging = os.path.join(registry_dir, f"{CURRENT_NAME}.tmp-{os.getpid()}")
+    with open(staging, 'w') as f:
+        f.write(version + '\n')
+    os.replace(staging, os.path.join(registry_dir, CURRENT_NAME))
+
+
+def publish_version(kernel, class_labels, features, registry_dir, version=None,
+                    activate=True, source_fingerprint=None):
+    """Write a compiled kernel as a new immutable version and optionally activate it"""
+    version = version or datetime.now().strftime('%Y%m%d%H%M%S')
+    path = os.path.join(registry_dir, version)
+    if os.path.exists(path):
+        raise ValueError(f"Model version {version} already exists")
+
+    os.makedirs(registry_dir, exist_ok=True)
+    save_model_store(kernel, class_labels, features, path, source_fingerprint=source_fingerprint)
+    try:
+        # The one full checksum pass: workers loading the version only check its manifest
+        load_model_store(path, features, verify=True)
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    if activate:
+        activate_version(registry_dir, version)
+    return version
+
+
+def load_version(registry_dir, version, features=None, verify=False):
+    bundle = load_model_store(os.path.join(registry_dir, version), features, verify=verify)
+    bundle.version = version
+    bundle.fingerprint = (bundle.fingerprint, version)
+    return bundle
+
+
+class ModelWatcher:
+    """Per-worker thread that polls CURRENT and hands newly activated versions to on_load"""
+
+    def __init__(self, registry_dir, interval, on_load, loaded_version=None, features=None, verify=False):
+        self.registry_dir = registry_dir
+        self.features = features
+        self.verify = verify
+        self.interval = interval
+        self.on_load = on_load
+        self.loaded_version = loaded_version
+        self.last_error = None
+        # (version, CURRENT mtime) that failed to load, skipped until CURRENT changes
+        self._failed = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        # Started lazily so forked gunicorn workers each get their own thread
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+                self._thread.start()
+
+    def check(self):
+        """Load and hand over the active version if it changed; returns True on a swap.
+
+        A version that fails to load is not retried until CURRENT is rewritten
+        (activate_model again, or another version)."""
+        try:
+            written = os.stat(os.path.join(self.registry_dir, CURRENT_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        version = current_version(self.registry_dir)
+        if version is None or version == self.loaded_version or (version, written) == self._failed:
+            return False
+        try:
+            bundle = load_version(self.registry_dir, version, self.features, self.verify)
+        except Exception as e:
+            # Keep serving the old version
+            self._failed = (version, written)
+            self.last_error = f"{version}: {e}"
+            print(f"❌ Could not load model version {version}: {e}")
+            return False
+        self.on_load(bundle)
+        self.loaded_version = version
+        self._failed = None
+        self.last_error = None
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                self.last_error = str(e)
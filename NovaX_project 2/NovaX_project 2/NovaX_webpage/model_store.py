@@ -0,0 +1,167 @@
+# model_store.py
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from .ensemble_kernel import CompiledEnsemble
+
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+FALLBACK_NAME = 'fallback.pkl'
+
+# CompiledEnsemble attributes written as one .npy file each
+ARRAY_FIELDS = [
+    'scaler_mean', 'scaler_scale',
+    'linear_coef', 'linear_intercept', 'linear_ovr',
+    'tree_feature', 'tree_threshold', 'tree_left', 'tree_right', 'tree_value',
+    'tree_roots', 'forest_starts', 'forest_sizes',
+]
+
+
+class ModelBundle:
+    """Everything needed to serve predictions from one set of model artifacts"""
+
+    def __init__(self, kernel, class_labels, fingerprint, source, manifest=None, version=None):
+        self.kernel = kernel
+        self.class_labels = class_labels
+        self.fingerprint = fingerprint
+        self.source = source
+        self.manifest = manifest or {}
+        # Reported with every prediction this bundle serves
+        self.version = version
+
+
+def save_model_store(kernel, class_labels, features, path, source_fingerprint=None):
+    """Write a compiled kernel as read-only .npy arrays plus a JSON manifest"""
+    path = os.path.abspath(path)
+    staging = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    arrays = {}
+    values = {}
+    for name in ARRAY_FIELDS:
+        value = getattr(kernel, name)
+        if value is None:
+            continue
+        value = values[name] = np.ascontiguousarray(value)
+        np.save(os.path.join(staging, f"{name}.npy"), value, allow_pickle=False)
+        arrays[name] = {'file': f"{name}.npy", 'dtype': value.dtype.str, 'shape': list(value.shape)}
+
+    # Members and scalers without a flat form are still pickled, but only those
+    fallback = fallback_bytes = None
+    if kernel.fallback_models or kernel.scaler is not None:
+        fallback = FALLBACK_NAME
+        fallback_bytes = pickle.dumps({'models': kernel.fallback_models, 'scaler': kernel.scaler})
+        with open(os.path.join(staging, FALLBACK_NAME), 'wb') as f:
+            f.write(fallback_bytes)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'checksum': _checksum(values, fallback_bytes),
+        'source_fingerprint': source_fingerprint,
+        'features': list(features),
+        'class_labels': list(class_labels),
+        'n_classes': kernel.n_classes,
+        'n_members': kernel.n_members,
+        'max_depth': kernel.max_depth,
+        'arrays': arrays,
+        'fallback': fallback,
+        # Checked on every load, since the pickle is read in full anyway
+        'fallback_sha256': hashlib.sha256(fallback_bytes).hexdigest() if fallback_bytes is not None else None,
+    }
+    with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the finished directory into place
+    if os.path.exists(path):
+        retired = f"{path}.old-{os.getpid()}"
+        os.replace(path, retired)
+        os.replace(staging, path)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(staging, path)
+    return manifest
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def _checksum(arrays, fallback_bytes):
+    # Same order on save and on verify
+    checksum = hashlib.sha256()
+    for name in ARRAY_FIELDS:
+        if name in arrays:
+            checksum.update(name.encode())
+            # Hashes the (memory-mapped) buffer in place, no copy
+            checksum.update(np.ascontiguousarray(arrays[name]))
+    if fallback_bytes is not None:
+        checksum.update(fallback_bytes)
+    return checksum.hexdigest()
+
+
+def load_model_store(path, features=None, verify=False):
+    """Memory-map a model store read-only; pages are shared by every worker process and
+    only read when predictions touch them.
+
+    Loading checks the manifest, the features, every array's dtype, shape and file size,
+    and the pickled fallback's hash. The full checksum reads every page, so it is checked
+    when a store is built or published, and here only with verify=True. Raises ValueError
+    when a check fails."""
+    manifest = read_manifest(path)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model store format: {manifest.get('format_version')}")
+    if features is not None and manifest.get('features') != list(features):
+        raise ValueError(f"Model store {path} was built for features {manifest.get('features')}, "
+                         f"expected {list(features)}")
+
+    arrays = {}
+    for name in ARRAY_FIELDS:
+        spec = manifest['arrays'].get(name)
+        if spec is None:
+            continue
+        file = os.path.join(path, spec['file'])
+        try:
+            array = np.load(file, mmap_mode='r', allow_pickle=False)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Model store file {spec['file']} is unreadable: {e}")
+        # A torn or swapped file shows up in its header or its length
+        if (array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']
+                or os.path.getsize(file) != array.offset + array.nbytes):
+            raise ValueError(f"Model store file {spec['file']} does not match the manifest")
+        arrays[name] = array
+
+    fallback_bytes = None
+    if manifest.get('fallback'):
+        with open(os.path.join(path, manifest['fallback']), 'rb') as f:
+            fallback_bytes = f.read()
+        expected = manifest.get('fallback_sha256')
+        # Checked before anything is unpickled
+        if expected is not None and hashlib.sha256(fallback_bytes).hexdigest() != expected:
+            raise ValueError(f"Model store {path} fallback does not match the manifest")
+
+    if verify and _checksum(arrays, fallback_bytes) != manifest.get('checksum'):
+        raise ValueError(f"Model store {path} does not match its manifest checksum")
+
+    kernel = CompiledEnsemble(manifest['n_classes'], manifest['n_members'])
+    kernel.max_depth = manifest['max_depth']
+    for name, array in arrays.items():
+        setattr(kernel, name, array)
+
+    if fallback_bytes is not None:
+        fallback = pickle.loads(fallback_bytes)
+        kernel.fallback_models = fallback['models']
+        kernel.scaler = fallback['scaler']
+
+    return ModelBundle(kernel, manifest['class_labels'], manifest['checksum'], path, manifest,
+                       version=manifest['checksum'][:12])
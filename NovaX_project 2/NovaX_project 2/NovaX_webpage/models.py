@@ -13,10 +13,39 @@ class CareerSurvey(models.Model):
     responses = models.JSONField()  # stores answers in JSON format
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Admin filters by category then date, and by date alone
+            models.Index(fields=['category', 'created_at'], name='survey_category_created_idx'),
+            models.Index(fields=['created_at'], name='survey_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.category} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
 
+class SurveyAnswer(models.Model):
+    """One answer of a CareerSurvey as a typed row, so aggregates and filters run in SQL"""
+    survey = models.ForeignKey(CareerSurvey, on_delete=models.CASCADE, related_name='answers')
+    # Quiz question text, a counselor feature name, or prediction_<rank>
+    feature = models.CharField(max_length=255)
+    value = models.FloatField(null=True, blank=True)
+    text_value = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['survey', 'feature'], name='surveyanswer_survey_feature_uniq'),
+        ]
+        indexes = [
+            # AVG/range queries on one feature, and "surveys whose prediction_1 is X"
+            models.Index(fields=['feature', 'value'], name='surveyanswer_feature_value_idx'),
+            models.Index(fields=['feature', 'text_value'], name='surveyanswer_feature_text_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.feature} = {self.text_value if self.value is None else self.value}"
+
+
 from django.db import models
 
 class PublicUniversity(models.Model):
@@ -42,3 +71,47 @@ class PrivateCollege(models.Model):
 
     def __str__(self):
         return self.name
+
+
+# Rollups maintained incrementally by rollups.py; read these instead of scanning CareerSurvey
+
+class SurveyDailyCount(models.Model):
+    """Surveys saved per category per day"""
+    day = models.DateField()
+    category = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='surveydailycount_day_category_uniq'),
+        ]
+
+
+class CareerPredictionCount(models.Model):
+    """How often each career was predicted at each rank in AI counseling"""
+    career = models.CharField(max_length=200)
+    rank = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['career', 'rank'], name='careerpredictioncount_career_rank_uniq'),
+        ]
+
+
+class FeatureHistogram(models.Model):
+    """Counseling score distribution per feature; bucket is the score in tenths (7.5 -> 75)"""
+    feature = models.CharField(max_length=100)
+    bucket = models.SmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['feature', 'bucket'], name='featurehistogram_feature_bucket_uniq'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Highest CareerSurvey id already counted into the rollups"""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
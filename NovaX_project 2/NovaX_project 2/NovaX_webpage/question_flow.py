@@ -0,0 +1,105 @@
+# question_flow.py
+
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+
+
+FLOWS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'question_flows.json')
+QUESTION_KEYS = ('field', 'step', 'label', 'question', 'edit_question')
+
+
+class QuestionFlow:
+    """One assessment compiled into lookup tables; every transition is a dict access"""
+
+    def __init__(self, name, title, opening_question, questions):
+        self.name = name
+        self.title = title
+        self.opening_question = opening_question
+        self.fields = tuple(q['field'] for q in questions)
+        self.first_field = self.fields[0]
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        self.steps = {q['field']: q['step'] for q in questions}
+        self.labels = {q['field']: q['label'] for q in questions}
+        # Extra words students use for a field when picking one to edit
+        self.aliases = {q['field']: list(q.get('aliases', [])) for q in questions}
+        self.questions = {q['field']: q['question'] for q in questions}
+        self.edit_questions = {q['field']: q.get('edit_question') or q['question'] for q in questions}
+        self.as_list = [(q['field'], q['step'], q['question']) for q in questions]
+        # field -> (next field, its step, its question); None after the last question
+        self.transitions = {field: (self.as_list[i + 1] if i + 1 < len(self.as_list) else None)
+                            for i, field in enumerate(self.fields)}
+
+    def next(self, field):
+        """(field, step, question) asked after field, or None if field is last or unknown"""
+        return self.transitions.get(field)
+
+
+class FlowSet(dict):
+    """Compiled flows by name, plus the name of the default one"""
+
+    def __init__(self, flows, default):
+        super().__init__(flows)
+        self.default = default
+
+    def get_flow(self, name=None):
+        """Flow by name; unknown or empty names get the default flow"""
+        return self.get(name) or self[self.default]
+
+
+def _resolve_questions(name, spec, raw_flows, seen=()):
+    # Inherit questions from "extends", then apply "order" and per-field "overrides"
+    if name in seen:
+        raise ValueError(f"Question flow '{name}' extends itself")
+    questions = spec.get('questions')
+    if questions is None:
+        base = spec.get('extends')
+        if base not in raw_flows:
+            raise ValueError(f"Question flow '{name}' has no questions and no known base flow")
+        questions = _resolve_questions(base, raw_flows[base], raw_flows, seen + (name,))
+
+    by_field = {q['field']: dict(q) for q in questions}
+    for field, override in spec.get('overrides', {}).items():
+        if field not in by_field:
+            raise ValueError(f"Question flow '{name}' overrides unknown field '{field}'")
+        by_field[field].update(override)
+    order = spec.get('order') or [q['field'] for q in questions]
+    missing = [field for field in order if field not in by_field]
+    if missing:
+        raise ValueError(f"Question flow '{name}' orders unknown fields: {', '.join(missing)}")
+    return [by_field[field] for field in order]
+
+
+def compile_flows(data):
+    """Validate raw flow definitions and build a FlowSet"""
+    raw_flows = data.get('flows') or {}
+    if not raw_flows:
+        raise ValueError('No question flows defined')
+
+    flows = {}
+    for name, spec in raw_flows.items():
+        questions = _resolve_questions(name, spec, raw_flows)
+        fields = [q.get('field') for q in questions]
+        if not questions or len(set(fields)) != len(fields):
+            raise ValueError(f"Question flow '{name}' must ask each field exactly once")
+        for q in questions:
+            absent = [key for key in QUESTION_KEYS[:4] if not q.get(key)]
+            if absent:
+                raise ValueError(f"Question '{q.get('field')}' in flow '{name}' is missing {', '.join(absent)}")
+        opening = spec.get('opening_question') or questions[0]['question']
+        flows[name] = QuestionFlow(name, spec.get('title', name), opening, questions)
+
+    default = data.get('default') or next(iter(flows))
+    if default not in flows:
+        raise ValueError(f"Default question flow '{default}' is not defined")
+    return FlowSet(flows, default)
+
+
+@lru_cache(maxsize=None)
+def load_flows(path=None):
+    """Compiled flows from COUNSELOR_FLOWS_PATH (or the bundled question_flows.json), read once per process"""
+    path = path or getattr(settings, 'COUNSELOR_FLOWS_PATH', '') or FLOWS_PATH
+    with open(path, encoding='utf-8') as f:
+        return compile_flows(json.load(f))
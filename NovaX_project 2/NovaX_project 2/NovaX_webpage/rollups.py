@@ -0,0 +1,181 @@
+# rollups.py
+
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import CareerPredictionCount, CareerSurvey, FeatureHistogram, RollupWatermark, SurveyDailyCount
+from .score_sketch import ScoreSketch
+
+
+WATERMARK = 'career_surveys'
+
+# Fewer answers than this and a percentile says little about the student
+PERCENTILE_MIN_POPULATION = 20
+
+
+def score_bucket(score):
+    """Histogram bucket for a counseling score: the score in tenths (7.5 -> 75)"""
+    return int(round(float(score) * 10))
+
+
+# FeatureHistogram.bucket is a SmallIntegerField
+MAX_BUCKET = 32767
+
+
+def _survey_deltas(survey):
+    # (day key, career keys, bucket keys) of one survey
+    created_at = survey.created_at
+    day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+
+    responses = survey.responses if isinstance(survey.responses, dict) else {}
+    predictions = responses.get('predictions')
+    careers = [
+        (str(prediction['career'])[:200], rank)
+        for rank, prediction in enumerate(predictions if isinstance(predictions, list) else [], 1)
+        if isinstance(prediction, dict) and prediction.get('career')
+    ]
+    counseling_data = responses.get('counseling_data')
+    buckets = []
+    for feature, score in (counseling_data.items() if isinstance(counseling_data, dict) else ()):
+        try:
+            bucket = score_bucket(score)
+        except (TypeError, ValueError, OverflowError):
+            continue
+        if abs(bucket) <= MAX_BUCKET:
+            buckets.append((str(feature)[:100], bucket))
+    return (day, survey.category), careers, buckets
+
+
+def _deltas(surveys):
+    # Count a batch in Python first, so each rollup row is touched once per batch
+    days, careers, buckets = Counter(), Counter(), Counter()
+    for survey in surveys:
+        try:
+            day, survey_careers, survey_buckets = _survey_deltas(survey)
+        except Exception as e:
+            # Skipped, not retried: one bad survey must not hold the watermark back
+            print(f"⚠️ Survey {survey.pk} left out of the rollups: {e}")
+            continue
+        days[day] += 1
+        careers.update(survey_careers)
+        buckets.update(survey_buckets)
+    return days, careers, buckets
+
+
+def _increment(model, deltas, key_fields):
+    for key, count in deltas.items():
+        lookup = dict(zip(key_fields, key))
+        if not model.objects.filter(**lookup).update(count=F('count') + count):
+            model.objects.create(count=count, **lookup)
+
+
+def catch_up(batch_size=None):
+    """Count the surveys above the high-water mark into the rollups, at most batch_size
+    of them, and move the mark in the same transaction; returns how many were counted.
+
+    The insert path and the catch-up command both go through here, so a survey is
+    counted exactly once whichever of them gets to it first."""
+    batch_size = batch_size or getattr(settings, 'ROLLUP_BATCH_SIZE', 1000)
+    with transaction.atomic():
+        # Write before reading the mark: on SQLite that takes the write lock up front, so
+        # concurrent callers queue behind each other instead of counting the same surveys.
+        # (Ids are assigned in commit order there; a database with concurrent writers
+        # would need a lag before the mark advances past in-flight transactions.)
+        if not RollupWatermark.objects.filter(name=WATERMARK).update(last_id=F('last_id')):
+            RollupWatermark.objects.create(name=WATERMARK)
+        mark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+
+        surveys = list(CareerSurvey.objects.filter(pk__gt=mark.last_id).order_by('pk')[:batch_size])
+        if not surveys:
+            return 0
+        days, careers, buckets = _deltas(surveys)
+        _increment(SurveyDailyCount, days, ('day', 'category'))
+        _increment(CareerPredictionCount, careers, ('career', 'rank'))
+        _increment(FeatureHistogram, buckets, ('feature', 'bucket'))
+
+        mark.last_id = surveys[-1].pk
+        mark.save(update_fields=['last_id'])
+    return len(surveys)
+
+
+def on_insert(saved=1):
+    """Insert path: once the caller's transaction commits, count the saved surveys (plus a
+    bounded slice of any backlog). A failure here never touches the surveys themselves;
+    whatever it missed is counted by the next insert or the catch-up command"""
+    if getattr(settings, 'ROLLUPS_ON_INSERT', True):
+        batch_size = max(saved, getattr(settings, 'ROLLUP_INSERT_BATCH_SIZE', 100))
+        transaction.on_commit(lambda: _catch_up_after_insert(batch_size))
+
+
+def _catch_up_after_insert(batch_size):
+    try:
+        catch_up(batch_size)
+    except Exception as e:
+        print(f"⚠️ Rollups not updated after insert ({e}), the next catch-up will count these surveys")
+
+
+def rebuild():
+    """Drop every rollup and the mark; the next catch_up calls recount from the first survey"""
+    with transaction.atomic():
+        SurveyDailyCount.objects.all().delete()
+        CareerPredictionCount.objects.all().delete()
+        FeatureHistogram.objects.all().delete()
+        RollupWatermark.objects.filter(name=WATERMARK).delete()
+
+
+def survey_counts(since=None):
+    """{category: surveys} since a date (or ever)"""
+    rows = SurveyDailyCount.objects.all()
+    if since is not None:
+        rows = rows.filter(day__gte=since)
+    return {row['category']: row['total'] for row in rows.values('category').annotate(total=Sum('count'))}
+
+
+def career_distribution(rank=None):
+    """{career: times predicted}, at one rank or at any rank, most frequent first"""
+    rows = CareerPredictionCount.objects.all()
+    if rank is not None:
+        rows = rows.filter(rank=rank)
+    totals = rows.values('career').annotate(total=Sum('count')).order_by('-total')
+    return {row['career']: row['total'] for row in totals}
+
+
+def feature_histogram(feature):
+    """{score: count} for one counseling feature, in score order"""
+    rows = FeatureHistogram.objects.filter(feature=feature).order_by('bucket')
+    return {bucket / 10: count for bucket, count in rows.values_list('bucket', 'count')}
+
+
+_sketches = {'loaded_at': None, 'by_feature': {}}
+
+
+def feature_sketches(max_age=None):
+    """{feature: ScoreSketch} of every counseling score so far, from the FeatureHistogram
+    rollup (one small query) and reused for up to ROLLUP_SKETCH_TTL seconds"""
+    max_age = getattr(settings, 'ROLLUP_SKETCH_TTL', 60) if max_age is None else max_age
+    loaded_at = _sketches['loaded_at']
+    if loaded_at is None or time.monotonic() - loaded_at > max_age:
+        buckets = defaultdict(dict)
+        for feature, bucket, count in FeatureHistogram.objects.values_list('feature', 'bucket', 'count'):
+            buckets[feature][bucket] = count
+        _sketches['by_feature'] = {feature: ScoreSketch.from_buckets(b) for feature, b in buckets.items()}
+        _sketches['loaded_at'] = time.monotonic()
+    return _sketches['by_feature']
+
+
+def population_percentiles(counseling_data):
+    """{feature: percentile} ranking each score against everyone assessed so far;
+    features without a score or with too small a population are left out"""
+    sketches = feature_sketches()
+    percentiles = {}
+    for feature, score in counseling_data.items():
+        sketch = sketches.get(feature)
+        if score is None or sketch is None or sketch.total < PERCENTILE_MIN_POPULATION:
+            continue
+        percentiles[feature] = sketch.percentile(score)
+    return percentiles
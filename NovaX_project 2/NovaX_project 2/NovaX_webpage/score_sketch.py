@@ -0,0 +1,68 @@
+# score_sketch.py
+
+from itertools import accumulate
+
+
+LOW, HIGH = 1, 10
+# One bin per tenth of a point: scores carry at most one decimal (7, 7.5), so the sketch is exact
+BINS = (HIGH - LOW) * 10 + 1
+
+
+class ScoreSketch:
+    """Fixed-bin histogram of 1-10 scores: constant size, merged by adding counts, and a
+    percentile lookup is one prefix-sum read"""
+
+    def __init__(self, counts=None):
+        self.counts = list(counts) if counts is not None else [0] * BINS
+        if len(self.counts) != BINS:
+            raise ValueError(f"A score sketch has {BINS} bins, got {len(self.counts)}")
+        self._below = None
+
+    @classmethod
+    def from_buckets(cls, buckets):
+        """Sketch from {score in tenths: count}, the FeatureHistogram rollup rows"""
+        sketch = cls()
+        for bucket, count in buckets.items():
+            sketch.add(bucket / 10, count)
+        return sketch
+
+    @staticmethod
+    def _bin(score):
+        # Out-of-range scores are clamped into the end bins
+        return min(max(int(round(float(score) * 10)) - LOW * 10, 0), BINS - 1)
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def add(self, score, count=1):
+        self.counts[self._bin(score)] += count
+        self._below = None
+
+    def merge(self, other):
+        """New sketch holding both populations (e.g. two workers' or two periods' counts)"""
+        return ScoreSketch(a + b for a, b in zip(self.counts, other.counts))
+
+    def percentile(self, score):
+        """Percent of the population scoring below score, counting ties as half; None when empty"""
+        if self._below is None:
+            # Counts strictly below each bin, built once per sketch
+            self._below = [0] + list(accumulate(self.counts))
+        total = self._below[-1]
+        if not total:
+            return None
+        index = self._bin(score)
+        return 100.0 * (self._below[index] + self.counts[index] / 2) / total
+
+    def quantile(self, q):
+        """Score at fraction q (0-1) of the population; None when empty"""
+        total = self.total
+        if not total:
+            return None
+        target = q * total
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if count and running >= target:
+                return (index + LOW * 10) / 10
+        return HIGH
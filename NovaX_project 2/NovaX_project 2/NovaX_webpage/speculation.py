@@ -0,0 +1,131 @@
+# speculation.py
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# The student's next score falls in one of these; one turn is prepared per bucket
+SCORE_BUCKETS = [
+    (1, 3, 'low (1-3 out of 10)'),
+    (4, 7, 'moderate (4-7 out of 10)'),
+    (8, 10, 'high (8-10 out of 10)'),
+]
+
+
+def score_bucket(score):
+    """Index into SCORE_BUCKETS for a 1-10 score"""
+    for index, (low, high, _) in enumerate(SCORE_BUCKETS):
+        if score <= high:
+            return index
+    return len(SCORE_BUCKETS) - 1
+
+
+class Speculator:
+    """Per-session background preparation of the counselor's likely next turns"""
+
+    def __init__(self, counselor, max_sessions=500, workers=4):
+        self.counselor = counselor
+        self.max_sessions = max_sessions
+        self._entries = OrderedDict()    # session_key -> (state_key, [Future per bucket])
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='speculate')
+        self.scheduled = 0
+        self.served = 0
+        self.missed = 0
+        self.discarded = 0
+
+    @staticmethod
+    def make_state_key(current_field, collected_data):
+        return (current_field, tuple(sorted((field, float(value)) for field, value in collected_data.items())))
+
+    def schedule(self, session_key, current_field, conversation_step, collected_data):
+        """Start preparing what may follow an answer to current_field: one LLM turn per score
+        bucket, or for the last question the predictions for all ten possible final scores"""
+        if not session_key or not current_field:
+            return
+        counselor = self.counselor
+        if current_field not in counselor.flow.index:
+            return
+        collected_data = dict(collected_data)
+        next_data_size = len(collected_data) + (current_field not in collected_data)
+
+        if counselor._next_in_flow(current_field) is None:
+            # Last question: the next step is the prediction, which depends only on this score
+            self._pool.submit(self._warm_final_predictions, current_field, collected_data)
+            return
+        if not (counselor.backend is not None and next_data_size > 2
+                and not counselor._is_edit_mode(conversation_step)):
+            return
+
+        futures = [
+            self._pool.submit(self._generate, current_field, collected_data, label)
+            for _, _, label in SCORE_BUCKETS
+        ]
+        with self._lock:
+            previous = self._entries.pop(session_key, None)
+            self._entries[session_key] = (self.make_state_key(current_field, collected_data), futures)
+            self.scheduled += len(futures)
+            # Memory budget: unclaimed turns of the least recently active sessions go first
+            evicted = [previous] if previous else []
+            while len(self._entries) > self.max_sessions:
+                evicted.append(self._entries.popitem(last=False)[1])
+        self._discard(evicted)
+
+    def take(self, session_key, user_input, current_field, collected_data):
+        """Prepared turn for this answer if it finished in time, else None; the session's other turns are dropped"""
+        if not session_key:
+            return None
+        with self._lock:
+            entry = self._entries.pop(session_key, None)
+        if entry is None:
+            return None
+
+        state_key, futures = entry
+        future = futures[score_bucket(float(user_input))]
+        ready = (state_key == self.make_state_key(current_field, collected_data)
+                 and future.done() and not future.cancelled() and future.exception() is None)
+        self._discard([(state_key, [f for f in futures if f is not future or not ready])])
+        with self._lock:
+            if ready:
+                self.served += 1
+            else:
+                self.missed += 1
+        return dict(future.result()) if ready else None
+
+    def _generate(self, current_field, collected_data, bucket_label):
+        counselor = self.counselor
+        prompt = counselor._build_ai_prompt(bucket_label, current_field, collected_data)
+        text = counselor.breaker.call(counselor.backend.generate, prompt, counselor.llm_timeout)
+        return counselor._parse_ai_turn(text, current_field)
+
+    def _warm_final_predictions(self, current_field, collected_data):
+        from . import inference
+
+        if not inference.models_loaded():
+            return
+        rows = []
+        for score in range(1, 11):
+            profile = dict(collected_data, **{current_field: float(score)})
+            # Same defaults as generate_career_predictions
+            rows.append([float(profile.get(feat, 5)) for feat in inference.FEATURES])
+        inference.warm_predictions(rows)
+
+    def _discard(self, entries):
+        for _, futures in entries:
+            for future in futures:
+                # Queued calls are cancelled, running ones finish and their result is dropped
+                future.cancel()
+            with self._lock:
+                self.discarded += len(futures)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._entries),
+                'max_sessions': self.max_sessions,
+                'scheduled': self.scheduled,
+                'served': self.served,
+                'missed': self.missed,
+                'discarded': self.discarded,
+            }
@@ -0,0 +1,103 @@
+# survey_answers.py
+
+import json
+import math
+
+from django.db import InterfaceError, OperationalError, transaction
+
+from .models import SurveyAnswer
+
+
+MAX_LENGTH = 255
+
+
+def _typed(answer):
+    # (value, text_value): numbers (and numeric strings) are stored as floats
+    if isinstance(answer, bool):
+        return None, str(answer).lower()
+    if isinstance(answer, (int, float)):
+        try:
+            value = float(answer)
+        except OverflowError:
+            # An int too large for a float is kept as text
+            value = math.inf
+        if math.isfinite(value):
+            return value, None
+        try:
+            return None, str(answer)[:MAX_LENGTH]
+        except ValueError:
+            # Past Python's int-to-str digit limit there is nothing sensible to keep
+            return None, None
+    if isinstance(answer, str):
+        try:
+            value = float(answer)
+        except ValueError:
+            return None, answer[:MAX_LENGTH]
+        return (value, None) if math.isfinite(value) else (None, answer[:MAX_LENGTH])
+    if answer is None:
+        return None, None
+    try:
+        return None, json.dumps(answer)[:MAX_LENGTH]
+    except (TypeError, ValueError):
+        return None, None
+
+
+def extract_answers(responses):
+    """(feature, value, text_value) rows for a survey's responses JSON.
+
+    Quiz surveys are {question text: answer}; AI counseling surveys hold
+    counseling_data (feature scores) and predictions, which become
+    prediction_<rank> rows with the career as text and its probability as value."""
+    if not isinstance(responses, dict):
+        return []
+
+    if 'counseling_data' in responses:
+        rows = []
+        counseling_data = responses.get('counseling_data')
+        if isinstance(counseling_data, dict):
+            for feature, score in counseling_data.items():
+                # A score is a number (or None); anything else isn't a feature score
+                if score is None or isinstance(score, (int, float, str)):
+                    rows.append((str(feature)[:MAX_LENGTH],) + _typed(score))
+        predictions = responses.get('predictions')
+        for rank, prediction in enumerate(predictions if isinstance(predictions, list) else [], 1):
+            if isinstance(prediction, dict):
+                value, _ = _typed(prediction.get('probability'))
+                rows.append((f"prediction_{rank}", value, str(prediction.get('career'))[:MAX_LENGTH]))
+        return rows
+
+    rows = []
+    seen = set()
+    for question, answer in responses.items():
+        feature = str(question)[:MAX_LENGTH]
+        # Long questions that only differ past the length limit keep the first answer
+        if feature in seen:
+            continue
+        seen.add(feature)
+        rows.append((feature,) + _typed(answer))
+    return rows
+
+
+def build_answers(surveys):
+    """Unsaved SurveyAnswer objects for saved surveys"""
+    return [
+        SurveyAnswer(survey_id=survey.pk, feature=feature, value=value, text_value=text_value)
+        for survey in surveys if survey.pk is not None
+        for feature, value, text_value in extract_answers(survey.responses)
+    ]
+
+
+def store_answers(surveys, batch_size=500):
+    """Write the typed answer rows for surveys that were just saved.
+
+    Runs in its own savepoint and never fails the survey's transaction: answers that
+    can't be stored are logged and left to the backfill_survey_answers command."""
+    try:
+        with transaction.atomic():
+            return SurveyAnswer.objects.bulk_create(build_answers(surveys), batch_size=batch_size)
+    except (OperationalError, InterfaceError):
+        # The database itself is unavailable, so the survey can't be written either
+        raise
+    except Exception as e:
+        print(f"⚠️ Answers of {len(surveys)} surveys not stored ({e}), run backfill_survey_answers")
+        return []
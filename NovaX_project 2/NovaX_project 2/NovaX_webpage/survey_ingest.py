@@ -0,0 +1,378 @@
+# survey_ingest.py
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows: liveness falls back to whether the pid exists
+    fcntl = None
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+
+from . import rollups
+from .models import CareerSurvey
+from .survey_answers import store_answers
+
+
+# Surveys the database refused, with the error, for a person to look at
+DEAD_LETTER_NAME = 'dead-letter.jsonl'
+
+
+class SurveyBuffer:
+    """Accept quiz surveys at once and write them with bulk_create from a background thread.
+
+    Every accepted survey is first appended to this process's spool segment, so a crash
+    loses nothing: a segment is deleted only after the transaction holding its surveys has
+    committed, and segments left behind by dead processes are replayed by the next writer.
+    Each process holds an flock on its own owner lock file for as long as it runs, so a
+    segment's owner is dead exactly when that lock can be taken, even if its pid was reused.
+    A survey the database rejects on its own is moved to the dead-letter file instead of
+    holding back the rest of its segment."""
+
+    def __init__(self, spool_dir, batch_size=100, flush_interval_ms=200, fsync=True):
+        self.spool_dir = spool_dir
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = max(flush_interval_ms, 0) / 1000.0
+        self.fsync = fsync
+        self._pending = []
+        self._first_pending_at = None
+        self._spool = None
+        self._segment = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._token = None          # tells this process's segments from a dead one's with the same pid
+        self._owner_lock = None     # fd of this process's flocked owner lock file
+        self._write_lock = threading.Lock()
+        self._retry = []            # (segment path, rows) waiting for the database to come back
+        self.accepted = 0
+        self.written = 0
+        self.batches = 0
+        self.recovered = 0
+        self.dead_lettered = 0
+        self.errors = 0
+        self.last_error = None
+
+    def submit(self, category, responses):
+        """Spool one survey and queue it for the next batch"""
+        line = json.dumps({'category': category, 'responses': responses}) + '\n'
+        with self._cond:
+            self._ensure_worker()
+            if self._spool is None:
+                self._spool = open(self._segment_path(), 'a', encoding='utf-8')
+            self._spool.write(line)
+            self._spool.flush()
+            # The writer may close the segment once the lock is released, so sync a duplicate
+            sync_fd = os.dup(self._spool.fileno()) if self.fsync else None
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append((category, responses))
+            self.accepted += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        # fsync outside the lock, so other requests keep spooling while this one waits for the disk
+        if sync_fd is not None:
+            try:
+                os.fsync(sync_fd)
+            finally:
+                os.close(sync_fd)
+
+    def start(self):
+        """Start this process's writer now, which first replays segments left by dead
+        processes (called at worker start, so recovery doesn't wait for the next survey)"""
+        with self._cond:
+            self._ensure_worker()
+
+    def flush(self):
+        """Write everything accepted so far (used at exit and by tests/commands)"""
+        with self._cond:
+            batch = self._take_batch()
+        if batch:
+            self._write(*batch)
+        self._retry_failed()
+
+    def _segment_path(self):
+        return os.path.join(self.spool_dir, f"surveys-{self._pid}-{self._token}-{self._segment}.jsonl")
+
+    def _lock_path(self, pid, token):
+        return os.path.join(self.spool_dir, f"owner-{pid}-{token}.lock")
+
+    def _is_live_owner(self, pid, token):
+        if pid == os.getpid():
+            return token == self._token
+        if fcntl is None:
+            return _pid_alive(pid)
+        return _lock_held(self._lock_path(pid, token))
+
+    def _init_process(self):
+        # Forked gunicorn workers each get their own spool segments and writer thread
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._token = uuid.uuid4().hex[:8]
+        self._segment = 0
+        self._spool = None
+        self._pending = []
+        self._thread = None
+        os.makedirs(self.spool_dir, exist_ok=True)
+        if self._owner_lock is not None:
+            # Inherited from the parent process, whose lock stays the parent's
+            os.close(self._owner_lock)
+        self._owner_lock = _hold_lock(self._lock_path(self._pid, self._token))
+        atexit.register(self.flush)
+
+    def _ensure_worker(self):
+        # Started at worker start (see warmup) or on the first survey
+        self._init_process()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='survey-writer', daemon=True)
+        self._thread.start()
+
+    def _take_batch(self):
+        # Called with the lock held: the pending surveys and their spool segment go together
+        if not self._pending:
+            return None
+        rows, self._pending = self._pending, []
+        self._first_pending_at = None
+        self._spool.close()
+        path = self._spool.name
+        self._spool = None
+        self._segment += 1
+        return path, rows
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                if self._pending:
+                    waited = time.monotonic() - self._first_pending_at
+                    if len(self._pending) >= self.batch_size or waited >= self.flush_interval:
+                        return self._take_batch()
+                    self._cond.wait(self.flush_interval - waited)
+                else:
+                    # Wake up now and then to retry failed batches
+                    self._cond.wait(1.0 if self._retry else None)
+                    if self._retry and not self._pending:
+                        return None
+
+    def _store(self, rows):
+        with transaction.atomic():
+            surveys = CareerSurvey.objects.bulk_create(
+                [CareerSurvey(category=category, responses=responses) for category, responses in rows],
+                batch_size=self.batch_size,
+            )
+            store_answers(surveys)
+            rollups.on_insert(len(surveys))
+
+    def _record_error(self, e):
+        self.errors += 1
+        self.last_error = str(e)
+
+    def _write(self, path, rows):
+        # One transaction per segment: either all its surveys are stored and the segment
+        # is deleted, or the batch fails and its surveys are retried one at a time
+        with self._write_lock:
+            try:
+                self._store(rows)
+                written, retry, dead = rows, [], []
+            except Exception as e:
+                self._record_error(e)
+                print(f"⚠️ Survey batch of {len(rows)} not written ({e}), writing its surveys one by one")
+                written, retry, dead = self._store_each(rows)
+
+            if dead:
+                self._dead_letter(dead)
+            if retry:
+                # Keep only what is still unwritten, so a replay never duplicates a survey
+                if len(retry) < len(rows):
+                    _rewrite_segment(path, retry)
+                with self._cond:
+                    self._retry.append((path, retry))
+            else:
+                os.remove(path)
+            if written:
+                self.written += len(written)
+                self.batches += 1
+            return not retry
+
+    def _store_each(self, rows):
+        # (written, retry, dead): a database that is down or locked is retried later,
+        # any other error is the survey's own and sends it to the dead-letter file
+        written, dead = [], []
+        for index, row in enumerate(rows):
+            try:
+                self._store([row])
+            except (OperationalError, InterfaceError) as e:
+                self._record_error(e)
+                print(f"❌ Database unavailable, {len(rows) - index} surveys will be retried: {e}")
+                return written, rows[index:], dead
+            except Exception as e:
+                self._record_error(e)
+                dead.append((row, e))
+            else:
+                written.append(row)
+        return written, [], dead
+
+    def _dead_letter(self, dead):
+        path = os.path.join(self.spool_dir, DEAD_LETTER_NAME)
+        with open(path, 'a', encoding='utf-8') as f:
+            for (category, responses), error in dead:
+                f.write(json.dumps({
+                    'category': category,
+                    'responses': responses,
+                    'error': f"{type(error).__name__}: {error}",
+                    'failed_at': time.time(),
+                }) + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.dead_lettered += len(dead)
+        print(f"❌ {len(dead)} surveys could not be stored, moved to {path}")
+
+    def _retry_failed(self):
+        with self._cond:
+            retry, self._retry = self._retry, []
+        for path, rows in retry:
+            self._write(path, rows)
+
+    def _run(self):
+        self.recover()
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            if batch:
+                self._write(*batch)
+            self._retry_failed()
+
+    def recover(self):
+        """Write the surveys spooled by processes that died before flushing them"""
+        with self._cond:
+            self._init_process()
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, 'surveys-*.jsonl'))):
+            _, pid, token, _ = os.path.basename(path).split('-')
+            if self._is_live_owner(int(pid), token):
+                continue
+            # Claim the segment first so two workers never replay the same one
+            claimed = os.path.join(self.spool_dir, f"recovering-{self._pid}-{self._token}-{os.path.basename(path)}")
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            rows = _read_segment(claimed)
+            if not rows:
+                os.remove(claimed)
+            elif self._write(claimed, rows):
+                replayed += len(rows)
+        # Claims left by a recovering process that died in turn
+        for path in glob.glob(os.path.join(self.spool_dir, 'recovering-*.jsonl')):
+            _, pid, token, original = os.path.basename(path).split('-', 3)
+            if not self._is_live_owner(int(pid), token):
+                os.rename(path, os.path.join(self.spool_dir, original))
+        # Lock files of dead processes whose segments are all written
+        for path in glob.glob(os.path.join(self.spool_dir, 'owner-*.lock')):
+            _, pid, token = os.path.basename(path)[:-len('.lock')].split('-')
+            if glob.glob(os.path.join(self.spool_dir, f"*surveys-{pid}-{token}-*.jsonl")):
+                continue
+            if not self._is_live_owner(int(pid), token):
+                _remove(path)
+        if replayed:
+            self.recovered += replayed
+            print(f"✅ Recovered {replayed} spooled surveys")
+        return replayed
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+            retrying = sum(len(rows) for _, rows in self._retry)
+        return {
+            'pending': pending,
+            'accepted': self.accepted,
+            'written': self.written,
+            'batches': self.batches,
+            'recovered': self.recovered,
+            'retrying': retrying,
+            'dead_lettered': self.dead_lettered,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+def _rewrite_segment(path, rows):
+    staging = f"{path}.tmp"
+    with open(staging, 'w', encoding='utf-8') as f:
+        for category, responses in rows:
+            f.write(json.dumps({'category': category, 'responses': responses}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, path)
+
+
+def _hold_lock(path):
+    # Held until the process exits; None where flock isn't available
+    if fcntl is None:
+        return None
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    return fd
+
+
+def _lock_held(path):
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        # Closing releases the lock if this call took it
+        os.close(fd)
+    return False
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_segment(path):
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write was never acknowledged
+                continue
+            rows.append((record['category'], record['responses']))
+    return rows
+
+
+survey_buffer = SurveyBuffer(
+    spool_dir=getattr(settings, 'SURVEY_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'survey_spool')),
+    batch_size=getattr(settings, 'SURVEY_BATCH_SIZE', 100),
+    flush_interval_ms=getattr(settings, 'SURVEY_FLUSH_INTERVAL_MS', 200),
+    fsync=getattr(settings, 'SURVEY_SPOOL_FSYNC', True),
+)
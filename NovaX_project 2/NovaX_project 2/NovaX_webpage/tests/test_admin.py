@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from NovaX_webpage.models import CareerSurvey, SurveyAnswer
+
+
+class CareerSurveyAdminTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.url = reverse('admin:NovaX_webpage_careersurvey_changelist')
+        CareerSurvey.objects.create(category='AI Counseling', responses={
+            'counseling_data': {'Logical_quotient_rating': 7},
+            'predictions': [{'career': 'Architect', 'probability': 0.8}],
+        })
+        CareerSurvey.objects.create(category='Aptitude test Q', responses={'q1': 'a', 'q2': 'b'})
+        CareerSurvey.objects.create(category='Aptitude test Q', responses={})
+
+    def test_summary_is_the_top_prediction_or_the_answer_count(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Architect')
+        self.assertContains(response, '2 answers')
+
+    def test_summary_comes_from_answer_rows(self):
+        survey = CareerSurvey.objects.create(category='AI Counseling', responses={'counseling_data': {}})
+        SurveyAnswer.objects.create(survey=survey, feature='prediction_1', value=0.9, text_value='Data Scientist')
+        quiz = CareerSurvey.objects.create(category='Combined test Q', responses={'q1': 'a'})
+        for feature in ('q1', 'q2', 'q3', 'q4', 'q5'):
+            SurveyAnswer.objects.create(survey=quiz, feature=feature, text_value='a')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Data Scientist')
+        self.assertContains(response, '5 answers')
+        # Surveys without answer rows still show their responses' summary
+        self.assertContains(response, 'Architect')
+        self.assertContains(response, '2 answers')
+
+    @override_settings(SURVEY_ADMIN_COUNT_CAP=2)
+    def test_capped_count_is_shown_as_a_lower_bound(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, '2+ career surveys')
+
+    @override_settings(SURVEY_ADMIN_COUNT_CAP=10)
+    def test_exact_count_below_the_cap(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, '3 career surveys')
+        self.assertNotContains(response, '3+')
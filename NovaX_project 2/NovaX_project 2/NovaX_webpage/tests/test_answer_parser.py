@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase, override_settings
+
+from NovaX_webpage.ai_counselor import EducationalCounselor
+from NovaX_webpage.answer_parser import FieldMatcher, format_score, is_edit_request, parse_score
+from NovaX_webpage.question_flow import load_flows
+
+
+class ParseScoreTests(SimpleTestCase):
+
+    def test_free_text_scores(self):
+        cases = {
+            '7': 7.0, ' 9.5 ': 9.5, '7/10': 7.0, '3 out of 5': 6.0, '70%': 7.0,
+            'seven': 7.0, 'ten out of ten': 10.0, 'about 8': 8.0, 'I guess a four': 4.0,
+            '7-8': 7.5, 'between 7 and 8': 7.5,
+        }
+        for text, score in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_score(text), score)
+
+    def test_one_typo_in_a_short_answer(self):
+        self.assertEqual(parse_score('sevn'), 7.0)
+        self.assertEqual(parse_score('eigth'), 8.0)
+
+    def test_rejects_out_of_range_and_non_scores(self):
+        for text in ('0', '11', '12/10', '2 or 9', 'nice', 'your call', '', None):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_score(text))
+
+    def test_format_score(self):
+        self.assertEqual(format_score(7.0), '7')
+        self.assertEqual(format_score(7.5), '7.5')
+
+
+class EditRequestTests(SimpleTestCase):
+
+    def test_edit_words(self):
+        for text in ('edit', 'Change please', 'go back', 'fix my score', 'wrnog'):
+            with self.subTest(text=text):
+                self.assertTrue(is_edit_request(text))
+
+    def test_near_misses_are_not_edit_requests(self):
+        # "pack" is one letter from "back", which only matches exactly; long sentences get no typo allowance
+        for text in ('pack', '7', 'I have a nice chance'):
+            with self.subTest(text=text):
+                self.assertFalse(is_edit_request(text))
+
+
+class FieldMatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        flow = load_flows().get_flow()
+        self.matcher = FieldMatcher(flow.labels, flow.aliases)
+
+    def test_names_labels_and_aliases(self):
+        cases = {
+            'teamwork': 'Enjoy_Teamwork', 'organized': 'C_score', 'verbal': 'Verbal_Aptitude',
+            'creativity': 'Creative_Thinking', 'spatial skills': 'Spatial_Aptitude',
+        }
+        for text, field in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(self.matcher.match(text), field)
+
+    def test_ambiguous_or_unknown_text(self):
+        self.assertIsNone(self.matcher.match('aptitude'))
+        self.assertIsNone(self.matcher.match('banana'))
+
+    def test_candidates_narrow_the_match(self):
+        self.assertIsNone(self.matcher.match('verbal', candidates={'C_score'}))
+
+
+@override_settings(COUNSELOR_LLM_BACKEND='none')
+class EditFieldSelectionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.counselor = EducationalCounselor()
+        self.collected = {'C_score': 6.0, 'N_score': 4.0, 'Enjoy_Teamwork': 8.0}
+
+    def select(self, text):
+        return self.counselor.process_answer(text, 'edit_mode', 'editing', dict(self.collected))
+
+    def test_field_named_in_words(self):
+        # "one" is also a score word; it must not pick the first option
+        self.assertEqual(self.select('the one about teamwork')['field_to_edit'], 'Enjoy_Teamwork')
+        self.assertEqual(self.select('the one about stress')['field_to_edit'], 'N_score')
+
+    def test_option_number(self):
+        self.assertEqual(self.select('2')['field_to_edit'], 'N_score')
+        self.assertEqual(self.select('three')['field_to_edit'], 'Enjoy_Teamwork')
+
+    def test_unknown_choice_asks_again(self):
+        response = self.select('the one about cooking')
+        self.assertEqual(response['conversation_step'], 'editing')
+        self.assertNotIn('field_to_edit', response)
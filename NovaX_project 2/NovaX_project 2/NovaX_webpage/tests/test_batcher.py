@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import TimeoutError
+
+from django.test import SimpleTestCase
+
+from NovaX_webpage.inference import MicroBatcher
+
+
+def row_sums(rows):
+    return [float(row.sum()) for row in rows]
+
+
+class MicroBatcherTests(SimpleTestCase):
+
+    def test_concurrent_rows_share_a_batch(self):
+        calls = []
+
+        def predict(rows):
+            calls.append(len(rows))
+            return row_sums(rows)
+
+        batcher = MicroBatcher(predict, window_ms=50, max_batch_size=8)
+        futures = [batcher.submit([i, i]) for i in range(4)]
+        self.assertEqual([f.result(5) for f in futures], [0.0, 2.0, 4.0, 6.0])
+        self.assertEqual(sum(calls), 4)
+        self.assertLess(len(calls), 4)
+
+    def test_malformed_row_fails_its_batch_not_the_worker(self):
+        batcher = MicroBatcher(row_sums, window_ms=0)
+        with self.assertRaises(ValueError):
+            batcher.predict(['not a number', 1], timeout=5)
+        self.assertEqual(batcher.predict([1, 2], timeout=5), 3.0)
+
+    def test_predict_error_reaches_every_caller(self):
+        def predict(rows):
+            raise RuntimeError("model failed")
+
+        batcher = MicroBatcher(predict, window_ms=20)
+        futures = [batcher.submit([1]) for _ in range(3)]
+        for future in futures:
+            with self.assertRaisesMessage(RuntimeError, "model failed"):
+                future.result(5)
+
+    def test_short_result_fails_the_batch(self):
+        batcher = MicroBatcher(lambda rows: [], window_ms=0)
+        with self.assertRaises(ValueError):
+            batcher.predict([1], timeout=5)
+
+    def test_predict_times_out_by_default(self):
+        release = threading.Event()
+
+        def predict(rows):
+            release.wait(5)
+            return row_sums(rows)
+
+        batcher = MicroBatcher(predict, window_ms=0, timeout=0.05)
+        try:
+            with self.assertRaises(TimeoutError):
+                batcher.predict([1])
+        finally:
+            release.set()
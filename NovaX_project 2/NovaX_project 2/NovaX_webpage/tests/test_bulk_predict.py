@@ -0,0 +1,88 @@
+import io
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase
+
+from NovaX_webpage import bulk_predict, inference
+from NovaX_webpage.views import _streamed
+
+
+def jsonl(*records):
+    return [(json.dumps(record) if isinstance(record, dict) else record) + '\n' for record in records]
+
+
+class FeatureRowTests(SimpleTestCase):
+
+    def test_valid_rows_keep_feature_order_and_default_missing_to_zero(self):
+        record = {feat: i + 1 for i, feat in enumerate(inference.FEATURES)}
+        record['id'] = 'a'
+        del record['N_score']
+        rows = list(bulk_predict.iter_feature_rows(jsonl(record)))
+        self.assertEqual(len(rows), 1)
+        row_id, features, error = rows[0]
+        self.assertEqual((row_id, error), ('a', None))
+        self.assertEqual(features[:6], [1.0, 2.0, 3.0, 4.0, 0.0, 6.0])
+
+    def test_bad_rows_become_errors_without_stopping_the_stream(self):
+        lines = jsonl({'O_score': 'high'}, 'not json', '[1, 2]', {'O_score': 7})
+        rows = list(bulk_predict.iter_feature_rows(lines))
+        self.assertEqual([row_id for row_id, _, _ in rows], [1, 2, 3, 4])
+        self.assertEqual([error is None for _, _, error in rows], [False, False, False, True])
+
+    def test_non_finite_values_are_rejected(self):
+        lines = jsonl({'O_score': 'nan'}, {'C_score': 'inf'}, {'E_score': '-Infinity'}, '{"A_score": NaN}')
+        rows = list(bulk_predict.iter_feature_rows(lines))
+        for _, features, error in rows:
+            self.assertIsNone(features)
+            self.assertIn('finite', error)
+
+    def test_csv_rows(self):
+        lines = io.StringIO('id,O_score,C_score\nx,7,8\ny,inf,1\n')
+        rows = list(bulk_predict.iter_feature_rows(lines, 'csv'))
+        self.assertEqual(rows[0][0], 'x')
+        self.assertEqual(rows[0][1][:2], [7.0, 8.0])
+        self.assertEqual(rows[1][0], 'y')
+        self.assertIsNotNone(rows[1][2])
+
+    def test_undecodable_bytes_fail_only_their_row(self):
+        lines = [b'{"O_score": 7}\n', b'{"O_score": "\xff"}\n', b'{"O_score": 8}\n']
+        rows = list(bulk_predict.iter_feature_rows(bulk_predict.iter_text_lines(lines)))
+        self.assertEqual([error is None for _, _, error in rows], [True, False, True])
+
+
+class FormatTests(SimpleTestCase):
+
+    def test_csv_output_pads_missing_ranks_and_reports_errors(self):
+        results = [
+            {'id': 1, 'predictions': [{'career': 'Engineer', 'probability': 61.5}], 'model_version': 'v1'},
+            {'id': 2, 'error': 'bad row'},
+        ]
+        lines = list(bulk_predict.format_results(results, 'csv', k=2))
+        self.assertEqual(lines[0].strip(), 'id,career_1,probability_1,career_2,probability_2,model_version,error')
+        self.assertEqual(lines[1].strip(), '1,Engineer,61.5,,,v1,')
+        self.assertEqual(lines[2].strip(), '2,,,,,,bad row')
+
+
+class StreamedResponseTests(SimpleTestCase):
+
+    def test_sync_chunks_are_passed_through_under_wsgi(self):
+        chunks = iter(['a', 'b'])
+        self.assertIs(_streamed(RequestFactory().post('/'), chunks), chunks)
+
+    def test_asgi_gets_one_chunk_at_a_time(self):
+        produced = []
+
+        def chunks():
+            for chunk in ('a', 'b', 'c'):
+                produced.append(chunk)
+                yield chunk
+
+        async def first_chunk():
+            stream = _streamed(AsyncRequestFactory().post('/'), chunks())
+            chunk = await stream.__anext__()
+            await stream.aclose()
+            return chunk
+
+        self.assertEqual(async_to_sync(first_chunk)(), 'a')
+        self.assertEqual(produced, ['a'])
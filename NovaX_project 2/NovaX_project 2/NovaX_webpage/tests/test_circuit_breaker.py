@@ -0,0 +1,113 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from NovaX_webpage import circuit_breaker
+from NovaX_webpage.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """Stands in for the time module inside circuit_breaker"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(circuit_breaker, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('test', failure_threshold=3, window=60, min_calls=4,
+                                      failure_rate=0.5, slow_call_ms=1000, reset_timeout=30)
+
+    def record_failures(self, times=1):
+        for _ in range(times):
+            self.breaker.record_failure(10)
+
+    def test_opens_after_consecutive_failures(self):
+        self.record_failures(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.record_failures()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+    def test_success_resets_the_consecutive_count(self):
+        self.breaker.min_calls = 100
+        self.record_failures(2)
+        self.breaker.record_success(10)
+        self.record_failures(1)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_opens_on_failure_rate_including_slow_calls(self):
+        self.breaker.record_success(10)
+        self.breaker.record_success(5000)
+        self.record_failures()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_success(10)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_old_calls_leave_the_window(self):
+        self.breaker.record_success(5000)
+        self.breaker.record_success(5000)
+        self.clock.now += 120
+        self.breaker.record_success(10)
+        self.breaker.record_success(10)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.stats()['calls'], 2)
+
+    def test_half_open_probe_closes_on_success(self):
+        self.record_failures(3)
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success(10)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.stats()['calls'], 0)
+
+    def test_half_open_probe_reopens_on_failure_or_slow_call(self):
+        for record in (lambda: self.record_failures(), lambda: self.breaker.record_success(5000)):
+            self.record_failures(3)
+            self.clock.now += 31
+            self.assertTrue(self.breaker.allow())
+            record()
+            self.assertEqual(self.breaker.state, OPEN)
+            self.assertFalse(self.breaker.allow())
+            self.clock.now += 31
+
+    def test_lost_probe_is_replaced(self):
+        self.record_failures(3)
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow())
+
+    def test_call_skips_the_function_while_open(self):
+        self.record_failures(3)
+        fn = mock.Mock()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(fn)
+        fn.assert_not_called()
+
+    def test_cancelled_async_call_counts_as_failure(self):
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def main():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.breaker.call_async(slow), 0.01)
+
+        asyncio.run(main())
+        self.assertEqual(self.breaker.consecutive_failures, 1)
@@ -0,0 +1,54 @@
+from django.test import SimpleTestCase
+
+from NovaX_webpage.conversation_log import ConversationLog
+
+
+def fill(log, count):
+    for i in range(1, count + 1):
+        log.append('user' if i % 2 else 'bot', f"message {i}")
+    return log
+
+
+class ConversationLogTests(SimpleTestCase):
+
+    def test_sequence_numbers_and_cursor(self):
+        log = fill(ConversationLog(max_messages=60), 5)
+        self.assertEqual(log.last_seq, 5)
+        self.assertEqual([m['seq'] for m in log.since(3)], [4, 5])
+        self.assertEqual(log.since(5), [])
+
+    def test_legacy_messages_are_numbered(self):
+        log = ConversationLog([{'type': 'bot', 'message': 'Hi'}, {'type': 'user', 'message': '7'}])
+        self.assertEqual(([m['seq'] for m in log.messages], log.last_seq), ([1, 2], 2))
+
+    def test_compaction_keeps_the_newest_half_and_counts_the_rest(self):
+        log = fill(ConversationLog(max_messages=6), 13)
+        summary = log.messages[0]
+        self.assertEqual(summary['type'], 'summary')
+        self.assertEqual(summary['count'] + len(log.messages) - 1, 13)
+        self.assertEqual(summary['answers'], sum(1 for i in range(1, summary['count'] + 1) if i % 2))
+        self.assertEqual(log.messages[-1]['message'], 'message 13')
+        self.assertLessEqual(len(log.messages), 6)
+        # An old cursor still gets the summary of what it missed
+        self.assertEqual(log.since(1)[0]['type'], 'summary')
+
+    def test_tiny_limits_still_keep_the_newest_message(self):
+        for max_messages in (1, 2, -3):
+            with self.subTest(max_messages=max_messages):
+                log = fill(ConversationLog(max_messages=max_messages), 7)
+                self.assertEqual([m['type'] for m in log.messages], ['summary', 'user'])
+                self.assertEqual(log.messages[0]['count'], 6)
+                self.assertEqual(log.messages[-1]['message'], 'message 7')
+
+    def test_full_history_includes_compacted_messages(self):
+        log = fill(ConversationLog(max_messages=6), 13)
+        self.assertEqual([m['message'] for m in log.full_history()], [f"message {i}" for i in range(1, 14)])
+        # The archive round-trips through the session
+        again = ConversationLog(log.messages, log.last_seq, max_messages=6, archive=log.archive)
+        again.append('bot', 'message 14')
+        self.assertEqual(len(again.full_history()), 14)
+
+    def test_legacy_summary_is_kept_without_an_archive(self):
+        log = ConversationLog([{'seq': 4, 'type': 'summary', 'message': '4 earlier', 'count': 4, 'answers': 2},
+                               {'seq': 5, 'type': 'user', 'message': '7'}])
+        self.assertEqual([m['type'] for m in log.full_history()], ['summary', 'user'])
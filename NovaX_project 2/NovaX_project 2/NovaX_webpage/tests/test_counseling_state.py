@@ -0,0 +1,125 @@
+import json
+from unittest import mock
+
+from django.core import signing
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from NovaX_webpage import ai_counselor
+from NovaX_webpage.counseling_state import (
+    SALT, InvalidStateToken, history_from_client, new_state, pack_state, unpack_state,
+)
+from NovaX_webpage.models import CareerSurvey
+from NovaX_webpage.question_flow import load_flows
+
+
+class StateTokenTests(SimpleTestCase):
+
+    def setUp(self):
+        self.flow = load_flows().get_flow()
+        self.state = new_state(self.flow.name, self.flow.fields[2], 'personality')
+        self.state['counseling_data'] = {self.flow.fields[0]: 7.0, self.flow.fields[1]: 7.625}
+
+    def test_round_trip_keeps_exact_scores(self):
+        state = unpack_state(pack_state(self.state))
+        for key in ('id', 'flow', 'current_field', 'conversation_step', 'counseling_data'):
+            self.assertEqual(state[key], self.state[key])
+
+    def test_tampered_token_is_rejected(self):
+        token = pack_state(self.state)
+        tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+        for bad in (tampered, 'not-a-token', '', None):
+            with self.subTest(token=bad):
+                with self.assertRaises(InvalidStateToken):
+                    unpack_state(bad)
+
+    def test_signed_but_malformed_payload_is_rejected(self):
+        for payload in ([2, 'id', 'general', 'C_score', 'personality', '7,8'], 'text', [1, 2]):
+            with self.subTest(payload=payload):
+                with self.assertRaises(InvalidStateToken):
+                    unpack_state(signing.dumps(payload, salt=SALT, compress=True))
+
+    def test_expired_token_is_rejected(self):
+        token = pack_state(self.state)
+        with mock.patch('django.core.signing.time.time', return_value=signing.time.time() + 120):
+            with self.assertRaisesMessage(InvalidStateToken, 'expired'):
+                unpack_state(token, max_age=60)
+
+    def test_tokens_with_scores_in_tenths_still_load(self):
+        scores = ','.join('75' if i == 0 else '' for i in range(len(self.flow.fields)))
+        token = signing.dumps(['abc', self.flow.name, self.flow.fields[1], 'personality', scores],
+                              salt=SALT, compress=True)
+        self.assertEqual(unpack_state(token)['counseling_data'], {self.flow.fields[0]: 7.5})
+
+
+class ClientHistoryTests(SimpleTestCase):
+
+    def test_malformed_entries_are_dropped_and_messages_renumbered(self):
+        log = history_from_client([
+            {'seq': 40, 'type': 'bot', 'message': 'Hi'},
+            {'type': 'admin', 'message': 'x'},
+            {'type': 'user', 'message': 7},
+            'junk',
+            {'seq': 3, 'type': 'summary', 'message': '2 earlier', 'count': '2', 'answers': 1},
+            {'type': 'user', 'message': 'x' * 5000},
+        ])
+        self.assertEqual([m['seq'] for m in log.messages], [1, 2, 3])
+        self.assertEqual(log.messages[1]['count'], 2)
+        self.assertEqual(len(log.messages[2]['message']), 2000)
+
+    def test_not_a_list(self):
+        self.assertEqual(history_from_client({'type': 'bot'}).messages, [])
+
+
+ANSWERS = ['7.25', '8', 'about 6', '5', '9', '7-8', '6', '8', '7', '6', '9', '4', '5']
+
+
+@override_settings(COUNSELOR_LLM_BACKEND='none')
+class StatelessSessionTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(ai_counselor._counselors, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, name, body):
+        return self.client.post(reverse(name), json.dumps(body), content_type='application/json').json()
+
+    def run_session(self):
+        data = self.post('start_counseling', {})
+        state, history, archive = data.get('state'), data.get('history'), data.get('history_archive')
+        for answer in ANSWERS:
+            body = {'answer': answer, 'field': data['field']}
+            if state:
+                body.update(state=state, history=history, history_archive=archive)
+            data = self.post('process_answer', body)
+            state, history = data.get('state'), data.get('history')
+            archive = data.get('history_archive', archive)
+        self.assertTrue(data['completed'])
+        return CareerSurvey.objects.get(category='AI_Counseling').responses
+
+    def test_both_modes_save_the_same_survey(self):
+        with override_settings(COUNSELOR_STATELESS_SESSIONS=False):
+            session_backed = self.run_session()
+        CareerSurvey.objects.all().delete()
+        with override_settings(COUNSELOR_STATELESS_SESSIONS=True):
+            stateless = self.run_session()
+
+        self.assertEqual(stateless['counseling_data'], session_backed['counseling_data'])
+        self.assertIn(7.25, stateless['counseling_data'].values())
+        self.assertGreater(len(stateless['conversation_history']), 2 * 13)
+        # Greetings are picked at random, compare the shape and the student's side
+        self.assertEqual([m['type'] for m in stateless['conversation_history']],
+                         [m['type'] for m in session_backed['conversation_history']])
+        user_messages = [[m['message'] for m in survey['conversation_history'] if m['type'] == 'user']
+                         for survey in (stateless, session_backed)]
+        self.assertEqual(user_messages[0], user_messages[1])
+
+    @override_settings(COUNSELOR_HISTORY_MAX_MESSAGES=6)
+    def test_compacted_sessions_save_the_whole_conversation(self):
+        for stateless in (False, True):
+            with self.subTest(stateless=stateless), override_settings(COUNSELOR_STATELESS_SESSIONS=stateless):
+                CareerSurvey.objects.all().delete()
+                history = self.run_session()['conversation_history']
+                self.assertNotIn('summary', [m['type'] for m in history])
+                self.assertEqual([m['message'] for m in history if m['type'] == 'user'], ANSWERS)
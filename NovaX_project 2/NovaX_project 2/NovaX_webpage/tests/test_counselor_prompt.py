@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from NovaX_webpage.counselor_prompt import MalformedReplyError, validate_turn
+
+
+TEAMWORK = ("How much do you enjoy collaborating in teams? "
+            "(1 = strongly prefer working independently, 10 = thrive in team environments)")
+
+
+def turn(next_question):
+    reply = {'message': 'Thanks for sharing!', 'next_question': next_question}
+    return validate_turn(reply, 'Enjoy_Teamwork', 'preference', TEAMWORK)
+
+
+class ValidateTurnTests(SimpleTestCase):
+
+    def test_reworded_question_is_kept(self):
+        question = 'How do you feel about collaboration in a team? (1 = solo, 10 = team player)'
+        self.assertEqual(turn(question)['next_question'], question)
+
+    def test_question_about_another_field_falls_back_to_the_flow(self):
+        off_topic = 'How comfortable are you with numbers and calculations? (1 = avoid math, 10 = love math)'
+        self.assertEqual(turn(off_topic)['next_question'], TEAMWORK)
+
+    def test_wrong_field_or_overlong_question_falls_back(self):
+        reply = {'message': 'Great!', 'next_question': 'How much do you like teams?', 'field': 'C_score'}
+        self.assertEqual(validate_turn(reply, 'Enjoy_Teamwork', 'preference', TEAMWORK)['next_question'], TEAMWORK)
+        self.assertEqual(turn('team ' * 200)['next_question'], TEAMWORK)
+
+    def test_field_and_step_come_from_the_flow(self):
+        result = turn('How much do you like teams?')
+        self.assertEqual((result['field'], result['conversation_step']), ('Enjoy_Teamwork', 'preference'))
+
+    def test_reply_without_a_message_is_rejected(self):
+        with self.assertRaises(MalformedReplyError):
+            validate_turn({'next_question': TEAMWORK}, 'Enjoy_Teamwork', 'preference', TEAMWORK)
@@ -0,0 +1,85 @@
+import json
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from NovaX_webpage.ai_counselor import EducationalCounselor
+from NovaX_webpage.counselor_prompt import MessageStream
+from NovaX_webpage.llm_backends import FakeBackend, GeminiBackend
+
+
+def feed_in_chunks(reply, size, stream=None):
+    stream = stream or MessageStream()
+    return ''.join(stream.feed(reply[i:i + size]) for i in range(0, len(reply), size))
+
+
+class MessageStreamTests(SimpleTestCase):
+
+    def test_message_text_at_any_chunk_size(self):
+        reply = json.dumps({'message': 'Great, a "7" \\ café\nnext', 'next_question': 'Q?'})
+        for size in (1, 2, 3, 5, 8, len(reply)):
+            self.assertEqual(feed_in_chunks(reply, size), 'Great, a "7" \\ café\nnext')
+
+    def test_code_fences_and_key_order(self):
+        reply = '```json\n{"next_question": "Q?", "message" :  "  Thanks!"}\n```'
+        self.assertEqual(feed_in_chunks(reply, 4), 'Thanks!')
+
+    def test_nothing_without_a_message(self):
+        self.assertEqual(feed_in_chunks('{"next_question": "Q?"}', 3), '')
+
+    def test_capped_like_the_final_turn(self):
+        reply = json.dumps({'message': 'x' * 50})
+        self.assertEqual(feed_in_chunks(reply, 7, MessageStream(max_chars=10)), 'x' * 10)
+
+
+class ProcessAnswerStreamTests(SimpleTestCase):
+
+    def test_tokens_are_the_acknowledgement(self):
+        reply = {'message': 'Thanks, that tells me a lot!', 'next_question': 'How organized are you?'}
+        backend = FakeBackend(replies=[reply], latency_ms=0, chunk_size=5, chunk_delay_ms=0, distribution='fixed')
+        counselor = EducationalCounselor(backend=backend)
+        field = counselor.flow.first_field
+        events = list(counselor.process_answer_stream('7', field, counselor.flow.steps[field],
+                                                      {'a': 5.0, 'b': 6.0, 'c': 7.0}))
+        tokens = [value for kind, value in events if kind == 'token']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(''.join(tokens), reply['message'])
+        kind, turn = events[-1]
+        self.assertEqual((kind, turn['message']), ('turn', reply['message']))
+
+
+class SlowStreamModel:
+    """Stands in for the Gemini model: a streamed reply whose chunks arrive every 20 ms"""
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        for char in json.dumps({'message': 'Thanks!', 'next_question': 'How organized are you?'}):
+            time.sleep(0.02)
+            yield mock.Mock(text=char)
+
+
+def slow_gemini():
+    backend = GeminiBackend.__new__(GeminiBackend)
+    backend.model, backend.generation_config = SlowStreamModel(), {}
+    return backend
+
+
+class GeminiStreamTests(SimpleTestCase):
+
+    def test_slow_stream_is_cut_off_at_the_overall_timeout(self):
+        chunks = []
+        with self.assertRaises(TimeoutError):
+            for chunk in slow_gemini().stream('prompt', timeout=0.1):
+                chunks.append(chunk)
+        self.assertLess(len(chunks), 10)
+
+    def test_counselor_falls_back_to_the_rule_based_turn(self):
+        counselor = EducationalCounselor(backend=slow_gemini())
+        counselor.llm_timeout = 0.1
+        field = counselor.flow.first_field
+        events = list(counselor.process_answer_stream('7', field, counselor.flow.steps[field],
+                                                      {'a': 5.0, 'b': 6.0, 'c': 7.0}))
+        kind, turn = events[-1]
+        self.assertEqual(kind, 'turn')
+        self.assertNotEqual(turn['message'], 'Thanks!')
+        self.assertEqual(counselor.breaker.stats()['consecutive_failures'], 1)
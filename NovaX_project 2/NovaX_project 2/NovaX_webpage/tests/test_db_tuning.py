@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+from NovaX_webpage.db_tuning import sqlite_pragmas
+
+
+class SqlitePragmaTests(SimpleTestCase):
+
+    @override_settings(SQLITE_JOURNAL_MODE='DELETE', SQLITE_CACHE_SIZE_KB=1000)
+    def test_pragmas_follow_the_settings(self):
+        pragmas = sqlite_pragmas()
+        self.assertIn('PRAGMA journal_mode=DELETE', pragmas)
+        self.assertIn('PRAGMA cache_size=-1000', pragmas)
+
+    def test_rollback_journal_by_default(self):
+        # WAL rewrites db.sqlite3 for good, so only a deployment that asks for it gets it
+        with self.settings():
+            del settings.SQLITE_JOURNAL_MODE
+            del settings.SQLITE_SYNCHRONOUS
+            pragmas = sqlite_pragmas()
+        self.assertIn('PRAGMA journal_mode=DELETE', pragmas)
+        self.assertIn('PRAGMA synchronous=FULL', pragmas)
+
+
+class ConnectionHookTests(SimpleTestCase):
+    databases = {'default'}
+
+    @override_settings(SQLITE_TUNING=True, SQLITE_BUSY_TIMEOUT_MS=5000)
+    def test_new_connections_are_tuned(self):
+        # Applied by the connection_created receiver registered in AppConfig.ready, on a
+        # connection opened here so the tuning the suite started with doesn't matter
+        connection = connections.create_connection('default')
+        self.addCleanup(connection.close)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
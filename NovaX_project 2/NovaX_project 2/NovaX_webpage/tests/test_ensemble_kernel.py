@@ -0,0 +1,115 @@
+import json
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+from django.urls import reverse
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from NovaX_webpage import inference
+from NovaX_webpage.ensemble_kernel import CompiledEnsemble, top_k_indices
+
+
+def soft_vote(models, scaler, rows):
+    scaled = scaler.transform(rows)
+    return np.mean([model.predict_proba(scaled) for model in models], axis=0)
+
+
+class CompiledEnsembleTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(42)
+        x = rng.integers(1, 11, size=(300, 13)).astype(float)
+        y = (x[:, 0] + x[:, 5] + rng.integers(0, 3, size=300)).astype(int) % 4
+        cls.scaler = StandardScaler().fit(x)
+        scaled = cls.scaler.transform(x)
+        cls.models = [
+            LogisticRegression(max_iter=500).fit(scaled, y),
+            RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(scaled, y),
+            ExtraTreesClassifier(n_estimators=10, random_state=0).fit(scaled, y),
+            DecisionTreeClassifier(max_depth=4, random_state=0).fit(scaled, y),
+        ]
+        cls.probe = rng.integers(1, 11, size=(200, 13)).astype(float)
+
+    def test_compiled_kernel_matches_predict_proba(self):
+        kernel = CompiledEnsemble.compile(self.models, self.scaler, 4)
+        self.assertEqual(kernel.fallback_models, [])
+        np.testing.assert_allclose(
+            kernel.predict_proba(self.probe), soft_vote(self.models, self.scaler, self.probe), rtol=0, atol=1e-9)
+        self.assertTrue(kernel.verify(self.models, self.scaler, self.probe))
+
+    def test_unsupported_members_fall_back_to_their_own_predict_proba(self):
+        scaled = self.scaler.transform(self.probe)
+        knn = KNeighborsClassifier().fit(scaled, self.models[0].predict(scaled))
+        models = self.models + [knn]
+        kernel = CompiledEnsemble.compile(models, self.scaler, 4)
+        self.assertEqual(kernel.fallback_models, [knn])
+        self.assertTrue(kernel.verify(models, self.scaler, self.probe))
+
+    def test_passthrough_delegates_to_the_models(self):
+        kernel = CompiledEnsemble.passthrough(self.models, self.scaler, 4)
+        self.assertTrue(kernel.verify(self.models, self.scaler, self.probe))
+
+    def test_single_row(self):
+        kernel = CompiledEnsemble.compile(self.models, self.scaler, 4)
+        np.testing.assert_allclose(
+            kernel.predict_proba(self.probe[0]), soft_vote(self.models, self.scaler, self.probe[:1]), atol=1e-9)
+
+    def test_non_finite_input_is_rejected(self):
+        # Like sklearn's predict_proba, instead of returning NaN probabilities
+        kernel = CompiledEnsemble.compile(self.models, self.scaler, 4)
+        for value in (np.nan, np.inf, -np.inf):
+            row = self.probe[0].copy()
+            row[3] = value
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                kernel.predict_proba(row)
+
+
+class PredictCareerInputTests(SimpleTestCase):
+
+    def setUp(self):
+        model = mock.Mock(fingerprint='fp', version='v1')
+        patches = [
+            mock.patch.object(inference, 'get_model', return_value=model),
+            mock.patch.object(inference.watcher, 'ensure_started'),
+            mock.patch.object(inference.batcher, 'predict', return_value=([{'career': 'Engineer', 'probability': 50.0}], model)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        return self.client.post(reverse('predict_career'), body, content_type='application/json')
+
+    def test_non_finite_features_get_a_400(self):
+        for body in ('{"O_score": NaN}', '{"C_score": "inf"}', '{"N_score": "-Infinity"}'):
+            with self.subTest(body=body):
+                response = self.post(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('must be a finite number', response.json()['error'])
+        inference.batcher.predict.assert_not_called()
+
+    def test_finite_features_are_scored(self):
+        response = self.post(json.dumps({feat: 5 for feat in inference.FEATURES}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['model_version'], 'v1')
+
+    def test_predict_one_checks_before_batching(self):
+        with self.assertRaisesMessage(ValueError, 'O_score must be a finite number'):
+            inference.predict_one([float('nan')] + [5.0] * (len(inference.FEATURES) - 1))
+
+
+class TopKTests(SimpleTestCase):
+
+    def test_top_k_is_sorted_best_first(self):
+        probas = np.array([[0.1, 0.4, 0.2, 0.3], [0.5, 0.1, 0.3, 0.1]])
+        self.assertEqual(top_k_indices(probas, 3).tolist(), [[1, 3, 2], [0, 2, 1]])
+
+    def test_k_larger_than_the_classes(self):
+        self.assertEqual(top_k_indices(np.array([[0.2, 0.8]]), 3).tolist(), [[1, 0]])
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from NovaX_webpage import inference, model_registry
+from NovaX_webpage.ensemble_kernel import CompiledEnsemble
+from NovaX_webpage.model_registry import (
+    CURRENT_NAME, ModelWatcher, activate_version, current_version, list_versions, publish_version,
+)
+from NovaX_webpage.tests.test_model_store import fit_artifacts
+
+
+class ModelRegistryTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        models, label_encoder, scaler = fit_artifacts()
+        cls.kernel = CompiledEnsemble.compile(models, scaler, len(label_encoder.classes_))
+        cls.labels = [str(label) for label in label_encoder.classes_]
+
+    def setUp(self):
+        self.registry = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.registry, True)
+        self.loaded = []
+        self.watcher = ModelWatcher(self.registry, interval=0, on_load=self.loaded.append,
+                                    features=inference.FEATURES)
+
+    def publish(self, version, **kwargs):
+        return publish_version(self.kernel, self.labels, inference.FEATURES, self.registry, version=version, **kwargs)
+
+    def touch_current(self, seconds):
+        # A distinct mtime, as a new activate_model run would leave
+        path = os.path.join(self.registry, CURRENT_NAME)
+        os.utime(path, ns=(seconds * 10 ** 9, seconds * 10 ** 9))
+
+    def test_watcher_loads_newly_activated_versions(self):
+        self.publish('v1')
+        self.assertTrue(self.watcher.check())
+        self.assertFalse(self.watcher.check())
+        self.publish('v2')
+        self.assertTrue(self.watcher.check())
+        self.assertEqual([bundle.version for bundle in self.loaded], ['v1', 'v2'])
+
+    def test_failed_version_is_not_reloaded_on_every_poll(self):
+        self.publish('v1')
+        path = os.path.join(self.registry, 'v1', 'tree_value.npy')
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 8)
+        self.touch_current(1000)
+
+        with mock.patch.object(model_registry, 'load_version', wraps=model_registry.load_version) as load:
+            self.assertFalse(self.watcher.check())
+            self.assertFalse(self.watcher.check())
+            self.assertEqual(load.call_count, 1)
+            self.assertIn('v1', self.watcher.last_error)
+
+            # Activating it again is a new request to load it
+            self.touch_current(2000)
+            self.assertFalse(self.watcher.check())
+            self.assertEqual(load.call_count, 2)
+
+        self.publish('v2')
+        self.assertTrue(self.watcher.check())
+        self.assertIsNone(self.watcher.last_error)
+
+    def test_publish_verifies_before_activating(self):
+        self.publish('v1')
+        with mock.patch.object(model_registry, 'load_model_store', side_effect=ValueError('checksum')):
+            with self.assertRaisesMessage(ValueError, 'checksum'):
+                self.publish('v2')
+        self.assertEqual(list_versions(self.registry), ['v1'])
+        self.assertEqual(current_version(self.registry), 'v1')
+
+    def test_activate_unknown_version(self):
+        with self.assertRaises(ValueError):
+            activate_version(self.registry, 'missing')
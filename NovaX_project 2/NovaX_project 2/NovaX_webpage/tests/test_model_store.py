@@ -0,0 +1,133 @@
+import os
+import pickle
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from NovaX_webpage import inference, model_store
+from NovaX_webpage.ensemble_kernel import CompiledEnsemble
+from NovaX_webpage.model_store import load_model_store, save_model_store
+
+
+def fit_artifacts():
+    """Small ensemble, label encoder and scaler shaped like the real ones"""
+    rng = np.random.default_rng(7)
+    x = rng.integers(1, 11, size=(200, len(inference.FEATURES))).astype(float)
+    labels = np.array(['Engineer', 'Artist', 'Teacher', 'Doctor'])[(x[:, 0] + x[:, 6]).astype(int) % 4]
+    label_encoder = LabelEncoder().fit(labels)
+    scaler = StandardScaler().fit(x)
+    scaled, y = scaler.transform(x), label_encoder.transform(labels)
+    models = [
+        LogisticRegression(max_iter=500).fit(scaled, y),
+        RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(scaled, y),
+    ]
+    return models, label_encoder, scaler
+
+
+class ModelStoreTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.models, cls.label_encoder, cls.scaler = fit_artifacts()
+        cls.kernel = CompiledEnsemble.compile(cls.models, cls.scaler, len(cls.label_encoder.classes_))
+        cls.labels = [str(label) for label in cls.label_encoder.classes_]
+        cls.probe = np.random.default_rng(3).integers(1, 11, size=(20, len(inference.FEATURES))).astype(float)
+        cls.probe_labels = np.arange(20) % len(cls.labels)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.store = os.path.join(self.tmp, 'store')
+        save_model_store(self.kernel, self.labels, inference.FEATURES, self.store)
+
+    def test_round_trip(self):
+        bundle = load_model_store(self.store, inference.FEATURES)
+        probe = np.random.default_rng(1).integers(1, 11, size=(20, len(inference.FEATURES))).astype(float)
+        np.testing.assert_allclose(bundle.kernel.predict_proba(probe), self.kernel.predict_proba(probe))
+        self.assertEqual(bundle.class_labels, self.labels)
+        self.assertEqual(bundle.version, bundle.manifest['checksum'][:12])
+
+    def flip_last_byte(self, name):
+        path = os.path.join(self.store, name)
+        with open(path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+
+    def test_load_does_not_hash_the_arrays(self):
+        with mock.patch.object(model_store, '_checksum') as checksum:
+            load_model_store(self.store, inference.FEATURES)
+        checksum.assert_not_called()
+
+    def test_corrupted_array_fails_the_full_verification(self):
+        self.flip_last_byte('linear_coef.npy')
+        with self.assertRaisesMessage(ValueError, 'checksum'):
+            load_model_store(self.store, verify=True)
+
+    def test_truncated_array_is_rejected_on_load(self):
+        path = os.path.join(self.store, 'tree_value.npy')
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 8)
+        with self.assertRaisesMessage(ValueError, 'tree_value.npy'):
+            load_model_store(self.store)
+
+    def test_corrupted_fallback_is_rejected_before_unpickling(self):
+        # A member without a flat form is kept in the pickled fallback
+        models = self.models + [KNeighborsClassifier().fit(self.scaler.transform(self.probe), self.probe_labels)]
+        kernel = CompiledEnsemble.compile(models, self.scaler, len(self.labels))
+        save_model_store(kernel, self.labels, inference.FEATURES, self.store)
+        self.flip_last_byte('fallback.pkl')
+        with mock.patch.object(model_store.pickle, 'loads') as loads:
+            with self.assertRaisesMessage(ValueError, 'fallback'):
+                load_model_store(self.store)
+        loads.assert_not_called()
+
+    def test_other_features_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'features'):
+            load_model_store(self.store, inference.FEATURES[::-1])
+
+
+class LoaderFallbackTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        models, label_encoder, scaler = fit_artifacts()
+        for name, value in zip(inference.MODEL_FILES, (models, label_encoder, scaler)):
+            with open(os.path.join(self.tmp, name), 'wb') as f:
+                pickle.dump(value, f)
+        self.store = os.path.join(self.tmp, 'store')
+        kernel = CompiledEnsemble.compile(models, scaler, len(label_encoder.classes_))
+        save_model_store(kernel, list(label_encoder.classes_), inference.FEATURES, self.store)
+        for name, value in (('MODEL_DIR', self.tmp), ('MODEL_STORE_DIR', self.store),
+                            ('MODEL_REGISTRY_DIR', os.path.join(self.tmp, 'registry'))):
+            patcher = mock.patch.object(inference, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_valid_store_is_preferred(self):
+        self.assertEqual(inference.load_model_bundle().source, self.store)
+
+    def test_corrupted_store_falls_back_to_the_pickles(self):
+        os.remove(os.path.join(self.store, 'forest_sizes.npy'))
+        np.save(os.path.join(self.store, 'forest_sizes.npy'), np.array([9.0, 9.0, 9.0]))
+        bundle = inference.load_model_bundle()
+        self.assertEqual(bundle.version, 'pickle')
+        self.assertEqual(bundle.source, self.tmp)
+
+
+class PredictOneTests(SimpleTestCase):
+
+    def test_no_model_is_a_clear_error(self):
+        with mock.patch.object(inference, 'MODEL', None), mock.patch.object(inference, '_load_attempted', True):
+            with self.assertRaisesMessage(RuntimeError, 'not loaded'):
+                inference.predict_one([5.0] * len(inference.FEATURES))
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from NovaX_webpage import inference
+from NovaX_webpage.inference import PredictionCache
+
+
+class CacheKeyTests(SimpleTestCase):
+
+    def test_equivalent_inputs_share_a_key(self):
+        make_key = PredictionCache.make_key
+        self.assertEqual(make_key([7, 0.0]), make_key([7.0, -0.0]))
+        self.assertEqual(make_key(['7', 1]), make_key([7.0000001, 1]))
+        self.assertEqual(make_key([7, 0]), (7.0, 0.0))
+
+    def test_feature_order_matters(self):
+        self.assertNotEqual(PredictionCache.make_key([1, 2]), PredictionCache.make_key([2, 1]))
+
+
+class PredictionCacheTests(SimpleTestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = PredictionCache(maxsize=4)
+        self.assertIsNone(cache.get((1.0,), 'fp'))
+        cache.put((1.0,), 'fp', 'result')
+        self.assertEqual(cache.get((1.0,), 'fp'), 'result')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_new_fingerprint_empties_the_cache(self):
+        cache = PredictionCache()
+        cache.put((1.0,), 'v1', 'old')
+        self.assertIsNone(cache.get((1.0,), 'v2'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_results_from_an_older_model_are_dropped(self):
+        cache = PredictionCache()
+        cache.get((1.0,), 'v2')
+        cache.put((1.0,), 'v1', 'stale')
+        self.assertIsNone(cache.get((1.0,), 'v2'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PredictionCache(maxsize=2)
+        cache.put((1.0,), 'fp', 'a')
+        cache.put((2.0,), 'fp', 'b')
+        cache.get((1.0,), 'fp')
+        cache.put((3.0,), 'fp', 'c')
+        self.assertIsNone(cache.get((2.0,), 'fp'))
+        self.assertEqual(cache.get((1.0,), 'fp'), 'a')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_zero_size_disables_caching(self):
+        cache = PredictionCache(maxsize=0)
+        cache.put((1.0,), 'fp', 'a')
+        self.assertIsNone(cache.get((1.0,), 'fp'))
+
+
+class PredictOneCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.model = mock.Mock(fingerprint='fp1', version='v1')
+        self.results = [{'career': 'Engineer', 'probability': 50.0}]
+        patches = [
+            mock.patch.object(inference, 'get_model', return_value=self.model),
+            mock.patch.object(inference, 'prediction_cache', PredictionCache()),
+            mock.patch.object(inference.watcher, 'ensure_started'),
+            mock.patch.object(inference.batcher, 'predict', return_value=(self.results, self.model)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_second_call_is_served_from_the_cache(self):
+        first = inference.predict_one([7] * len(inference.FEATURES))
+        second = inference.predict_one([7.0] * len(inference.FEATURES))
+        self.assertEqual(first, second)
+        self.assertEqual(inference.batcher.predict.call_count, 1)
+
+    def test_callers_get_copies(self):
+        results, _ = inference.predict_one([7] * len(inference.FEATURES))
+        results[0]['career'] = 'changed'
+        again, _ = inference.predict_one([7] * len(inference.FEATURES))
+        self.assertEqual(again[0]['career'], 'Engineer')
+
+    def test_model_swap_invalidates(self):
+        inference.predict_one([7] * len(inference.FEATURES))
+        self.model.fingerprint = 'fp2'
+        inference.predict_one([7] * len(inference.FEATURES))
+        self.assertEqual(inference.batcher.predict.call_count, 2)
@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase
+
+from NovaX_webpage import inference
+from NovaX_webpage.question_flow import compile_flows, load_flows
+
+
+def question(field, step='personality'):
+    return {'field': field, 'step': step, 'label': field.title(), 'question': f"Rate your {field}?"}
+
+
+class BundledFlowTests(SimpleTestCase):
+
+    def test_every_flow_asks_each_model_feature_once(self):
+        for name, flow in load_flows().items():
+            with self.subTest(flow=name):
+                self.assertEqual(sorted(flow.fields), sorted(inference.FEATURES))
+
+    def test_transitions_walk_the_whole_flow(self):
+        flow = load_flows().get_flow()
+        field, asked = flow.first_field, [flow.first_field]
+        while flow.next(field) is not None:
+            field, step, text = flow.next(field)
+            self.assertEqual((step, text), (flow.steps[field], flow.questions[field]))
+            asked.append(field)
+        self.assertEqual(tuple(asked), flow.fields)
+
+    def test_unknown_names_get_the_default_flow(self):
+        flows = load_flows()
+        self.assertIs(flows.get_flow('no-such-flow'), flows[flows.default])
+        self.assertIs(flows.get_flow(None), flows[flows.default])
+
+
+class CompileFlowTests(SimpleTestCase):
+
+    def test_extends_reorders_and_overrides(self):
+        flows = compile_flows({'flows': {
+            'base': {'questions': [question('a'), question('b'), question('c')]},
+            'variant': {'extends': 'base', 'order': ['c', 'a', 'b'],
+                        'overrides': {'a': {'question': 'Reworded?'}}},
+        }})
+        variant = flows['variant']
+        self.assertEqual(variant.fields, ('c', 'a', 'b'))
+        self.assertEqual(variant.questions['a'], 'Reworded?')
+        self.assertEqual(variant.edit_questions['b'], 'Rate your b?')
+        self.assertEqual(variant.opening_question, 'Rate your c?')
+        self.assertIsNone(variant.next('b'))
+        self.assertEqual(flows.default, 'base')
+
+    def test_invalid_definitions(self):
+        invalid = {
+            'no flows': {'flows': {}},
+            'extends itself': {'flows': {'a': {'extends': 'a'}}},
+            'unknown base': {'flows': {'a': {'extends': 'missing'}}},
+            'duplicate field': {'flows': {'a': {'questions': [question('x'), question('x')]}}},
+            'missing question': {'flows': {'a': {'questions': [{'field': 'x', 'step': 's', 'label': 'X'}]}}},
+            'unknown override': {'flows': {'a': {'questions': [question('x')], 'overrides': {'y': {}}}}},
+            'unknown order': {'flows': {'a': {'questions': [question('x')], 'order': ['x', 'y']}}},
+            'unknown default': {'default': 'b', 'flows': {'a': {'questions': [question('x')]}}},
+        }
+        for case, data in invalid.items():
+            with self.subTest(case=case):
+                with self.assertRaises(ValueError):
+                    compile_flows(data)
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from NovaX_webpage import rollups
+from NovaX_webpage.models import (
+    CareerPredictionCount, CareerSurvey, FeatureHistogram, RollupWatermark, SurveyDailyCount,
+)
+
+
+def counseling(scores, careers=()):
+    return {
+        'counseling_data': scores,
+        'predictions': [{'career': career, 'probability': 0.5} for career in careers],
+    }
+
+
+SURVEYS = [
+    ('AI_Counseling', counseling({'logic': 7.5, 'coding': 3}, ['Architect', 'Nurse'])),
+    ('AI_Counseling', counseling({'logic': 7.5, 'coding': None}, ['Architect'])),
+    ('Aptitude test Q', {'q1': 'a'}),
+    # Malformed rows: each is counted as far as it makes sense, and never blocks the rest
+    ('AI_Counseling', {'counseling_data': ['logic', 9], 'predictions': {'career': 'Pilot'}}),
+    ('AI_Counseling', counseling({'logic': 'inf', 'coding': '1e9', 'memory': 'high', 'ok': '6'}, [None, 'Nurse'])),
+    ('Educational test Q', ['not', 'a', 'dict']),
+]
+
+
+def snapshot():
+    return (
+        set(SurveyDailyCount.objects.values_list('day', 'category', 'count')),
+        set(CareerPredictionCount.objects.values_list('career', 'rank', 'count')),
+        set(FeatureHistogram.objects.values_list('feature', 'bucket', 'count')),
+    )
+
+
+class RollupTests(TestCase):
+
+    def save(self, category, responses):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                survey = CareerSurvey.objects.create(category=category, responses=responses)
+                rollups.on_insert()
+        return survey
+
+    def test_incremental_rollups_match_a_full_recompute(self):
+        for category, responses in SURVEYS:
+            self.save(category, responses)
+        incremental = snapshot()
+
+        rollups.rebuild()
+        self.assertEqual(rollups.catch_up(batch_size=2), 2)
+        while rollups.catch_up(batch_size=2):
+            pass
+        self.assertEqual(snapshot(), incremental)
+
+        self.assertEqual(rollups.survey_counts(), {'AI_Counseling': 4, 'Aptitude test Q': 1, 'Educational test Q': 1})
+        self.assertEqual(rollups.career_distribution(rank=1), {'Architect': 2})
+        self.assertEqual(rollups.career_distribution(rank=2), {'Nurse': 2})
+        self.assertEqual(rollups.feature_histogram('logic'), {7.5: 2})
+        self.assertEqual(rollups.feature_histogram('coding'), {3.0: 1})
+        self.assertEqual(rollups.feature_histogram('ok'), {6.0: 1})
+        self.assertEqual(rollups.feature_histogram('memory'), {})
+
+    def test_rollup_failure_never_rolls_back_the_survey(self):
+        with mock.patch.object(rollups, 'catch_up', side_effect=RuntimeError('rollups down')):
+            survey = self.save('Aptitude test Q', {'q1': 'a'})
+        self.assertTrue(CareerSurvey.objects.filter(pk=survey.pk).exists())
+        self.assertFalse(SurveyDailyCount.objects.exists())
+
+        # The next insert catches up on the survey the failed one missed
+        self.save('Aptitude test Q', {'q1': 'b'})
+        self.assertEqual(rollups.survey_counts(), {'Aptitude test Q': 2})
+
+    def test_rollups_wait_for_the_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                CareerSurvey.objects.create(category='Aptitude test Q', responses={})
+                rollups.on_insert()
+            self.assertFalse(SurveyDailyCount.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+
+    def test_a_survey_that_fails_to_count_is_skipped(self):
+        bad = CareerSurvey.objects.create(category='AI_Counseling', responses=counseling({'logic': 4}))
+        CareerSurvey.objects.create(category='AI_Counseling', responses=counseling({'logic': 5}))
+        real_deltas = rollups._survey_deltas
+
+        def explode_on_bad(survey):
+            if survey.pk == bad.pk:
+                raise RuntimeError('corrupt row')
+            return real_deltas(survey)
+
+        with mock.patch.object(rollups, '_survey_deltas', side_effect=explode_on_bad):
+            self.assertEqual(rollups.catch_up(), 2)
+        self.assertEqual(RollupWatermark.objects.get(name=rollups.WATERMARK).last_id, CareerSurvey.objects.last().pk)
+        self.assertEqual(rollups.feature_histogram('logic'), {5.0: 1})
+
+    @override_settings(ROLLUPS_ON_INSERT=False)
+    def test_insert_path_can_be_turned_off(self):
+        self.save('Aptitude test Q', {})
+        self.assertFalse(SurveyDailyCount.objects.exists())
+        self.assertEqual(rollups.catch_up(), 1)
+
+    def test_score_bucket(self):
+        self.assertEqual(rollups.score_bucket(7.5), 75)
+        self.assertEqual(rollups.score_bucket('6'), 60)
+        self.assertEqual(rollups.score_bucket(1e9), 10 ** 10)
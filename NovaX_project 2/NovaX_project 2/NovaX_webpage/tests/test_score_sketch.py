@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from NovaX_webpage import rollups
+from NovaX_webpage.models import FeatureHistogram
+from NovaX_webpage.score_sketch import BINS, ScoreSketch
+
+
+def sketch_of(*scores):
+    sketch = ScoreSketch()
+    for score in scores:
+        sketch.add(score)
+    return sketch
+
+
+class ScoreSketchTests(SimpleTestCase):
+
+    def test_percentile_counts_ties_as_half(self):
+        sketch = sketch_of(5, 5, 7, 9)
+        self.assertEqual(sketch.percentile(5), 25.0)
+        self.assertEqual(sketch.percentile(7), 62.5)
+        self.assertEqual(sketch.percentile(8), 75.0)
+        self.assertEqual(sketch.percentile(9.5), 100.0)
+
+    def test_percentile_matches_a_brute_force_midrank(self):
+        scores = [1, 2.5, 2.5, 4, 6.5, 6.5, 6.5, 7, 8.5, 10]
+        sketch = sketch_of(*scores)
+        for score in (1, 2.5, 3, 6.5, 7, 9, 10):
+            below = sum(s < score for s in scores)
+            ties = sum(s == score for s in scores)
+            self.assertAlmostEqual(sketch.percentile(score), 100.0 * (below + ties / 2) / len(scores))
+
+    def test_out_of_range_scores_are_clamped(self):
+        sketch = sketch_of(-3, 0, 1, 10, 42)
+        self.assertEqual(sketch.counts[0], 3)
+        self.assertEqual(sketch.counts[-1], 2)
+        self.assertEqual(sketch.percentile(-100), sketch.percentile(1))
+        self.assertEqual(sketch.percentile(100), sketch.percentile(10))
+
+    def test_percentile_sees_later_adds(self):
+        sketch = sketch_of(5)
+        self.assertEqual(sketch.percentile(5), 50.0)
+        sketch.add(3, count=3)
+        self.assertEqual(sketch.percentile(5), 87.5)
+
+    def test_quantile(self):
+        sketch = sketch_of(5, 5, 7, 9)
+        self.assertEqual(sketch.quantile(0), 5.0)
+        self.assertEqual(sketch.quantile(0.5), 5.0)
+        self.assertEqual(sketch.quantile(0.75), 7.0)
+        self.assertEqual(sketch.quantile(1), 9.0)
+
+    def test_empty_sketch(self):
+        sketch = ScoreSketch()
+        self.assertEqual(sketch.total, 0)
+        self.assertIsNone(sketch.percentile(5))
+        self.assertIsNone(sketch.quantile(0.5))
+
+    def test_merge_adds_populations(self):
+        merged = sketch_of(5, 7).merge(sketch_of(7, 9))
+        self.assertEqual(merged.counts, sketch_of(5, 7, 7, 9).counts)
+        self.assertEqual(merged.percentile(7), 50.0)
+
+    def test_from_buckets_reads_tenths(self):
+        sketch = ScoreSketch.from_buckets({50: 2, 75: 1, 90: 1})
+        self.assertEqual(sketch.counts, sketch_of(5, 5, 7.5, 9).counts)
+
+    def test_bin_count_is_checked(self):
+        with self.assertRaises(ValueError):
+            ScoreSketch([0] * (BINS - 1))
+
+
+class PopulationPercentileTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(rollups._sketches, {'loaded_at': None, 'by_feature': {}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_percentiles_against_the_histogram_rollup(self):
+        FeatureHistogram.objects.bulk_create([
+            FeatureHistogram(feature='logic', bucket=50, count=10),
+            FeatureHistogram(feature='logic', bucket=80, count=10),
+            # Below PERCENTILE_MIN_POPULATION
+            FeatureHistogram(feature='coding', bucket=50, count=rollups.PERCENTILE_MIN_POPULATION - 1),
+        ])
+        percentiles = rollups.population_percentiles({'logic': 8, 'coding': 5, 'memory': 5, 'logic2': None})
+        self.assertEqual(percentiles, {'logic': 75.0})
+        self.assertEqual(rollups.population_percentiles({'logic': None}), {})
+
+    def test_sketches_are_reused_until_they_expire(self):
+        FeatureHistogram.objects.create(feature='logic', bucket=50, count=20)
+        self.assertEqual(rollups.feature_sketches()['logic'].total, 20)
+        FeatureHistogram.objects.filter(feature='logic').update(count=40)
+        with self.assertNumQueries(0):
+            self.assertEqual(rollups.feature_sketches()['logic'].total, 20)
+        self.assertEqual(rollups.feature_sketches(max_age=-1)['logic'].total, 40)
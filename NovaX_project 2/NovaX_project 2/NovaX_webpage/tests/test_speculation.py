@@ -0,0 +1,66 @@
+from django.test import SimpleTestCase, override_settings
+
+from NovaX_webpage.ai_counselor import EducationalCounselor
+from NovaX_webpage.llm_backends import FakeBackend
+from NovaX_webpage.speculation import score_bucket
+
+
+ANSWERED = {'C_score': 7.0, 'O_score': 6.0, 'E_score': 5.0}
+
+
+def speculative_counselor(**kwargs):
+    with override_settings(COUNSELOR_SPECULATIVE=True, **kwargs):
+        return EducationalCounselor(backend=FakeBackend(latency_ms=0, distribution='fixed'))
+
+
+def wait_for(counselor, session_key):
+    _, futures = counselor.speculator._entries[session_key]
+    for future in futures:
+        future.result(timeout=5)
+
+
+class ScoreBucketTests(SimpleTestCase):
+
+    def test_scores_map_to_low_moderate_and_high(self):
+        self.assertEqual([score_bucket(score) for score in (1, 3, 3.5, 7, 7.5, 10)], [0, 0, 1, 1, 2, 2])
+
+
+class SpeculatorTests(SimpleTestCase):
+
+    def test_prepared_turn_is_served_and_stores_the_answer(self):
+        counselor = speculative_counselor()
+        counselor.speculate('s1', 'A_score', 'personality', ANSWERED)
+        wait_for(counselor, 's1')
+        self.assertEqual(counselor.backend.stats()['calls'], 3)
+
+        collected = dict(ANSWERED)
+        response = counselor.process_answer('8', 'A_score', 'personality', collected, session_key='s1')
+        self.assertEqual(response['field'], 'N_score')
+        self.assertEqual(collected['A_score'], 8.0)
+        # Served from the prepared turns, without another LLM call
+        self.assertEqual(counselor.backend.stats()['calls'], 3)
+        self.assertEqual(counselor.speculator.stats()['served'], 1)
+        self.assertEqual(counselor.speculator.stats()['sessions'], 0)
+
+    def test_turn_prepared_for_another_state_is_not_served(self):
+        counselor = speculative_counselor()
+        counselor.speculate('s1', 'A_score', 'personality', ANSWERED)
+        wait_for(counselor, 's1')
+
+        changed = dict(ANSWERED, C_score=2.0)
+        counselor.process_answer('8', 'A_score', 'personality', changed, session_key='s1')
+        self.assertEqual(counselor.backend.stats()['calls'], 4)
+        self.assertEqual(counselor.speculator.stats()['missed'], 1)
+
+    def test_least_recently_active_sessions_are_evicted(self):
+        counselor = speculative_counselor(COUNSELOR_SPECULATIVE_MAX_SESSIONS=1)
+        counselor.speculate('s1', 'A_score', 'personality', ANSWERED)
+        counselor.speculate('s2', 'A_score', 'personality', ANSWERED)
+        stats = counselor.speculator.stats()
+        self.assertEqual((stats['sessions'], stats['scheduled'], stats['discarded']), (1, 6, 3))
+        self.assertIsNone(counselor.speculator.take('s1', '8', 'A_score', ANSWERED))
+
+    def test_nothing_is_prepared_while_editing(self):
+        counselor = speculative_counselor()
+        counselor.speculate('s1', 'A_score', 'editing', ANSWERED)
+        self.assertEqual(counselor.speculator.stats()['scheduled'], 0)
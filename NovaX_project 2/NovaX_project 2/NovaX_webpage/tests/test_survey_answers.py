@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from NovaX_webpage.models import CareerSurvey, SurveyAnswer
+from NovaX_webpage.survey_answers import extract_answers, store_answers
+
+
+class ExtractAnswersTests(SimpleTestCase):
+
+    def test_quiz_answers_are_typed(self):
+        rows = extract_answers({'q1': '7', 'q2': 'Yes', 'q3': True, 'q4': None, 'q5': [1, 2]})
+        self.assertEqual(rows, [
+            ('q1', 7.0, None), ('q2', None, 'Yes'), ('q3', None, 'true'),
+            ('q4', None, None), ('q5', None, '[1, 2]'),
+        ])
+
+    def test_huge_integers_are_kept_as_text(self):
+        huge = 10 ** 400
+        rows = extract_answers({'q1': huge, 'q2': -huge})
+        self.assertEqual(rows[0][:2], ('q1', None))
+        self.assertTrue(rows[0][2].startswith('1000'))
+        self.assertEqual(rows[1][:2], ('q2', None))
+
+    def test_non_finite_floats_are_kept_as_text(self):
+        self.assertEqual(extract_answers({'q': float('nan')}), [('q', None, 'nan')])
+        self.assertEqual(extract_answers({'q': '1e999'}), [('q', None, '1e999')])
+
+    def test_counseling_survey(self):
+        rows = extract_answers({
+            'counseling_data': {'Logical quotient rating': 7.5, 'coding skills rating': None},
+            'predictions': [{'career': 'Architect', 'probability': 0.8}, 'junk', {'career': 'Nurse'}],
+        })
+        self.assertEqual(rows, [
+            ('Logical quotient rating', 7.5, None),
+            ('coding skills rating', None, None),
+            ('prediction_1', 0.8, 'Architect'),
+            ('prediction_3', None, 'Nurse'),
+        ])
+
+    def test_malformed_counseling_containers_are_skipped(self):
+        for responses in (
+            {'counseling_data': ['not', 'a', 'dict'], 'predictions': {'career': 'x'}},
+            {'counseling_data': 'text', 'predictions': 'text'},
+            {'counseling_data': None, 'predictions': None},
+        ):
+            self.assertEqual(extract_answers(responses), [])
+
+    def test_untyped_scores_are_skipped(self):
+        rows = extract_answers({'counseling_data': {'a': {'nested': 1}, 'b': [1], 'c': 10 ** 400, 7: 3}})
+        self.assertEqual([row[0] for row in rows], ['c', '7'])
+        self.assertEqual(rows[1], ('7', 3.0, None))
+
+    def test_non_dict_responses(self):
+        self.assertEqual(extract_answers(['a']), [])
+        self.assertEqual(extract_answers(None), [])
+
+
+class StoreAnswersTests(TestCase):
+
+    def test_answer_failure_never_rolls_back_the_survey(self):
+        with mock.patch.object(SurveyAnswer.objects, 'bulk_create', side_effect=ValueError('bad answer')):
+            with transaction.atomic():
+                survey = CareerSurvey.objects.create(category='Aptitude test Q', responses={'q1': 'a'})
+                self.assertEqual(store_answers([survey]), [])
+        self.assertTrue(CareerSurvey.objects.filter(pk=survey.pk).exists())
+        self.assertFalse(SurveyAnswer.objects.exists())
+
+    def test_huge_integer_survey_is_stored(self):
+        survey = CareerSurvey.objects.create(category='Aptitude test Q', responses={'q1': 10 ** 400, 'q2': '5'})
+        store_answers([survey])
+        answers = dict(SurveyAnswer.objects.values_list('feature', 'value'))
+        self.assertEqual(answers, {'q1': None, 'q2': 5.0})
@@ -0,0 +1,137 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from NovaX_webpage import survey_ingest, warmup
+from NovaX_webpage.models import CareerSurvey
+from NovaX_webpage.survey_ingest import DEAD_LETTER_NAME, SurveyBuffer
+
+# No process has this pid, so its segments count as orphaned
+DEAD_PID = 2 ** 22 + 1
+
+
+def reject_poison(surveys, *args, **kwargs):
+    for survey in surveys:
+        if 'poison' in survey.responses:
+            raise ValueError('unstorable answer')
+    return []
+
+
+class SurveyBufferTests(TestCase):
+
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool, True)
+        self.buffer = SurveyBuffer(self.spool, fsync=False)
+        # No writer thread: the test writes with flush() and recover()
+        self.buffer._ensure_worker = self.buffer._init_process
+        self.buffer._init_process()
+        self.addCleanup(os.close, self.buffer._owner_lock)
+
+    def orphan_segment(self, rows, pid=DEAD_PID):
+        path = os.path.join(self.spool, f"surveys-{pid}-dead0000-0.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for responses in rows:
+                f.write(json.dumps({'category': 'quiz', 'responses': responses}) + '\n')
+            f.write('{"category": "quiz", "respo')   # torn last line
+        return path
+
+    def segments(self):
+        return glob.glob(os.path.join(self.spool, '*surveys-*.jsonl'))
+
+    def test_flush_writes_accepted_surveys(self):
+        for i in range(3):
+            self.buffer.submit('quiz', {'Q1': i})
+        self.buffer.flush()
+        self.assertEqual(CareerSurvey.objects.count(), 3)
+        self.assertEqual(self.segments(), [])
+        self.assertEqual(self.buffer.stats()['written'], 3)
+
+    def test_recovery_moves_a_poison_row_aside(self):
+        self.orphan_segment([{'Q1': 1}, {'poison': 1}, {'Q1': 3}])
+        with mock.patch.object(survey_ingest, 'store_answers', side_effect=reject_poison):
+            self.buffer.recover()
+
+        self.assertEqual(sorted(s.responses['Q1'] for s in CareerSurvey.objects.all()), [1, 3])
+        self.assertEqual(self.segments(), [])
+        with open(os.path.join(self.spool, DEAD_LETTER_NAME)) as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual([d['responses'] for d in dead], [{'poison': 1}])
+        self.assertIn('unstorable answer', dead[0]['error'])
+        stats = self.buffer.stats()
+        self.assertEqual((stats['written'], stats['retrying'], stats['dead_lettered']), (2, 0, 1))
+
+    def test_unavailable_database_keeps_the_segment_for_a_retry(self):
+        self.orphan_segment([{'Q1': 1}, {'Q1': 2}])
+        with mock.patch.object(CareerSurvey.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            self.buffer.recover()
+        self.assertEqual(self.buffer.stats()['retrying'], 2)
+        self.assertEqual(len(self.segments()), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.spool, DEAD_LETTER_NAME)))
+
+        self.buffer.flush()
+        self.assertEqual(CareerSurvey.objects.count(), 2)
+        self.assertEqual(self.segments(), [])
+        self.assertEqual(self.buffer.stats()['retrying'], 0)
+
+    def test_segments_of_live_processes_are_left_alone(self):
+        path = self.orphan_segment([{'Q1': 1}], pid=os.getppid())
+        # The owner holds its lock file for as long as it runs
+        lock = survey_ingest._hold_lock(os.path.join(self.spool, f"owner-{os.getppid()}-dead0000.lock"))
+        self.addCleanup(os.close, lock)
+        self.assertEqual(self.buffer.recover(), 0)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(CareerSurvey.objects.count(), 0)
+
+    def test_reused_pid_does_not_keep_a_dead_owners_segments(self):
+        # os.getppid() is alive, but it isn't the process that wrote the segment
+        self.orphan_segment([{'Q1': 1}], pid=os.getppid())
+        open(os.path.join(self.spool, f"owner-{os.getppid()}-dead0000.lock"), 'w').close()
+        self.assertEqual(self.buffer.recover(), 1)
+        self.assertEqual(self.segments(), [])
+        locks = [os.path.basename(p) for p in glob.glob(os.path.join(self.spool, 'owner-*.lock'))]
+        self.assertEqual(locks, [f"owner-{os.getpid()}-{self.buffer._token}.lock"])
+
+    def test_without_flock_a_live_pid_keeps_its_segments(self):
+        path = self.orphan_segment([{'Q1': 1}], pid=os.getppid())
+        with mock.patch.object(survey_ingest, 'fcntl', None):
+            self.assertEqual(self.buffer.recover(), 0)
+        self.assertTrue(os.path.exists(path))
+
+    def test_fsync_runs_outside_the_lock(self):
+        self.buffer.fsync = True
+        lock_taken = []
+
+        def take_lock():
+            lock_taken.append(self.buffer._cond.acquire(timeout=1))
+            if lock_taken[-1]:
+                self.buffer._cond.release()
+
+        def fsync(fd):
+            # Another request can spool its survey while this one waits for the disk
+            other = threading.Thread(target=take_lock)
+            other.start()
+            other.join()
+
+        with mock.patch.object(survey_ingest.os, 'fsync', side_effect=fsync) as synced:
+            self.buffer.submit('quiz', {'Q1': 1})
+        synced.assert_called_once()
+        self.assertEqual(lock_taken, [True])
+        self.buffer.flush()
+        self.assertEqual(CareerSurvey.objects.count(), 1)
+
+
+class StartupTests(TestCase):
+
+    @override_settings(SURVEY_INGEST_BUFFERED=True)
+    def test_warmup_starts_the_writer(self):
+        with mock.patch.object(survey_ingest.survey_buffer, 'start') as start:
+            warmup.warm_survey_ingest()
+        start.assert_called_once_with()
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from NovaX_webpage.turn_cache import TurnCache
+
+
+TURN = {'message': 'Thanks!', 'next_question': 'Next?'}
+
+
+class TurnCacheKeyTests(SimpleTestCase):
+
+    def test_equivalent_answers_and_scores_share_a_key(self):
+        make_key = TurnCache.make_key
+        self.assertEqual(make_key(' 7 ', 'O_score', {'C_score': 8.0}), make_key('7.0', 'O_score', {'C_score': '8'}))
+        self.assertEqual(make_key('Yes  PLEASE', 'f', {}), make_key('yes please', 'f', {}))
+        self.assertNotEqual(make_key('7', 'O_score', {}), make_key('7', 'C_score', {}))
+
+
+class TurnCacheTests(SimpleTestCase):
+
+    def test_turns_expire(self):
+        cache = TurnCache(ttl=0.01)
+        cache.put('k', TURN)
+        self.assertEqual(cache.get('k'), TURN)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('k'))
+        self.assertEqual(cache.stats()['expired'], 1)
+
+    def test_concurrent_threads_compute_once(self):
+        cache = TurnCache()
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return TURN
+
+        results = []
+        owner = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+        owner.start()
+        started.wait(5)
+        results.append(cache.get_or_compute('k', compute))
+        owner.join(5)
+        self.assertEqual(results, [TURN, TURN])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['merged'], 1)
+
+    def test_failures_reach_waiters_but_are_not_cached(self):
+        cache = TurnCache()
+
+        def compute():
+            raise RuntimeError('LLM down')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute('k', compute)
+        self.assertIsNone(cache.get('k'))
+        self.assertEqual(cache.stats()['inflight'], 0)
+
+
+class AsyncTurnCacheTests(SimpleTestCase):
+
+    def test_concurrent_coroutines_compute_once(self):
+        cache = TurnCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return TURN
+
+        async def main():
+            return await asyncio.gather(*(cache.get_or_compute_async('k', compute) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(main()), [TURN] * 3)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['merged'], 2)
+
+    def test_cancelled_owner_times_out_its_waiters(self):
+        cache = TurnCache()
+
+        async def compute():
+            await asyncio.sleep(10)
+            return TURN
+
+        async def main():
+            owner = asyncio.ensure_future(asyncio.wait_for(cache.get_or_compute_async('k', compute), 0.05))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(cache.get_or_compute_async('k', compute))
+            return await asyncio.gather(owner, waiter, return_exceptions=True)
+
+        owner_result, waiter_result = asyncio.run(main())
+        self.assertIsInstance(owner_result, asyncio.TimeoutError)
+        # An Exception, so `except Exception` fallbacks catch it
+        self.assertIsInstance(waiter_result, Exception)
+        self.assertIsInstance(waiter_result, asyncio.TimeoutError)
+        self.assertEqual(cache.stats()['inflight'], 0)
+
+    def test_waiter_deadline_does_not_cancel_the_owner(self):
+        cache = TurnCache()
+
+        async def compute():
+            await asyncio.sleep(0.1)
+            return TURN
+
+        async def main():
+            owner = asyncio.ensure_future(cache.get_or_compute_async('k', compute))
+            await asyncio.sleep(0)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(cache.get_or_compute_async('k', compute), 0.01)
+            return await owner
+
+        self.assertEqual(asyncio.run(main()), TURN)
+        self.assertEqual(cache.get('k'), TURN)
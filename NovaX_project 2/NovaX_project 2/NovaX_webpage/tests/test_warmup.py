@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from NovaX_webpage import inference, warmup
+
+
+def warm_state(**overrides):
+    state = {'status': 'done', 'started_at': 0, 'duration_ms': 1.0, 'steps_ms': {}, 'errors': {}}
+    state.update(overrides)
+    return state
+
+
+class ReadinessTests(SimpleTestCase):
+
+    def setUp(self):
+        model = mock.Mock(version='v1', source='/models')
+        for patcher in (mock.patch.object(inference, 'MODEL', model),
+                        mock.patch.object(warmup, 'start_background_warmup')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def probe(self, state):
+        with mock.patch.dict(warmup.STATE, state):
+            return self.client.get(reverse('readiness'))
+
+    def test_ready_once_warm_with_a_model(self):
+        response = self.probe(warm_state())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['model']['version'], 'v1')
+
+    def test_not_ready_while_warming_up(self):
+        self.assertEqual(self.probe(warm_state(status='running')).status_code, 503)
+
+    def test_not_ready_after_a_failed_step(self):
+        response = self.probe(warm_state(errors={'templates': 'broken.html: syntax error'}))
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['ready'])
+
+    def test_not_ready_without_a_model(self):
+        with mock.patch.object(inference, 'MODEL', None):
+            response = self.probe(warm_state())
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['model']['loaded'])
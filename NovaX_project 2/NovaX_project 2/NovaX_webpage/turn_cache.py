@@ -0,0 +1,161 @@
+# turn_cache.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TurnCache:
+    """TTL + LRU cache of generated counselor turns with single-flight for in-flight prompts"""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()    # key -> (expires_at, turn)
+        self._inflight = {}              # key -> Future shared by every waiter
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def make_key(user_input, current_field, collected_data):
+        """Canonical state: sorted scores as ints, field, and the trimmed lower-case answer"""
+        answer = ' '.join(str(user_input).split()).lower()
+        try:
+            # "7", " 7 " and "7.0" all produce the same prompt context
+            value = float(answer)
+            if value.is_integer():
+                answer = str(int(value))
+        except ValueError:
+            pass
+        scores = []
+        for field, value in sorted(collected_data.items()):
+            try:
+                value = float(value)
+                value = int(value) if value.is_integer() else round(value, 3)
+            except (TypeError, ValueError):
+                value = str(value)
+            scores.append((field, value))
+        return (current_field, answer, tuple(scores))
+
+    def get(self, key):
+        """Cached turn for key, or None"""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key, turn):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._store(key, turn)
+
+    def get_or_compute(self, key, compute):
+        """Cached turn, or compute() once no matter how many threads ask for key at the same time"""
+        future, owner = self._claim(key)
+        if not owner:
+            return dict(future.result())
+        return dict(self._resolve(key, future, compute))
+
+    async def get_or_compute_async(self, key, compute):
+        """Async get_or_compute; compute is a coroutine function, waiters share the same Future"""
+        future, owner = self._claim(key)
+        if not owner:
+            # Shielded, so a waiter hitting its own deadline doesn't cancel the shared Future
+            return dict(await asyncio.shield(asyncio.wrap_future(future)))
+        try:
+            turn = await compute()
+        except asyncio.CancelledError:
+            # The owner's deadline passed: waiters get a timeout, an ordinary Exception they
+            # already fall back on, rather than a CancelledError that escapes `except Exception`
+            self._finish(key, future, error=asyncio.TimeoutError('Merged LLM turn was cancelled'))
+            raise
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, turn=turn)
+        return dict(turn)
+
+    def _claim(self, key):
+        # Returns (future, owner); owner is True when the caller must produce the turn
+        with self._lock:
+            turn = self._lookup(key)
+            if turn is not None:
+                future = Future()
+                future.set_result(turn)
+                return future, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self.merged += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _resolve(self, key, future, compute):
+        try:
+            turn = compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, turn=turn)
+        return turn
+
+    def _finish(self, key, future, turn=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Failures reach every waiter but are never cached
+            if error is None and self.maxsize > 0 and self.ttl > 0:
+                self._store(key, turn)
+        if future.cancelled():
+            return
+        if error is None:
+            future.set_result(turn)
+        else:
+            future.set_exception(error)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, turn = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return turn
+
+    def _store(self, key, turn):
+        self._entries[key] = (time.monotonic() + self.ttl, turn)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss/merge counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'merged': self.merged,
+                'evictions': self.evictions,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'inflight': len(self._inflight),
+                'maxsize': self.maxsize,
+            }
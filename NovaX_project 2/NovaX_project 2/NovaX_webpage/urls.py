@@ -18,11 +18,15 @@ urlpatterns = [
       
      # AI Counseling URLs
     path('predict-career/', views.predict_career, name='predict_career'),
+    path('predict-career/batch/', views.predict_career_batch, name='predict_career_batch'),
     path('career-counseling/', views.career_counseling, name='career_counseling'),
     path('start-counseling/', views.start_counseling, name='start_counseling'),
     path('process-answer/', views.process_counseling_answer, name='process_answer'),
+    path('process-answer/async/', views.process_counseling_answer_async, name='process_answer_async'),
+    path('process-answer/stream/', views.process_counseling_answer_stream, name='process_answer_stream'),
     path('download-report/', views.download_career_report, name='download_report'),
     path('conversation-history/', views.get_conversation_history, name='conversation_history'),
+    path('ready/', views.readiness, name='readiness'),
 
     path('architecture_path/', views.architecture_path, name='architecture_path'),
     path('institution_detail/', views.institution_detail, name='institution_detail'),
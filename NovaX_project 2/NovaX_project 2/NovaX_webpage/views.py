@@ -1,15 +1,18 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseNotAllowed
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 import json
-import os
-import pickle
-import numpy as np
-import google.generativeai as genai
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from .ai_counselor import counselor
+from django.db import transaction
+from .ai_counselor import get_counselor
+from .conversation_log import ConversationLog
+from .counseling_state import history_from_client, new_state, pack_state, unpack_state
 from .models import CareerSurvey 
+from . import rollups
+from .survey_answers import store_answers
+from .survey_ingest import survey_buffer
 
 
 # ====================================================
@@ -19,25 +22,72 @@ from .models import CareerSurvey
 # ... your existing imports and model loading code ...
 # Add these imports at the top
 from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
 from io import BytesIO
 import base64
 from datetime import datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """Sample stylesheet plus the report's title, heading and body styles"""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#0c4a6e'),
+        spaceAfter=30,
+        alignment=1  # Center aligned
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#0369a1'),
+        spaceAfter=12,
+        spaceBefore=20
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#334155'),
+        spaceAfter=12
+    )
+    return styles, title_style, heading_style, normal_style
+
 
 # Add this function to your views.py
 @csrf_exempt
 @require_POST
 def download_career_report(request):
     """Generate and download a PDF career report"""
+    # ReportLab is heavy, import it only when a report is actually requested
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+
     try:
         data = json.loads(request.body.decode('utf-8'))
         predictions = data.get('predictions', [])
-        counseling_data = request.session.get('counseling_data', {})
-        conversation_history = request.session.get('conversation_history', [])
+        state = _load_counseling_state(request, data)
+        counseling_data = state['counseling_data']
+        conversation_history = state['conversation_history'].messages
+        
+        # Rank every score against all students assessed so far (precomputed sketches)
+        try:
+            percentiles = rollups.population_percentiles(counseling_data)
+        except Exception as e:
+            print(f"Population percentiles unavailable: {e}")
+            percentiles = {}
         
         # Create PDF in memory
         buffer = BytesIO()
@@ -45,33 +95,8 @@ def download_career_report(request):
                               topMargin=0.5*inch, bottomMargin=0.5*inch,
                               leftMargin=0.5*inch, rightMargin=0.5*inch)
         
-        # Create styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#0c4a6e'),
-            spaceAfter=30,
-            alignment=1  # Center aligned
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#0369a1'),
-            spaceAfter=12,
-            spaceBefore=20
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#334155'),
-            spaceAfter=12
-        )
+        # Styles are built once per process (and primed by the worker warm-up)
+        styles, title_style, heading_style, normal_style = get_report_styles()
         
         # Build the story (content)
         story = []
@@ -153,15 +178,15 @@ def download_career_report(request):
         
         # Personality Insights
         personality_data = [
-            ['Trait', 'Score', 'Interpretation'],
-            ['Organization (C)', counseling_data.get('C_score', 'N/A'), get_interpretation('C_score', counseling_data.get('C_score'))],
-            ['Openness (O)', counseling_data.get('O_score', 'N/A'), get_interpretation('O_score', counseling_data.get('O_score'))],
-            ['Extraversion (E)', counseling_data.get('E_score', 'N/A'), get_interpretation('E_score', counseling_data.get('E_score'))],
-            ['Agreeableness (A)', counseling_data.get('A_score', 'N/A'), get_interpretation('A_score', counseling_data.get('A_score'))],
-            ['Neuroticism (N)', counseling_data.get('N_score', 'N/A'), get_interpretation('N_score', counseling_data.get('N_score'))]
+            ['Trait', 'Score', 'Percentile', 'Interpretation'],
+            ['Organization (C)', counseling_data.get('C_score', 'N/A'), format_percentile(percentiles.get('C_score')), get_interpretation('C_score', counseling_data.get('C_score'))],
+            ['Openness (O)', counseling_data.get('O_score', 'N/A'), format_percentile(percentiles.get('O_score')), get_interpretation('O_score', counseling_data.get('O_score'))],
+            ['Extraversion (E)', counseling_data.get('E_score', 'N/A'), format_percentile(percentiles.get('E_score')), get_interpretation('E_score', counseling_data.get('E_score'))],
+            ['Agreeableness (A)', counseling_data.get('A_score', 'N/A'), format_percentile(percentiles.get('A_score')), get_interpretation('A_score', counseling_data.get('A_score'))],
+            ['Neuroticism (N)', counseling_data.get('N_score', 'N/A'), format_percentile(percentiles.get('N_score')), get_interpretation('N_score', counseling_data.get('N_score'))]
         ]
         
-        personality_table = Table(personality_data, colWidths=[1.5*inch, 0.7*inch, 3.8*inch])
+        personality_table = Table(personality_data, colWidths=[1.5*inch, 0.7*inch, 0.8*inch, 3.0*inch])
         personality_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0369a1')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
@@ -181,15 +206,15 @@ def download_career_report(request):
         story.append(Paragraph("Aptitude Assessment", ParagraphStyle('SubHeading', parent=heading_style, fontSize=14)))
         
         aptitude_data = [
-            ['Aptitude', 'Score', 'Level'],
-            ['Numerical Reasoning', counseling_data.get('Numerical_Aptitude', 'N/A'), get_level(counseling_data.get('Numerical_Aptitude'))],
-            ['Verbal Ability', counseling_data.get('Verbal_Aptitude', 'N/A'), get_level(counseling_data.get('Verbal_Aptitude'))],
-            ['Abstract Thinking', counseling_data.get('Abstract_Reasoning', 'N/A'), get_level(counseling_data.get('Abstract_Reasoning'))],
-            ['Logical Reasoning', counseling_data.get('Logical_Reasoning', 'N/A'), get_level(counseling_data.get('Logical_Reasoning'))],
-            ['Spatial Awareness', counseling_data.get('Spatial_Aptitude', 'N/A'), get_level(counseling_data.get('Spatial_Aptitude'))]
+            ['Aptitude', 'Score', 'Level', 'Percentile'],
+            ['Numerical Reasoning', counseling_data.get('Numerical_Aptitude', 'N/A'), get_level(counseling_data.get('Numerical_Aptitude')), format_percentile(percentiles.get('Numerical_Aptitude'))],
+            ['Verbal Ability', counseling_data.get('Verbal_Aptitude', 'N/A'), get_level(counseling_data.get('Verbal_Aptitude')), format_percentile(percentiles.get('Verbal_Aptitude'))],
+            ['Abstract Thinking', counseling_data.get('Abstract_Reasoning', 'N/A'), get_level(counseling_data.get('Abstract_Reasoning')), format_percentile(percentiles.get('Abstract_Reasoning'))],
+            ['Logical Reasoning', counseling_data.get('Logical_Reasoning', 'N/A'), get_level(counseling_data.get('Logical_Reasoning')), format_percentile(percentiles.get('Logical_Reasoning'))],
+            ['Spatial Awareness', counseling_data.get('Spatial_Aptitude', 'N/A'), get_level(counseling_data.get('Spatial_Aptitude')), format_percentile(percentiles.get('Spatial_Aptitude'))]
         ]
         
-        aptitude_table = Table(aptitude_data, colWidths=[1.8*inch, 0.7*inch, 1.5*inch])
+        aptitude_table = Table(aptitude_data, colWidths=[1.8*inch, 0.7*inch, 1.5*inch, 0.8*inch])
         aptitude_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0284c7')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
@@ -214,6 +239,33 @@ def download_career_report(request):
         """
         story.append(Paragraph(preference_text, normal_style))
         
+        work_style_data = [
+            ['Preference', 'Score', 'Percentile'],
+            ['Teamwork', counseling_data.get('Enjoy_Teamwork', 'N/A'), format_percentile(percentiles.get('Enjoy_Teamwork'))],
+            ['Creative Thinking', counseling_data.get('Creative_Thinking', 'N/A'), format_percentile(percentiles.get('Creative_Thinking'))],
+            ['Attention to Detail', counseling_data.get('Attention_to_Detail', 'N/A'), format_percentile(percentiles.get('Attention_to_Detail'))]
+        ]
+        
+        work_style_table = Table(work_style_data, colWidths=[1.8*inch, 0.7*inch, 0.8*inch])
+        work_style_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0284c7')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0f9ff')),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bae6fd'))
+        ]))
+        
+        story.append(work_style_table)
+        story.append(Spacer(1, 10))
+        story.append(Paragraph(
+            "Percentiles compare your scores with every student who has taken this assessment.",
+            ParagraphStyle('Note', parent=styles['Italic'], fontSize=8, textColor=colors.gray)
+        ))
+        
         # Next Steps
         story.append(Paragraph("Recommended Next Steps", heading_style))
         next_steps = """
@@ -295,6 +347,14 @@ def get_interpretation(trait, score):
         
     return interpretations.get(trait, {}).get(level, "Average")
 
+def format_percentile(percentile):
+    """72.4 -> '72nd'; N/A when there is no population to compare against"""
+    if percentile is None:
+        return 'N/A'
+    rank = min(max(int(round(percentile)), 1), 99)
+    suffix = 'th' if 10 <= rank % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(rank % 10, 'th')
+    return f"{rank}{suffix}"
+
 def get_level(score):
     """Get proficiency level for aptitudes"""
     if score is None:
@@ -351,178 +411,313 @@ def get_environment_preference(counseling_data):
         return "stable and predictable settings"
     
     
+def _stateless_sessions():
+    return getattr(settings, 'COUNSELOR_STATELESS_SESSIONS', False)
+
+def _load_counseling_state(request, data):
+    """Counseling state from the signed token and the transcript in the request body
+    (stateless mode) or from the session"""
+    if _stateless_sessions():
+        state = unpack_state(data.get('state'), max_age=getattr(settings, 'COUNSELOR_STATE_MAX_AGE', 86400))
+        state['conversation_history'] = history_from_client(data.get('history'), data.get('history_archive'))
+        return state
+    return {
+        'id': request.session.session_key,
+        'flow': request.session.get('counseling_flow'),
+        'current_field': request.session.get('current_field'),
+        'conversation_step': request.session.get('conversation_step', 'personality'),
+        'counseling_data': request.session.get('counseling_data', {}),
+        'conversation_history': ConversationLog(
+            request.session.get('conversation_history'), request.session.get('conversation_seq'),
+            archive=request.session.get('conversation_archive'),
+        ),
+    }
+
+def _store_counseling_state(request, state, response_data):
+    """Keep the state for the next turn: a new token in the reply (stateless mode) or the session"""
+    if _stateless_sessions():
+        # Nothing is written server-side; the client sends the token and the transcript
+        # back with its next answer, so the saved survey has the same history either way
+        response_data['state'] = pack_state(state)
+        response_data['history'] = state['conversation_history'].messages
+        if state['conversation_history'].archive:
+            # Compacted messages, sent back so the saved survey keeps the whole conversation
+            response_data['history_archive'] = state['conversation_history'].archive
+        return
+    request.session['counseling_flow'] = state['flow']
+    request.session['counseling_data'] = state['counseling_data']
+    request.session['current_field'] = state['current_field']
+    request.session['conversation_step'] = state['conversation_step']
+    request.session['conversation_history'] = state['conversation_history'].messages
+    request.session['conversation_seq'] = state['conversation_history'].last_seq
+    # Compacted messages stay server-side until the finished session is saved
+    request.session['conversation_archive'] = state['conversation_history'].archive
+    request.session.modified = True
+    # Cursor for fetching only newer messages from /conversation-history/?after=
+    response_data['last_seq'] = state['conversation_history'].last_seq
+
 @csrf_exempt
 @require_POST
 def start_counseling(request):
     """Start a new counseling session"""
     try:
+        # Optional {"flow": "cse"}; unknown or missing names use the default flow
+        data = json.loads(request.body.decode('utf-8') or '{}')
+        counselor = get_counselor(data.get('flow'))
         initial_data = counselor.get_initial_greeting()
         
         # Initialize session
-        request.session['counseling_data'] = {}
-        request.session['conversation_history'] = []
-        request.session['current_field'] = initial_data['field']
-        request.session['conversation_step'] = initial_data['conversation_step']
+        state = new_state(counselor.flow.name, initial_data['field'], initial_data['conversation_step'])
         
         # Log first message
-        request.session['conversation_history'].append({
-            'type': 'bot',
-            'message': initial_data['message']
-        })
-        request.session['conversation_history'].append({
-            'type': 'bot',
-            'message': initial_data['next_question']
-        })
-        
-        return JsonResponse({
+        state['conversation_history'].append('bot', initial_data['message'])
+        state['conversation_history'].append('bot', initial_data['next_question'])
+        
+        response_data = {
             'success': True,
             'message': initial_data['message'],
             'next_question': initial_data['next_question'],
             'field': initial_data['field'],
-            'conversation_step': initial_data['conversation_step']
-        })
+            'conversation_step': initial_data['conversation_step'],
+            'flow': counselor.flow.name
+        }
+        _store_counseling_state(request, state, response_data)
+        return JsonResponse(response_data)
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
+
+def _begin_counseling_turn(request, data):
+    """Load the counseling state and log the user's message"""
+    state = _load_counseling_state(request, data)
+    user_answer = data.get('answer')
+    
+    # Only log if it's not a simple edit command we're handling
+    if not (user_answer.lower() in ['edit', 'change', 'back'] and state['conversation_step'] != 'editing'):
+        state['conversation_history'].append('user', user_answer)
+    return state
+
+def _finish_counseling_turn(request, state, counselor_response):
+    """Store the counselor's reply in the counseling state and build the JSON payload"""
+    counseling_data = state['counseling_data']
+    
+    # Prepare the likely next turn while the student reads this question
+    if not counselor_response.get('completed'):
+        get_counselor(state['flow']).speculate(
+            state['id'], counselor_response.get('field'),
+            counselor_response.get('conversation_step') or '', counseling_data
+        )
+    
+    state['current_field'] = counselor_response.get('field')
+    state['conversation_step'] = counselor_response.get('conversation_step')
+    
+    # Log bot responses
+    if counselor_response.get('message'):
+        state['conversation_history'].append('bot', counselor_response['message'])
+    if counselor_response.get('next_question'):
+        state['conversation_history'].append('bot', counselor_response['next_question'])
+    
+    response_data = {
+        'success': True,
+        'message': counselor_response.get('message', ''),
+        'next_question': counselor_response.get('next_question'),
+        'field': counselor_response.get('field'),
+        'conversation_step': counselor_response.get('conversation_step'),
+        'completed': counselor_response.get('completed', False),
+        'show_edit_option': counselor_response.get('show_edit_option', True),
+        'collected_data': counseling_data
+    }
+    
+    # Add edit options if in edit mode
+    if counselor_response.get('edit_options'):
+        response_data['edit_options'] = counselor_response['edit_options']
+    
+    # If counseling is completed, make prediction
+    if counselor_response.get('completed'):
+        predictions, model_version = generate_career_predictions(counseling_data)
+        response_data['predictions'] = predictions
+        response_data['model_version'] = model_version
+        
+        # Save the session data
+        save_counseling_session(counseling_data, predictions, state['conversation_history'].full_history())
+    
+    _store_counseling_state(request, state, response_data)
+    return response_data
+
 @csrf_exempt
 @require_POST
 def process_counseling_answer(request):
     """Process user's answer during counseling session"""
     try:
         data = json.loads(request.body.decode('utf-8'))
-        user_answer = data.get('answer')
-        current_field = request.session.get('current_field')
-        counseling_data = request.session.get('counseling_data', {})
-        conversation_step = request.session.get('conversation_step', 'personality')
-        
-        # Log user message
-        conversation_history = request.session.get('conversation_history', [])
-        
-        # Only log if it's not a simple edit command we're handling
-        if not (user_answer.lower() in ['edit', 'change', 'back'] and conversation_step != 'editing'):
-            conversation_history.append({
-                'type': 'user',
-                'message': user_answer
-            })
+        state = _begin_counseling_turn(request, data)
         
         # Get next question from counselor
-        counselor_response = counselor.process_answer(
-            user_answer, current_field, conversation_step, counseling_data
+        counselor_response = get_counselor(state['flow']).process_answer(
+            data.get('answer'), state['current_field'], state['conversation_step'], state['counseling_data'],
+            session_key=state['id']
         )
         
-        # Update session data
-        request.session['counseling_data'] = counseling_data
-        request.session['current_field'] = counselor_response.get('field')
-        request.session['conversation_step'] = counselor_response.get('conversation_step')
-        
-        # Log bot responses
-        if counselor_response.get('message'):
-            conversation_history.append({
-                'type': 'bot', 
-                'message': counselor_response['message']
-            })
-        if counselor_response.get('next_question'):
-            conversation_history.append({
-                'type': 'bot',
-                'message': counselor_response['next_question']
-            })
-        
-        request.session['conversation_history'] = conversation_history
-        request.session.modified = True
+        return JsonResponse(_finish_counseling_turn(request, state, counselor_response))
         
-        response_data = {
-            'success': True,
-            'message': counselor_response.get('message', ''),
-            'next_question': counselor_response.get('next_question'),
-            'field': counselor_response.get('field'),
-            'conversation_step': counselor_response.get('conversation_step'),
-            'completed': counselor_response.get('completed', False),
-            'show_edit_option': counselor_response.get('show_edit_option', True),
-            'collected_data': counseling_data
-        }
-        
-        # Add edit options if in edit mode
-        if counselor_response.get('edit_options'):
-            response_data['edit_options'] = counselor_response['edit_options']
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+async def process_counseling_answer_async(request):
+    """Async process_counseling_answer: the worker is free while Gemini answers, and a slow
+    answer is cut off after COUNSELOR_LLM_TIMEOUT seconds with the rule-based question"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        state = await sync_to_async(_begin_counseling_turn)(request, data)
         
-        # If counseling is completed, make prediction
-        if counselor_response.get('completed'):
-            predictions = generate_career_predictions(counseling_data)
-            response_data['predictions'] = predictions
-            
-            # Save the session data
-            save_counseling_session(request, counseling_data, predictions)
+        counselor_response = await get_counselor(state['flow']).process_answer_async(
+            data.get('answer'), state['current_field'], state['conversation_step'], state['counseling_data'],
+            session_key=state['id']
+        )
         
+        response_data = await sync_to_async(_finish_counseling_turn)(request, state, counselor_response)
         return JsonResponse(response_data)
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
+# csrf_exempt/require_POST only wrap sync views in Django 4.2
+process_counseling_answer_async.csrf_exempt = True
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _streamed(request, chunks):
+    """Under ASGI Django collects a sync iterator into a list before sending it, so hand
+    StreamingHttpResponse an async iterator that pulls one chunk at a time instead. The chunks
+    are produced on the request's thread, like the rest of its sync code."""
+    from django.core.handlers.asgi import ASGIRequest
+
+    if not isinstance(request, ASGIRequest):
+        return chunks
+
+    async def async_chunks():
+        iterator = iter(chunks)
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        done = object()
+        try:
+            while True:
+                chunk = await next_chunk(iterator, done)
+                if chunk is done:
+                    return
+                yield chunk
+        finally:
+            if hasattr(iterator, 'close'):
+                await sync_to_async(iterator.close, thread_sensitive=True)()
+
+    return async_chunks()
+
+@csrf_exempt
+@require_POST
+def process_counseling_answer_stream(request):
+    """Streaming process_counseling_answer: Server-Sent Events for the acknowledgement as
+    Gemini writes it ('token'), the final acknowledgement, the next question, predictions
+    and finally the full turn ('done')"""
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        state = _begin_counseling_turn(request, data)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    def events():
+        # Flushed at once, before any generation starts
+        yield ': connected\n\n'
+        try:
+            counselor_response = {}
+            for kind, value in get_counselor(state['flow']).process_answer_stream(
+                data.get('answer'), state['current_field'], state['conversation_step'], state['counseling_data'],
+                session_key=state['id']
+            ):
+                if kind == 'token':
+                    yield _sse_event('token', {'text': value})
+                else:
+                    counselor_response = value
+            
+            # Edit menus are rendered from the 'done' payload as a whole
+            if not counselor_response.get('edit_options'):
+                if counselor_response.get('message'):
+                    yield _sse_event('message', {'message': counselor_response['message']})
+                if counselor_response.get('next_question'):
+                    yield _sse_event('question', {
+                        'next_question': counselor_response['next_question'],
+                        'field': counselor_response.get('field'),
+                    })
+            
+            response_data = _finish_counseling_turn(request, state, counselor_response)
+            if response_data['completed']:
+                yield _sse_event('predictions', {
+                    'predictions': response_data.get('predictions'),
+                    'model_version': response_data.get('model_version'),
+                })
+            
+            # SessionMiddleware saved the session before this generator started running
+            if not _stateless_sessions():
+                request.session.save()
+            yield _sse_event('done', response_data)
+        except Exception as e:
+            yield _sse_event('error', {'error': str(e)})
+    
+    response = StreamingHttpResponse(_streamed(request, events()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 def generate_career_predictions(counseling_data):
-    """Generate career predictions from collected data"""
-    if not ENSEMBLE_MODELS:
-        return None
+    """Generate career predictions from collected data, with the model version that served them"""
+    from . import inference
+
+    if not inference.models_loaded():
+        return None, None
     
     try:
-        features = [
-            "O_score", "C_score", "E_score", "A_score", "N_score",
-            "Numerical_Aptitude", "Verbal_Aptitude", "Abstract_Reasoning", 
-            "Logical_Reasoning", "Spatial_Aptitude",
-            "Enjoy_Teamwork", "Creative_Thinking", "Attention_to_Detail"
-        ]
-        
         # Ensure all features are present, use 5 as default for missing values
-        input_data = [float(counseling_data.get(feat, 5)) for feat in features]
-        
-        # Scale and predict
-        input_array = np.array(input_data).reshape(1, -1)
-        scaled_input = SCALER.transform(input_array)
-        
-        # Ensemble prediction
-        probas_list = [model.predict_proba(scaled_input) for model in ENSEMBLE_MODELS]
-        avg_probas = np.mean(probas_list, axis=0)
-        
-        # Get top 3 predictions
-        top3_indices = np.argsort(avg_probas[0])[::-1][:3]
-        top3_careers = LABEL_ENCODER.inverse_transform(top3_indices)
-        
-        results = []
-        for career, index in zip(top3_careers, top3_indices):
-            probability = avg_probas[0][index]
-            results.append({
-                'career': career,
-                'probability': round(probability * 100, 2)
-            })
-            
-        return results
+        input_data = [float(counseling_data.get(feat, 5)) for feat in inference.FEATURES]
+        
+        # Scaled and scored together with any concurrent requests
+        return inference.predict_one(input_data)
         
     except Exception as e:
         print(f"Prediction error: {e}")
-        return None
+        return None, None
 
-def save_counseling_session(request, counseling_data, predictions):
+def save_counseling_session(counseling_data, predictions, conversation_history):
     """Save counseling session to database"""
     try:
         from .models import CareerSurvey  # Your existing model
         
-        CareerSurvey.objects.create(
-            category='AI_Counseling',
-            responses={
-                'counseling_data': counseling_data,
-                'predictions': predictions,
-                'conversation_history': request.session.get('conversation_history', [])
-            }
-        )
+        with transaction.atomic():
+            survey = CareerSurvey.objects.create(
+                category='AI_Counseling',
+                responses={
+                    'counseling_data': counseling_data,
+                    'predictions': predictions,
+                    'conversation_history': conversation_history
+                }
+            )
+            store_answers([survey])
+            rollups.on_insert()
     except Exception as e:
         print(f"Error saving counseling session: {e}")
 
 @csrf_exempt
 @require_POST
 def get_conversation_history(request):
-    """Get the current conversation history"""
+    """Conversation history messages after an optional cursor (?after=<seq>), so a
+    client that already has part of the conversation only fetches what is new"""
     try:
-        history = request.session.get('conversation_history', [])
-        return JsonResponse({'history': history})
+        after = int(request.GET.get('after', 0))
+        # Stateless sessions keep the history in the browser only
+        if _stateless_sessions():
+            return JsonResponse({'history': [], 'last_seq': 0})
+        log = ConversationLog(request.session.get('conversation_history'), request.session.get('conversation_seq'))
+        return JsonResponse({'history': log.since(after), 'last_seq': log.last_seq})
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
@@ -530,83 +725,71 @@ def get_conversation_history(request):
 def career_counseling(request):
     return render(request, 'career_counseling.html')
 
-# =====================================================
-# Get the directory of the current views.py file
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Define the path to the directory containing the model files
-MODEL_DIR = os.path.join(BASE_DIR, 'ml_models') # Assuming you created an ml_models folder
-print(MODEL_DIR)
-# Check if model files exist and load them globally for efficiency
-# This loads the models only once when Django starts
-try:
-    with open(os.path.join(MODEL_DIR, "ensemble_models_optuna.pkl"), "rb") as f:
-        ENSEMBLE_MODELS = pickle.load(f)
-    with open(os.path.join(MODEL_DIR, "label_encoder.pkl"), "rb") as f:
-        LABEL_ENCODER = pickle.load(f)
-    with open(os.path.join(MODEL_DIR, "scaler.pkl"), "rb") as f:
-        SCALER = pickle.load(f)
-    print("✅ Career Prediction Models loaded successfully!")
-except Exception as e:
-    # IMPORTANT: Handle the case where models aren't found or fail to load
-    print(f"❌ Error loading ML models: {e}. Check if the files are in {MODEL_DIR}")
-    ENSEMBLE_MODELS = None
-    LABEL_ENCODER = None
-    SCALER = None
 
+def readiness(request):
+    """Readiness probe: 200 once this worker is warmed up, 503 until then"""
+    from . import warmup
+
+    report = warmup.readiness_report()
+    return JsonResponse(report, status=200 if report['ready'] else 503)
 
 @csrf_exempt
 @require_POST
 def predict_career(request):
-    if not ENSEMBLE_MODELS:
+    from . import inference
+
+    if not inference.models_loaded():
         return JsonResponse({'error': 'Prediction models are not loaded.'}, status=503)
 
     try:
         data = json.loads(request.body.decode('utf-8'))
         
-        # Define the expected feature keys based on your training script
-        features = [
-            "O_score", "C_score", "E_score", "A_score", "N_score",
-            "Numerical_Aptitude", "Verbal_Aptitude", "Abstract_Reasoning",
-            "Logical_Reasoning", "Spatial_Aptitude",
-            "Enjoy_Teamwork", "Creative_Thinking", "Attention_to_Detail"
-        ]
-        
-        # Extract features in the correct order
-        input_data = [float(data.get(feat, 0)) for feat in features]
-        
-        # 1. Convert to numpy array and reshape for the scaler
-        input_array = np.array(input_data).reshape(1, -1)
-        
-        # 2. Scale the input data
-        scaled_input = SCALER.transform(input_array)
-        
-        # 3. Ensemble Prediction (Soft Voting)
-        probas_list = [model.predict_proba(scaled_input) for model in ENSEMBLE_MODELS]
-        avg_probas = np.mean(probas_list, axis=0)
+        # Extract features in the order the scaler and ensemble were trained on
+        input_data = [float(data.get(feat, 0)) for feat in inference.FEATURES]
         
-        # 4. Get Top 3 Predictions
-        # np.argsort returns indices that would sort the array
-        top3_indices = np.argsort(avg_probas[0])[::-1][:3]
-        top3_careers = LABEL_ENCODER.inverse_transform(top3_indices)
-        
-        # 5. Format results with probabilities
-        results = []
-        for career, index in zip(top3_careers, top3_indices):
-            probability = avg_probas[0][index]
-            results.append({
-                'career': career,
-                'probability': round(probability * 100, 2) # Percentage
-            })
+        # Scaling, soft voting and top-3 selection run in the shared micro-batch
+        results, model_version = inference.predict_one(input_data)
             
-        return JsonResponse({'predictions': results}, status=200)
+        return JsonResponse({'predictions': results, 'model_version': model_version}, status=200)
 
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON in request body.'}, status=400)
     except KeyError as e:
         return JsonResponse({'error': f'Missing expected data field: {e}'}, status=400)
+    except ValueError as e:
+        # Not a number, or nan/inf, which would rank careers on NaN probabilities
+        return JsonResponse({'error': f'Invalid feature value: {e}'}, status=400)
     except Exception as e:
         return JsonResponse({'error': f'An unexpected error occurred: {str(e)}'}, status=400)
 
+@csrf_exempt
+@require_POST
+def predict_career_batch(request):
+    """Stream top-k predictions for a JSONL or CSV upload, one output row per input row"""
+    from . import bulk_predict, inference
+
+    if not inference.models_loaded():
+        return JsonResponse({'error': 'Prediction models are not loaded.'}, status=503)
+
+    input_format = request.GET.get('format') or ('csv' if 'csv' in request.content_type else 'jsonl')
+    output_format = request.GET.get('output', input_format)
+    if input_format not in ('jsonl', 'csv') or output_format not in ('jsonl', 'csv'):
+        return JsonResponse({'error': "Formats must be 'jsonl' or 'csv'."}, status=400)
+
+    try:
+        k = max(int(request.GET.get('k', 3)), 1)
+    except ValueError:
+        return JsonResponse({'error': 'k must be an integer.'}, status=400)
+
+    # Read the body line by line instead of request.body so memory stays flat
+    rows = bulk_predict.iter_feature_rows(bulk_predict.iter_text_lines(request), input_format)
+    results = bulk_predict.iter_predictions(rows, k=k)
+
+    content_type = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    return StreamingHttpResponse(
+        _streamed(request, bulk_predict.format_results(results, output_format, k)), content_type=content_type
+    )
+
 # ====================================================
 # 🔹 Existing Views (Unchanged)
 # ====================================================
@@ -619,7 +802,17 @@ def save_survey(request):
         category = data.get('category')
         responses = data.get('responses')
 
-        CareerSurvey.objects.create(category=category, responses=responses)
+        if getattr(settings, 'SURVEY_INGEST_BUFFERED', False):
+            # Spooled to disk now, written to the database with the next batch
+            if not category or responses is None:
+                return JsonResponse({'error': 'category and responses are required'}, status=400)
+            survey_buffer.submit(category, responses)
+            return JsonResponse({'message': 'Survey saved successfully!'}, status=202)
+
+        with transaction.atomic():
+            survey = CareerSurvey.objects.create(category=category, responses=responses)
+            store_answers([survey])
+            rollups.on_insert()
         return JsonResponse({'message': 'Survey saved successfully!'}, status=200)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
@@ -0,0 +1,146 @@
+# warmup.py
+
+import os
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.template.loader import get_template
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Per-process warm-up state, reported by the /ready/ endpoint
+STATE = {
+    'status': 'pending',    # pending -> running -> done
+    'started_at': None,
+    'duration_ms': None,
+    'steps_ms': {},
+    'errors': {},
+}
+_lock = threading.Lock()
+
+
+def warm_models():
+    """Load the model and push synthetic profiles through the kernel and the batcher"""
+    import numpy as np
+    from . import inference
+
+    model = inference.get_model()
+    if model is None:
+        raise RuntimeError('Prediction models are not loaded.')
+
+    # Touch the single-row and batched code paths without filling the prediction cache
+    rng = np.random.default_rng(0)
+    for rows in (1, getattr(settings, 'PREDICTION_MAX_BATCH_SIZE', 64)):
+        inference.predict_top_k(rng.integers(1, 11, size=(rows, len(inference.FEATURES))).astype(float), model=model)
+    inference.batcher.predict([5.0] * len(inference.FEATURES))
+    inference.watcher.ensure_started()
+
+
+def warm_templates():
+    """Compile every template so the cached loader never parses one on a request"""
+    failed = []
+    for root, _, files in os.walk(TEMPLATE_DIR):
+        for name in files:
+            if not name.endswith('.html'):
+                continue
+            template_name = os.path.relpath(os.path.join(root, name), TEMPLATE_DIR).replace(os.sep, '/')
+            try:
+                get_template(template_name)
+            except Exception as e:
+                failed.append(f"{template_name}: {e}")
+    if failed:
+        raise RuntimeError('; '.join(failed))
+
+
+def warm_reportlab():
+    """Import ReportLab, build the report styles and render a one-line PDF (loads font metrics)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+    from .views import get_report_styles
+
+    styles, title_style, heading_style, normal_style = get_report_styles()
+    SimpleDocTemplate(BytesIO(), pagesize=letter).build([
+        Paragraph("Warm-up", title_style),
+        Paragraph("Warm-up", normal_style),
+        Table([['Warm-up']]),
+    ])
+
+
+def warm_survey_ingest():
+    """Start the buffered survey writer, which replays spool segments left by dead workers"""
+    if getattr(settings, 'SURVEY_INGEST_BUFFERED', False):
+        from .survey_ingest import survey_buffer
+        survey_buffer.start()
+
+
+STEPS = [
+    ('models', warm_models),
+    ('templates', warm_templates),
+    ('reportlab', warm_reportlab),
+    ('survey_ingest', warm_survey_ingest),
+]
+
+
+def run_warmup():
+    """Run every warm-up step once per process; later calls return immediately"""
+    with _lock:
+        if STATE['status'] != 'pending':
+            return STATE
+        STATE['status'] = 'running'
+        STATE['started_at'] = time.time()
+
+    start = time.perf_counter()
+    for name, step in STEPS:
+        step_start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            STATE['errors'][name] = str(e)
+        STATE['steps_ms'][name] = round((time.perf_counter() - step_start) * 1000, 1)
+
+    STATE['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    STATE['status'] = 'done'
+    print(f"🔥 Worker {os.getpid()} warmed up in {STATE['duration_ms']} ms")
+    return STATE
+
+
+def start_background_warmup():
+    """Kick off warm-up without blocking (for servers that have no worker start hook)"""
+    if STATE['status'] == 'pending':
+        threading.Thread(target=run_warmup, name='warmup', daemon=True).start()
+
+
+def readiness_report():
+    """Warm-up status, model load status and version, and prediction cache counters;
+    ready only once warm-up finished without errors and the model is loaded"""
+    if STATE['status'] == 'pending':
+        start_background_warmup()
+
+    report = {
+        'ready': False,
+        'pid': os.getpid(),
+        'warmup': dict(STATE, steps_ms=dict(STATE['steps_ms']), errors=dict(STATE['errors'])),
+        'model': {'loaded': False, 'version': None, 'source': None},
+    }
+
+    # Only describe the model once warm-up has loaded it; a probe must never block on loading
+    if STATE['status'] == 'done':
+        from . import inference
+        model = inference.MODEL
+        if model is not None:
+            report['model'] = {'loaded': True, 'version': model.version, 'source': model.source}
+        report['prediction_cache'] = inference.prediction_cache.stats()
+        report['ready'] = not STATE['errors'] and model is not None
+
+    from . import ai_counselor
+    counselors = dict(ai_counselor._counselors)
+    if counselors:
+        report['counselor'] = {name: counselor.stats() for name, counselor in counselors.items()}
+
+    if getattr(settings, 'SURVEY_INGEST_BUFFERED', False):
+        from .survey_ingest import survey_buffer
+        report['survey_ingest'] = survey_buffer.stats()
+    return report
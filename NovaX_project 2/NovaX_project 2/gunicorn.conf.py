@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# Picked up automatically by `gunicorn` when started from this directory (see render.yaml).
+
+
+def post_worker_init(worker):
+    """Warm the model, templates and ReportLab before the worker accepts traffic (the uvicorn
+    worker runs this hook too, before its event loop starts)"""
+    from NovaX_webpage.warmup import run_warmup
+
+    run_warmup()